@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""Offline throughput benchmarks for the GameDistribution scraper.
+
+Starts the local stand-in server (``benchmarks/server.py``), then runs one
+end-to-end scrape per target count in a fresh subprocess so peak RSS is
+measured per run. It also times ``GamePageParser`` over the fixture corpus
+and ``save_dataset`` over synthetic records, and compares the memory those
+records take as plain dicts and in a ``RecordStore``. Results print as a
+table and can be written as JSON and compared against an earlier run.
+
+    python benchmarks/run_benchmarks.py --sizes 1000,10000 --json bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+import scrape_gamedistribution as sg  # noqa: E402
+import server  # noqa: E402
+from gamedistribution import core  # noqa: E402
+
+DEFAULT_SIZES = "1000,10000,100000"
+LOWER_IS_BETTER = {
+    "p50_ms",
+    "p99_ms",
+    "parse_us_per_page",
+    "save_us_per_record",
+    "store_bytes_per_record",
+    "peak_rss_mb",
+}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+# ----------------------------------------------------------------------
+# Workloads
+# ----------------------------------------------------------------------
+
+def scrape_workload(
+    size: int,
+    base_url: str,
+    *,
+    concurrency: int,
+    image_workers: int,
+) -> Dict[str, object]:
+    """Scrape ``size`` stand-in games end to end and time every target."""
+    latencies: List[float] = []
+    with tempfile.TemporaryDirectory(prefix="gd-bench-") as tmp:
+        workdir = Path(tmp)
+        output = workdir / "games.jsonl"
+        scraper = sg.GameScraper(
+            timeout=30.0,
+            rate_limit=0.0,
+            retries=sg.DEFAULT_RETRIES,
+            backoff_factor=0.5,
+            image_workers=image_workers,
+        )
+        original = scraper.scrape
+
+        def timed_scrape(target, image_dir, previous=None):  # type: ignore[no-untyped-def]
+            started = time.perf_counter()
+            try:
+                return original(target, image_dir, previous)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        scraper.scrape = timed_scrape  # type: ignore[method-assign]
+        targets: Iterator[str] = (f"{base_url}/games/bench-{number}/" for number in range(size))
+        log = sg.DatasetLog(output)
+        errors = 0
+        started = time.perf_counter()
+        try:
+            for record, _ in sg.scrape_many(
+                scraper, targets, workdir / "img", concurrency=concurrency
+            ):
+                if record.error:
+                    errors += 1
+                log.append(record.to_dict())
+        finally:
+            scraper.close()
+        scrape_seconds = time.perf_counter() - started
+        save_started = time.perf_counter()
+        log.close(compact=True)
+        save_seconds = time.perf_counter() - save_started
+
+    return {
+        "targets": size,
+        "errors": errors,
+        "requests": scraper.request_count,
+        "seconds": round(scrape_seconds, 3),
+        "pages_per_sec": round(size / scrape_seconds, 1) if scrape_seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "compact_seconds": round(save_seconds, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def parse_workload(pages: int, rounds: int) -> Dict[str, object]:
+    """Time GamePageParser plus field resolution over fixture pages."""
+    base_url = "https://gamedistribution.com"
+    corpus = [
+        (f"bench-{number}", server.render_page(f"bench-{number}", base_url).decode("utf-8"))
+        for number in range(pages)
+    ]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for slug, html in corpus:
+            parser = sg.GamePageParser()
+            parser.feed(html)
+            sg.build_record(parser, f"{base_url}/games/{slug}/", slug, "")
+    elapsed = time.perf_counter() - started
+    total = pages * rounds
+    average_bytes = sum(len(html) for _, html in corpus) / max(1, len(corpus))
+    return {
+        "pages": total,
+        "avg_page_kb": round(average_bytes / 1024, 1),
+        "parse_us_per_page": round(elapsed / total * 1e6, 1),
+    }
+
+
+def save_workload(records: int) -> Dict[str, object]:
+    """Time ``save_dataset`` over synthetic records shaped like real ones."""
+    dataset = {
+        f"bench-{number}": sg.GameRecord(
+            name=f"Bench {number}",
+            slug=f"bench-{number}",
+            canonical_url=f"https://gamedistribution.com/games/bench-{number}/",
+            description="A benchmark game. " * 8,
+            og_image=f"https://img.gamedistribution.com/bench-{number}.jpg",
+            play_url=f"https://html5.gamedistribution.com/{number:032x}/",
+            publisher=server.PUBLISHERS[number % len(server.PUBLISHERS)],
+            tags=[server.GENRES[number % len(server.GENRES)], "html5"],
+            fetched_at="2025-01-01T00:00:00+00:00",
+        ).to_dict()
+        for number in range(records)
+    }
+    with tempfile.TemporaryDirectory(prefix="gd-bench-") as tmp:
+        path = Path(tmp) / "games.jsonl"
+        started = time.perf_counter()
+        sg.save_dataset(path, dataset)
+        elapsed = time.perf_counter() - started
+        del dataset
+        plain_bytes = traced_bytes(lambda: {entry["slug"]: entry for entry in core._iter_jsonl(path)})
+        store_bytes = traced_bytes(lambda: sg.load_dataset(path))
+    return {
+        "records": records,
+        "save_us_per_record": round(elapsed / records * 1e6, 2),
+        "dict_bytes_per_record": round(plain_bytes / records),
+        "store_bytes_per_record": round(store_bytes / records),
+    }
+
+
+def traced_bytes(build: "Callable[[], object]") -> int:
+    """Bytes still allocated by whatever ``build`` returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+# ----------------------------------------------------------------------
+# Orchestration
+# ----------------------------------------------------------------------
+
+def start_stand_in(args: argparse.Namespace) -> "tuple[subprocess.Popen[str], str]":
+    command = [
+        sys.executable,
+        str(HERE / "server.py"),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate),
+        "--throttle-rate", str(args.throttle_rate),
+        "--slow-rate", str(args.slow_rate),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    assert process.stdout is not None
+    line = process.stdout.readline().strip()
+    if not line.startswith("listening on "):
+        process.terminate()
+        raise RuntimeError(f"stand-in server failed to start: {line!r}")
+    return process, line[len("listening on "):]
+
+
+def run_scrape_subprocess(size: int, base_url: str, args: argparse.Namespace) -> Dict[str, object]:
+    command = [
+        sys.executable,
+        str(Path(__file__).resolve()),
+        "--worker",
+        "--size", str(size),
+        "--base-url", base_url,
+        "--concurrency", str(args.concurrency),
+        "--image-workers", str(args.image_workers),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"benchmark worker failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_report(results: Dict[str, object], baseline: Optional[Dict[str, object]]) -> None:
+    def delta(section: str, key: str, value: object) -> str:
+        if not baseline or not isinstance(value, (int, float)):
+            return ""
+        previous = baseline.get(section)
+        if isinstance(previous, dict):
+            before = previous.get(key)
+        else:
+            before = None
+        if not isinstance(before, (int, float)) or not before:
+            return ""
+        change = (value - before) / before * 100
+        better = change < 0 if key in LOWER_IS_BETTER else change > 0
+        return f" ({change:+.1f}%{' better' if better else ' worse' if change else ''})"
+
+    print(f"{'run':<14}{'pages/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'RSS MB':>9}")
+    for key, value in results.items():
+        if not key.startswith("scrape_") or not isinstance(value, dict):
+            continue
+        print(
+            f"{key[len('scrape_'):]:<14}{value['pages_per_sec']:>10}{value['p50_ms']:>10}"
+            f"{value['p99_ms']:>10}{value['errors']:>8}{str(value['peak_rss_mb']):>9}"
+        )
+        for metric in ("pages_per_sec", "p50_ms", "p99_ms", "peak_rss_mb"):
+            note = delta(key, metric, value[metric])
+            if note:
+                print(f"    {metric}{note}")
+    parse_result = results.get("parse")
+    if isinstance(parse_result, dict):
+        print(
+            f"parse: {parse_result['parse_us_per_page']} µs/page "
+            f"({parse_result['avg_page_kb']} KiB pages)"
+            + delta("parse", "parse_us_per_page", parse_result["parse_us_per_page"])
+        )
+    save_result = results.get("save")
+    if isinstance(save_result, dict):
+        print(
+            f"save_dataset: {save_result['save_us_per_record']} µs/record"
+            + delta("save", "save_us_per_record", save_result["save_us_per_record"])
+        )
+        print(
+            f"record store: {save_result['store_bytes_per_record']} B/record "
+            f"(plain dicts: {save_result['dict_bytes_per_record']} B/record)"
+            + delta("save", "store_bytes_per_record", save_result["store_bytes_per_record"])
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"Comma-separated target counts for scrape runs (default: {DEFAULT_SIZES}).",
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="Scrape concurrency (default: 16).")
+    parser.add_argument("--image-workers", type=int, default=4, help="Image workers (default: 4).")
+    parser.add_argument("--latency", type=float, default=0.005, help="Server latency in seconds (default: 0.005).")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Server latency jitter in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 5xx responses.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429 responses.")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of trickled bodies.")
+    parser.add_argument("--parse-pages", type=int, default=200, help="Distinct fixture pages to parse.")
+    parser.add_argument("--parse-rounds", type=int, default=5, help="Passes over the parse corpus.")
+    parser.add_argument("--save-records", type=int, default=100000, help="Records written by the save benchmark.")
+    parser.add_argument("--skip-scrape", action="store_true", help="Only run the parse and save benchmarks.")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON results to compare against.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.worker:
+        result = scrape_workload(
+            args.size,
+            args.base_url,
+            concurrency=args.concurrency,
+            image_workers=args.image_workers,
+        )
+        print(json.dumps(result))
+        return 0
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    results: Dict[str, object] = {
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "settings": {
+            "concurrency": args.concurrency,
+            "image_workers": args.image_workers,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate,
+            "slow_rate": args.slow_rate,
+        },
+    }
+    if not args.skip_scrape:
+        process, base_url = start_stand_in(args)
+        try:
+            for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+                print(f"[bench] scraping {size} targets...", file=sys.stderr)
+                results[f"scrape_{size}"] = run_scrape_subprocess(size, base_url, args)
+        finally:
+            process.terminate()
+            process.wait()
+    results["parse"] = parse_workload(args.parse_pages, args.parse_rounds)
+    results["save"] = save_workload(args.save_records)
+
+    print_report(results, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
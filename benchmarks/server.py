@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""Local stand-in for GameDistribution used by the benchmark suite.
+
+Serves robots.txt, game detail pages rendered from the fixture templates,
+cover images, a sitemap index and a paged JSON catalog feed. Latency, error injection (429 with
+``Retry-After`` and 5xx) and slow, trickled bodies are all configurable, so
+scraper runs can be reproduced without touching the real site.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import string
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib import parse
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+SITEMAP_CHUNK = 50000
+FEED_PAGE_SIZE = 100
+MAX_FEED_PAGE_SIZE = 1000
+GENRES = ["Puzzle", "Match-3", "Arcade", "Racing", "Action", "Casual", "Sports", "Shooter"]
+PUBLISHERS = [
+    "SOFTGAMES – Mobile Entertainment Services GmbH",
+    "Famobi",
+    "Havana24",
+    "QKY Games",
+    "Bestgames.com",
+]
+WORDS = (
+    "match swap tiles combo level bonus island treasure race drift jump shoot "
+    "puzzle garden farm candy bubble block tower defend hero quest star coins"
+).split()
+
+
+@dataclass
+class StandInConfig:
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    slow_rate: float = 0.0
+    slow_bytes_per_sec: int = 64 * 1024
+    catalog_size: int = 100000
+    seed: int = 1
+
+
+def _load_templates() -> List[string.Template]:
+    pages = sorted((FIXTURES / "pages").glob("*.html"))
+    return [string.Template(path.read_text(encoding="utf-8")) for path in pages]
+
+
+def _load_covers() -> List[bytes]:
+    return [path.read_bytes() for path in sorted((FIXTURES / "covers").glob("*.png"))]
+
+
+TEMPLATES = _load_templates()
+COVERS = _load_covers()
+ROBOTS = string.Template((FIXTURES / "robots.txt").read_text(encoding="utf-8"))
+
+
+def _seed_for(slug: str) -> int:
+    return zlib.crc32(slug.encode("utf-8"))
+
+
+def game_values(slug: str, base_url: str) -> Tuple[Dict[str, str], random.Random]:
+    """Metadata for ``slug`` shared by its page and its feed entry.
+
+    Also returns the seeded generator, positioned after the metadata, so the
+    page's filler content stays the same for the same slug.
+    """
+    seed = _seed_for(slug)
+    rng = random.Random(seed)
+    name = " ".join(word.capitalize() for word in slug.replace("_", "-").split("-") if word)
+    genre = GENRES[seed % len(GENRES)]
+    words = [rng.choice(WORDS) for _ in range(60)]
+    values = {
+        "slug": slug,
+        "name": name or slug,
+        "description": f"{name} is a {genre.lower()} game. " + " ".join(words[:30]) + ".",
+        "instructions": "Use the mouse or touch to play. " + " ".join(words[30:]) + ".",
+        "genre": genre,
+        "publisher": PUBLISHERS[seed % len(PUBLISHERS)],
+        "rating": str(seed % 10),
+        "votes": str(seed % 5000 + 10),
+        "game_id": hashlib.md5(slug.encode("utf-8")).hexdigest(),
+        "base_url": base_url,
+        "page_url": f"{base_url}/games/{slug}/",
+        "cover_url": f"{base_url}/img/{slug}.png",
+    }
+    return values, rng
+
+
+def render_page(slug: str, base_url: str) -> bytes:
+    """Render the fixture page for ``slug``; the same slug always renders the same."""
+    values, rng = game_values(slug, base_url)
+    related = "".join(
+        f'<li><a href="/games/{rng.choice(WORDS)}-{rng.randint(1, 99999)}/">'
+        f'<img src="/img/thumb-{index}.png" alt="" loading="lazy">{rng.choice(WORDS).title()}</a></li>'
+        for index in range(48)
+    )
+    comments = "".join(
+        f'<div class="comment"><b>player{rng.randint(1, 9999)}</b> {" ".join(rng.sample(WORDS, 12))}</div>'
+        for _ in range(80)
+    )
+    footer = "".join(f'<a href="/page/{index}/">{rng.choice(WORDS)}</a>' for index in range(120))
+    values.update(
+        keywords=", ".join([values["genre"].lower(), rng.choice(WORDS), "html5"]),
+        tag_items="".join(f"<li>{tag}</li>" for tag in (values["genre"], "HTML5", "Mobile")),
+        related=related,
+        comments=comments,
+        footer=footer,
+    )
+    template = TEMPLATES[_seed_for(slug) % len(TEMPLATES)]
+    return template.substitute(values).encode("utf-8")
+
+
+def render_feed_page(base_url: str, page: int, amount: int, catalog_size: int) -> bytes:
+    """One page of a JSON catalog feed over the sitemap's games.
+
+    Entries follow GameDistribution's feed layout. About one game in ten has no
+    ``Url`` (play URL), so consumers have to fall back to its detail page.
+    """
+    start = (page - 1) * amount
+    items = []
+    for number in range(max(0, start), min(catalog_size, start + amount)):
+        slug = f"bench-{number}"
+        values, _ = game_values(slug, base_url)
+        item = {
+            "Title": values["name"],
+            "Slug": slug,
+            "Md5": values["game_id"],
+            "Link": values["page_url"],
+            "Description": values["description"],
+            "Instructions": values["instructions"],
+            "Type": "html5",
+            "Asset": [values["cover_url"]],
+            "Category": [values["genre"]],
+            "Tag": ["html5"],
+            "Company": values["publisher"],
+        }
+        if _seed_for(slug) % 10:
+            item["Url"] = f"https://html5.gamedistribution.com/{values['game_id']}/"
+        items.append(item)
+    return json.dumps(items).encode("utf-8")
+
+
+def render_sitemap_index(base_url: str, catalog_size: int) -> bytes:
+    chunks = max(1, (catalog_size + SITEMAP_CHUNK - 1) // SITEMAP_CHUNK)
+    entries = "".join(
+        f"<sitemap><loc>{base_url}/sitemaps/games-{index}.xml.gz</loc></sitemap>"
+        for index in range(chunks)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{entries}</sitemapindex>"
+    ).encode("utf-8")
+
+
+def render_sitemap_chunk(base_url: str, index: int, catalog_size: int) -> bytes:
+    start = index * SITEMAP_CHUNK
+    stop = min(catalog_size, start + SITEMAP_CHUNK)
+    entries = "".join(
+        f"<url><loc>{base_url}/games/bench-{number}/</loc><changefreq>weekly</changefreq></url>"
+        for number in range(start, stop)
+    )
+    body = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{entries}</urlset>"
+    ).encode("utf-8")
+    return gzip.compress(body, compresslevel=5)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandInServer"
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+    def do_GET(self) -> None:  # noqa: N802
+        config = self.server.config
+        self.server.count_request()
+        delay = config.latency
+        if config.jitter:
+            delay += self.server.uniform(0.0, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        path = parse.urlsplit(self.path).path
+        if path != "/robots.txt":
+            roll = self.server.uniform(0.0, 1.0)
+            if roll < config.throttle_rate:
+                self._send_status(429, {"Retry-After": str(config.retry_after)})
+                return
+            if roll < config.throttle_rate + config.error_rate:
+                self._send_status(self.server.choice((500, 502, 503)))
+                return
+
+        routed = self._route(path)
+        if routed is None:
+            self._send_status(404)
+            return
+        body, content_type, compressible = routed
+        self._send_body(body, content_type, compressible)
+
+    def _route(self, path: str) -> Optional[Tuple[bytes, str, bool]]:
+        base_url = self.server.base_url
+        if path == "/robots.txt":
+            return ROBOTS.substitute(base_url=base_url).encode("utf-8"), "text/plain", True
+        if path == "/sitemap.xml":
+            body = render_sitemap_index(base_url, self.server.config.catalog_size)
+            return body, "application/xml", True
+        if path.startswith("/sitemaps/games-") and path.endswith(".xml.gz"):
+            index = int(path[len("/sitemaps/games-"):-len(".xml.gz")] or 0)
+            body = render_sitemap_chunk(base_url, index, self.server.config.catalog_size)
+            return body, "application/x-gzip", False
+        if path == "/feeds/games.json":
+            query = dict(parse.parse_qsl(parse.urlsplit(self.path).query))
+            try:
+                page = max(1, int(query.get("page", 1)))
+                amount = min(max(1, int(query.get("amount", FEED_PAGE_SIZE))), MAX_FEED_PAGE_SIZE)
+            except ValueError:
+                return None
+            body = render_feed_page(base_url, page, amount, self.server.config.catalog_size)
+            return body, "application/json", True
+        segments = [segment for segment in path.split("/") if segment]
+        if len(segments) == 2 and segments[0] == "games":
+            return render_page(segments[1], base_url), "text/html; charset=utf-8", True
+        if len(segments) == 2 and segments[0] == "img" and COVERS:
+            cover = COVERS[_seed_for(segments[1]) % len(COVERS)]
+            return cover, "image/png", False
+        return None
+
+    def _send_status(self, status: int, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_body(self, body: bytes, content_type: str, compressible: bool) -> None:
+        etag = '"%08x"' % zlib.crc32(body)
+        if self.headers.get("If-None-Match") == etag:
+            self._send_status(304, {"ETag": etag})
+            return
+        encoding = None
+        if compressible and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body, compresslevel=6)
+            encoding = "gzip"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        config = self.server.config
+        if config.slow_rate and self.server.uniform(0.0, 1.0) < config.slow_rate:
+            self._trickle(body, config.slow_bytes_per_sec)
+            return
+        self.wfile.write(body)
+
+    def _trickle(self, body: bytes, bytes_per_sec: int) -> None:
+        step = max(1, bytes_per_sec // 10)
+        try:
+            for offset in range(0, len(body), step):
+                self.wfile.write(body[offset:offset + step])
+                self.wfile.flush()
+                time.sleep(0.1)
+        except (BrokenPipeError, ConnectionResetError):
+            # The scraper hangs up once it has parsed enough of the page.
+            pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], config: StandInConfig) -> None:
+        super().__init__(address, StandInHandler)
+        self.config = config
+        self.requests = 0
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def uniform(self, low: float, high: float) -> float:
+        with self._lock:
+            return self._rng.uniform(low, high)
+
+    def choice(self, options: Tuple[int, ...]) -> int:
+        with self._lock:
+            return self._rng.choice(options)
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+
+def start_server(
+    config: StandInConfig,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> Tuple[StandInServer, threading.Thread]:
+    """Start a server on a background thread; ``port=0`` picks a free port."""
+    server = StandInServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, name="stand-in", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port to bind (default: any free port).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed delay per response in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay of up to this many seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of responses answered with 500/503.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of responses answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After value sent with 429 (seconds).")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of bodies trickled out slowly.")
+    parser.add_argument(
+        "--slow-bytes-per-sec",
+        type=int,
+        default=64 * 1024,
+        help="Transfer speed of trickled bodies (default: 65536).",
+    )
+    parser.add_argument(
+        "--catalog-size",
+        type=int,
+        default=100000,
+        help="Number of games listed in the sitemap and feed (default: 100000).",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Seed for latency and error injection.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    config = StandInConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        slow_rate=args.slow_rate,
+        slow_bytes_per_sec=args.slow_bytes_per_sec,
+        catalog_size=args.catalog_size,
+        seed=args.seed,
+    )
+    server = StandInServer((args.host, args.port), config)
+    print(f"listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Scraper, dataset storage and serving tools for GameDistribution game pages."""
@@ -0,0 +1,322 @@
+"""Record/replay transports: every HTTP exchange of a run saved to a cassette
+and served back from it without network access.
+"""
+
+from __future__ import annotations
+
+import base64
+import collections
+import gzip
+import http.client
+import io
+import json
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional, Union
+from urllib import error
+
+from .core import (
+    _JSON_ENCODER,
+    DEFAULT_DRAIN_BYTES,
+    DEFAULT_DRAIN_SECONDS,
+    ConnectionPool,
+    PooledResponse,
+)
+
+
+def iter_cassette(path: Path) -> Iterator[Dict[str, Any]]:
+    """Exchanges in a cassette, stopping quietly at a truncated tail."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        return
+
+
+def _cassette_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _cassette_bytes(exchange: Mapping[str, Any]) -> bytes:
+    if "text" in exchange:
+        return str(exchange["text"]).encode("utf-8")
+    return base64.b64decode(str(exchange.get("base64") or ""))
+
+
+def _http_message(headers: Mapping[str, str]) -> http.client.HTTPMessage:
+    message = http.client.HTTPMessage()
+    for name, value in headers.items():
+        message[name] = value
+    return message
+
+
+class Cassette:
+    """Request/response pairs recorded to a gzip JSON Lines file.
+
+    Each line is one exchange: the request method, URL and headers, then the
+    status, reason, response headers and decoded body, plus ``wait`` (time
+    until the response headers arrived), ``read`` (time blocked reading the
+    body) and the bytes seen on the wire. UTF-8 bodies are stored as text and
+    anything else as base64; gzip squeezes out the repetition across pages.
+    Transport failures are stored with an ``error`` message instead.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def append(self, exchange: Dict[str, Any]) -> None:
+        line = _JSON_ENCODER.encode(exchange) + "\n"
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._fh.write(line)
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+class _RecordingResponse:
+    """Wraps a :class:`PooledResponse` and records its body once it is done."""
+
+    def __init__(
+        self, resp: PooledResponse, exchange: Dict[str, Any], cassette: Cassette
+    ) -> None:
+        self._resp = resp
+        self._exchange = exchange
+        self._cassette = cassette
+        self._chunks: List[bytes] = []
+        self._recorded = False
+        self.url = resp.url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.message = resp.message
+        self.headers = resp.headers
+
+    @property
+    def wire_bytes(self) -> int:
+        return self._resp.wire_bytes
+
+    @property
+    def read_seconds(self) -> float:
+        return self._resp.read_seconds
+
+    @property
+    def decode_seconds(self) -> float:
+        return self._resp.decode_seconds
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        data = self._resp.read(amt)
+        if data:
+            self._chunks.append(data)
+        if amt is None or not data:
+            self._record(partial=False)
+        return data
+
+    def discard(
+        self, limit: int = DEFAULT_DRAIN_BYTES, *, seconds: float = DEFAULT_DRAIN_SECONDS
+    ) -> None:
+        self._resp.discard(limit, seconds=seconds)
+        self._record(partial=True)
+
+    def close(self) -> None:
+        self._resp.close()
+        # A body the caller stopped reading early (a page parsed to the end of
+        # its metadata, say) is kept as far as it was read.
+        self._record(partial=True)
+
+    def _record(self, *, partial: bool) -> None:
+        if self._recorded:
+            return
+        self._recorded = True
+        exchange = self._exchange
+        exchange["read"] = round(self._resp.read_seconds, 6)
+        exchange["wire_bytes"] = self._resp.wire_bytes
+        if partial:
+            exchange["partial"] = True
+        exchange.update(_cassette_body(b"".join(self._chunks)))
+        self._chunks = []
+        self._cassette.append(exchange)
+
+    def __enter__(self) -> "_RecordingResponse":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class RecordingTransport:
+    """A :class:`ConnectionPool` that writes every exchange to a :class:`Cassette`.
+
+    Error statuses and transport failures are recorded too, so a replay
+    sees the same retries, ``Retry-After`` pauses and 404s as the live run.
+    """
+
+    def __init__(self, pool: ConnectionPool, cassette: Cassette) -> None:
+        self.pool = pool
+        self.cassette = cassette
+
+    def open(self, url: str, headers: Dict[str, str], **kwargs: Any) -> _RecordingResponse:
+        exchange: Dict[str, Any] = {
+            "method": "GET",
+            "url": url,
+            "request_headers": dict(headers),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        started = time.perf_counter()
+        try:
+            resp = self.pool.open(url, headers, **kwargs)
+        except error.HTTPError as exc:
+            body = exc.read()
+            exc_headers = dict(exc.headers.items()) if exc.headers is not None else {}
+            exchange.update(
+                status=exc.code,
+                reason=str(exc.reason),
+                headers=exc_headers,
+                wait=round(time.perf_counter() - started, 6),
+                read=0.0,
+                wire_bytes=len(body),
+                **_cassette_body(body),
+            )
+            self.cassette.append(exchange)
+            raise error.HTTPError(
+                exc.url, exc.code, str(exc.reason), _http_message(exc_headers), io.BytesIO(body)
+            ) from None
+        except Exception as exc:
+            exchange["wait"] = round(time.perf_counter() - started, 6)
+            exchange["error"] = f"{type(exc).__name__}: {exc}"
+            self.cassette.append(exchange)
+            raise
+        exchange.update(
+            status=resp.status,
+            reason=resp.reason,
+            headers=dict(resp.headers),
+            wait=round(time.perf_counter() - started, 6),
+        )
+        # The body is stored decoded, so the encoding no longer applies.
+        for name in list(exchange["headers"]):
+            if name.lower() in ("content-encoding", "content-length", "transfer-encoding"):
+                del exchange["headers"][name]
+        return _RecordingResponse(resp, exchange, self.cassette)
+
+    def close(self) -> None:
+        self.pool.close()
+        self.cassette.close()
+
+
+class ReplayedResponse:
+    """Serves a recorded body through the :class:`PooledResponse` interface."""
+
+    def __init__(self, exchange: Mapping[str, Any], body: bytes, latency: float) -> None:
+        self.url = str(exchange["url"])
+        self.status = int(exchange["status"])
+        self.reason = str(exchange.get("reason") or "")
+        self.headers: Dict[str, str] = dict(exchange.get("headers") or {})
+        self.message = _http_message(self.headers)
+        self._body = io.BytesIO(body)
+        self._size = max(1, len(body))
+        self._read_delay = float(exchange.get("read") or 0.0) * latency
+        self._wire_bytes = int(exchange.get("wire_bytes") or len(body))
+        self.wire_bytes = 0
+        self.read_seconds = 0.0
+        self.decode_seconds = 0.0
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        data = self._body.read(amt if amt is not None else -1)
+        if data and self._read_delay:
+            # Spread the recorded body time over the reads.
+            delay = self._read_delay * len(data) / self._size
+            time.sleep(delay)
+            self.read_seconds += delay
+        if data:
+            self.wire_bytes = self._wire_bytes * self._body.tell() // self._size
+        return data
+
+    def discard(
+        self, limit: int = DEFAULT_DRAIN_BYTES, *, seconds: float = DEFAULT_DRAIN_SECONDS
+    ) -> None:
+        # The recorded wire bytes already include whatever was skipped.
+        self.close()
+
+    def close(self) -> None:
+        self._body.close()
+
+    def __enter__(self) -> "ReplayedResponse":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class ReplayTransport:
+    """Answers requests from a :class:`Cassette` instead of the network.
+
+    Exchanges are matched by URL. When a URL was fetched several times (a
+    503 and then its retry, say) the recordings are served in order and the
+    last one is repeated after that. ``latency`` scales the recorded waits:
+    ``1.0`` reproduces the recorded timings and ``0`` answers immediately.
+    A URL missing from the cassette fails like an unreachable host.
+    """
+
+    def __init__(self, path: Path, *, latency: float = 0.0) -> None:
+        self.path = path
+        self.latency = max(0.0, latency)
+        self._exchanges: Dict[str, Deque[Dict[str, Any]]] = {}
+        for exchange in iter_cassette(path):
+            url = exchange.get("url")
+            if isinstance(url, str):
+                self._exchanges.setdefault(url, collections.deque()).append(exchange)
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(len(recorded) for recorded in self._exchanges.values())
+
+    def open(self, url: str, headers: Dict[str, str], **kwargs: Any) -> ReplayedResponse:
+        with self._lock:
+            recorded = self._exchanges.get(url)
+            if not recorded:
+                self.misses += 1
+                exchange = None
+            elif len(recorded) > 1:
+                exchange = recorded.popleft()
+            else:
+                exchange = recorded[0]
+        if exchange is None:
+            raise error.URLError(f"no recorded response for {url}")
+        if self.latency:
+            time.sleep(float(exchange.get("wait") or 0.0) * self.latency)
+        if "error" in exchange:
+            raise error.URLError(str(exchange["error"]))
+        body = _cassette_bytes(exchange)
+        status = int(exchange["status"])
+        if status >= 400:
+            raise error.HTTPError(
+                url,
+                status,
+                str(exchange.get("reason") or ""),
+                _http_message(dict(exchange.get("headers") or {})),
+                io.BytesIO(body),
+            )
+        return ReplayedResponse(exchange, body, self.latency)
+
+    def close(self) -> None:
+        return None
+
+
+Transport = Union[ConnectionPool, RecordingTransport, ReplayTransport]
@@ -0,0 +1,325 @@
+"""SQLite catalog mirroring the dataset, with tag, publisher and full-text indexes."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+from .core import RecordStore, same_content
+
+
+DEFAULT_CATALOG_BATCH = 500
+DEFAULT_CATALOG_FLUSH_INTERVAL = 2.0
+DEFAULT_QUERY_LIMIT = 20
+
+
+CATALOG_COLUMNS = (
+    "name",
+    "canonical_url",
+    "description",
+    "og_image",
+    "play_url",
+    "publisher",
+    "fetched_at",
+    "error",
+)
+
+
+class CatalogDB:
+    """SQLite copy of the dataset, indexed for lookups and full-text search.
+
+    Each record is kept verbatim as JSON next to the columns it is queried
+    by: ``games`` is indexed on slug and publisher, tags are normalised into
+    ``tags``/``game_tags`` so "every puzzle game" is an index range scan, and
+    an external-content FTS5 table over name and description is kept in
+    sync by triggers. Without FTS5 in the linked SQLite, text search falls
+    back to ``LIKE``.
+
+    :meth:`append` buffers records and writes them in one transaction per
+    ``batch_size`` records or ``flush_interval`` seconds, the same way
+    :class:`DatasetLog` batches fsyncs, so mirroring a crawl costs one
+    commit per batch instead of one per record. The database runs in WAL
+    mode, so queries can read it while a crawl is writing.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        batch_size: int = DEFAULT_CATALOG_BATCH,
+        flush_interval: float = DEFAULT_CATALOG_FLUSH_INTERVAL,
+    ) -> None:
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(path), timeout=60.0, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, object]] = {}
+        self._last_flush = time.monotonic()
+        self._tag_ids: Dict[str, int] = {}
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS games ("
+                " id INTEGER PRIMARY KEY,"
+                " slug TEXT NOT NULL UNIQUE,"
+                + "".join(f" {column} TEXT," for column in CATALOG_COLUMNS)
+                + " data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS games_publisher ON games (publisher COLLATE NOCASE)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tags ("
+                " id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE COLLATE NOCASE)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS game_tags ("
+                " tag_id INTEGER NOT NULL, game_id INTEGER NOT NULL,"
+                " PRIMARY KEY (tag_id, game_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS game_tags_game ON game_tags (game_id)")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS games_tags_ad AFTER DELETE ON games BEGIN"
+                " DELETE FROM game_tags WHERE game_id = old.id; END"
+            )
+            self.fts = self._create_fts(conn)
+
+    def _create_fts(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS games_fts USING fts5("
+                " name, description, content='games', content_rowid='id',"
+                " tokenize='unicode61 remove_diacritics 2')"
+            )
+        except sqlite3.OperationalError:
+            return False
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS games_fts_ai AFTER INSERT ON games BEGIN"
+            " INSERT INTO games_fts (rowid, name, description)"
+            " VALUES (new.id, new.name, new.description); END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS games_fts_ad AFTER DELETE ON games BEGIN"
+            " INSERT INTO games_fts (games_fts, rowid, name, description)"
+            " VALUES ('delete', old.id, old.name, old.description); END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS games_fts_au AFTER UPDATE OF name, description"
+            " ON games BEGIN"
+            " INSERT INTO games_fts (games_fts, rowid, name, description)"
+            " VALUES ('delete', old.id, old.name, old.description);"
+            " INSERT INTO games_fts (rowid, name, description)"
+            " VALUES (new.id, new.name, new.description); END"
+        )
+        return True
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def append(self, entry: Dict[str, object]) -> None:
+        """Queue ``entry`` for the next batch, flushing when the batch is due."""
+        slug = entry.get("slug")
+        if not slug:
+            return
+        with self._lock:
+            self._pending[str(slug)] = entry
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every queued record in one transaction. Returns the count."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+        return self.upsert_many(batch.values())
+
+    def upsert_many(self, entries: Iterable[Dict[str, object]]) -> int:
+        """Insert or replace ``entries`` in one transaction. Returns the count."""
+        count = 0
+        with self._transaction() as conn:
+            for entry in entries:
+                if self._upsert(conn, entry):
+                    count += 1
+        return count
+
+    def _upsert(self, conn: sqlite3.Connection, entry: Mapping[str, object]) -> bool:
+        slug = entry.get("slug")
+        if not slug:
+            return False
+        data = json.dumps(entry, ensure_ascii=False)
+        row = conn.execute("SELECT id, data FROM games WHERE slug = ?", (slug,)).fetchone()
+        if row is not None and row[1] == data:
+            return True
+        if row is not None and same_content(json.loads(row[1]), entry):
+            # Only fetch bookkeeping moved; leave the tag and FTS rows alone.
+            conn.execute(
+                "UPDATE games SET fetched_at = ?, data = ? WHERE id = ?",
+                (_catalog_text(entry.get("fetched_at")), data, row[0]),
+            )
+            return True
+        values = [_catalog_text(entry.get(column)) for column in CATALOG_COLUMNS]
+        if row is None:
+            cursor = conn.execute(
+                f"INSERT INTO games (slug, {', '.join(CATALOG_COLUMNS)}, data) "
+                f"VALUES ({', '.join('?' * (len(CATALOG_COLUMNS) + 2))})",
+                (slug, *values, data),
+            )
+            game_id = int(cursor.lastrowid)
+        else:
+            game_id = int(row[0])
+            conn.execute(
+                f"UPDATE games SET {', '.join(f'{column} = ?' for column in CATALOG_COLUMNS)}, "
+                "data = ? WHERE id = ?",
+                (*values, data, game_id),
+            )
+            conn.execute("DELETE FROM game_tags WHERE game_id = ?", (game_id,))
+        tags = entry.get("tags")
+        if isinstance(tags, list):
+            conn.executemany(
+                "INSERT OR IGNORE INTO game_tags (tag_id, game_id) VALUES (?, ?)",
+                [(self._tag_id(conn, str(tag)), game_id) for tag in tags if tag],
+            )
+        return True
+
+    def _tag_id(self, conn: sqlite3.Connection, name: str) -> int:
+        key = name.casefold()
+        tag_id = self._tag_ids.get(key)
+        if tag_id is None:
+            conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,))
+            tag_id = int(conn.execute("SELECT id FROM tags WHERE name = ?", (name,)).fetchone()[0])
+            self._tag_ids[key] = tag_id
+        return tag_id
+
+    def replace_all(self, records: Mapping[str, Dict[str, object]]) -> None:
+        """Make the catalog hold exactly ``records``, in a single transaction."""
+        with self._lock:
+            self._pending.clear()
+        with self._transaction() as conn:
+            for slug in sorted(records.keys()):
+                self._upsert(conn, records[slug])
+            stale = [
+                (slug,)
+                for (slug,) in conn.execute("SELECT slug FROM games")
+                if slug not in records
+            ]
+            conn.executemany("DELETE FROM games WHERE slug = ?", stale)
+            conn.execute(
+                "DELETE FROM tags WHERE id NOT IN (SELECT DISTINCT tag_id FROM game_tags)"
+            )
+            self._tag_ids.clear()
+
+    def records(self) -> Iterator[Dict[str, object]]:
+        """Every stored record, ordered by slug."""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM games ORDER BY slug").fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def get(self, slug: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM games WHERE slug = ?", (slug,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(
+        self,
+        text: Optional[str] = None,
+        *,
+        tags: Iterable[str] = (),
+        publisher: Optional[str] = None,
+        limit: int = DEFAULT_QUERY_LIMIT,
+        offset: int = 0,
+    ) -> List[Dict[str, object]]:
+        """Records matching every given filter.
+
+        ``text`` is split into words that must all occur in the name or
+        description; FTS results are ranked by BM25 with name matches
+        weighted up, everything else is ordered by slug. Tag and publisher
+        comparisons ignore case.
+        """
+        joins = ""
+        clauses: List[str] = []
+        params: List[object] = []
+        order = "g.slug"
+        words = text.split() if text else []
+        if words and self.fts:
+            joins = " JOIN games_fts ON games_fts.rowid = g.id"
+            clauses.append("games_fts MATCH ?")
+            params.append(" ".join('"' + word.replace('"', '""') + '"' for word in words))
+            order = "bm25(games_fts, 10.0, 1.0), g.slug"
+        for word in words if not self.fts else ():
+            clauses.append("(g.name LIKE ? OR g.description LIKE ?)")
+            params.extend([f"%{word}%"] * 2)
+        for tag in tags:
+            clauses.append(
+                "g.id IN (SELECT game_tags.game_id FROM game_tags"
+                " JOIN tags ON tags.id = game_tags.tag_id WHERE tags.name = ?)"
+            )
+            params.append(tag)
+        if publisher:
+            clauses.append("g.publisher = ? COLLATE NOCASE")
+            params.append(publisher)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT g.data FROM games g{joins}{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, max(0, limit), max(0, offset))).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0])
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def _catalog_text(value: object) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def load_catalog(path: Path) -> RecordStore:
+    records = RecordStore()
+    if not path.exists():
+        return records
+    catalog = CatalogDB(path)
+    try:
+        for entry in catalog.records():
+            records[str(entry["slug"])] = entry
+        return records
+    finally:
+        catalog.close()
+
+
+def save_catalog(path: Path, records: Mapping[str, Dict[str, object]]) -> None:
+    catalog = CatalogDB(path)
+    try:
+        catalog.replace_all(records)
+    finally:
+        catalog.close()
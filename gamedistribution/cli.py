@@ -0,0 +1,1129 @@
+"""Command-line interface: argument parsing and the entry point of every mode."""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import cProfile
+import http.client
+import itertools
+import json
+import os
+import pstats
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+from .core import (
+    DEFAULT_BACKOFF,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_IMAGE_WORKERS,
+    DEFAULT_MAX_RATE_LIMIT_SECONDS,
+    DEFAULT_MIN_RATE_LIMIT_SECONDS,
+    DEFAULT_RATE_LIMIT_SECONDS,
+    DEFAULT_REFRESH_LIMIT,
+    DEFAULT_RETRIES,
+    DEFAULT_RETRY_BUDGET,
+    DEFAULT_SERVE_PORT,
+    DEFAULT_SYNC_EVERY,
+    AdaptiveRateLimiter,
+    ChangeFeed,
+    ConnectionPool,
+    CrawlBudget,
+    DatasetLog,
+    FeedIngest,
+    GameRecord,
+    GameScraper,
+    HostRateLimiter,
+    HttpCache,
+    Metrics,
+    RefreshState,
+    ResponseArchive,
+    RetryBudget,
+    RobotsCache,
+    RunJournal,
+    SitemapDiscovery,
+    build_game_url,
+    default_sitemaps,
+    determine_slug,
+    is_catalog_path,
+    load_dataset,
+    log_entry,
+    open_dataset,
+    plan_refresh,
+    plan_targets,
+    reconcile_record,
+    reextract_archive,
+    scrape_many,
+    target_slugs,
+)
+from .cassette import Cassette, RecordingTransport, ReplayTransport, Transport
+from .catalog import DEFAULT_QUERY_LIMIT, CatalogDB, save_catalog
+from .serve import (
+    DEFAULT_RELOAD_INTERVAL,
+    DEFAULT_SERVE_CACHE_ENTRIES,
+    CatalogIndex,
+    CatalogService,
+    DatasetWatcher,
+    ResponseCache,
+    make_catalog_server,
+)
+from .staticsite import build_site
+from .workqueue import (
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_LEASE_SIZE,
+    LeaseKeeper,
+    SharedRateLimiter,
+    WorkQueue,
+    merge_shards,
+    shard_path,
+)
+from .daemon import DEFAULT_CHECKPOINT_INTERVAL, ScrapeDaemon, make_daemon_server, submit_job
+
+
+# ----------------------------------------------------------------------
+# Command-line interface
+# ----------------------------------------------------------------------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="One or more GameDistribution slugs or detail page URLs.",
+    )
+    parser.add_argument(
+        "--input-file",
+        type=Path,
+        help="Optional text file that lists targets (one per line, # for comments).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("games.jsonl"),
+        help="Destination JSON Lines file (default: games.jsonl).",
+    )
+    parser.add_argument(
+        "--img-dir",
+        type=Path,
+        default=Path("img"),
+        help="Directory used to store downloaded cover images.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="HTTP timeout in seconds (default: 30).",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=DEFAULT_RATE_LIMIT_SECONDS,
+        help="Delay between requests to the same host in seconds; with adaptive "
+        "rate control this is the starting point (default: 0.7).",
+    )
+    parser.add_argument(
+        "--no-adaptive",
+        action="store_true",
+        help="Keep --rate-limit fixed instead of adapting it per host to 429/5xx "
+        "responses and latency.",
+    )
+    parser.add_argument(
+        "--min-rate-limit",
+        type=float,
+        default=DEFAULT_MIN_RATE_LIMIT_SECONDS,
+        help="Smallest per-host delay adaptive rate control may reach (default: 0.2).",
+    )
+    parser.add_argument(
+        "--max-rate-limit",
+        type=float,
+        default=DEFAULT_MAX_RATE_LIMIT_SECONDS,
+        help="Largest per-host delay adaptive rate control may back off to (default: 60).",
+    )
+    parser.add_argument(
+        "--retry-budget",
+        type=float,
+        default=DEFAULT_RETRY_BUDGET,
+        help="Allow retries for at most this fraction of all requests, plus 10 "
+        "(default: 0.2).",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="Maximum retry attempts per request (default: 3).",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=DEFAULT_BACKOFF,
+        help="Backoff multiplier for retries (default: 2.0).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Number of targets scraped in parallel (default: 1).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path(".http_cache"),
+        help="Directory for the HTTP validator cache (default: .http_cache).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable conditional requests and the on-disk HTTP cache.",
+    )
+    parser.add_argument(
+        "--sync-every",
+        type=int,
+        default=DEFAULT_SYNC_EVERY,
+        help="Fsync the dataset log after this many records (default: 50).",
+    )
+    parser.add_argument(
+        "--image-workers",
+        type=int,
+        default=DEFAULT_IMAGE_WORKERS,
+        help="Background threads downloading cover images; 0 downloads inline "
+        "(default: 2).",
+    )
+    parser.add_argument(
+        "--discover",
+        action="store_true",
+        help="Also scrape every game listed in the site's sitemaps.",
+    )
+    parser.add_argument(
+        "--sitemap",
+        action="append",
+        default=[],
+        metavar="URL",
+        help="Sitemap or sitemap index to start discovery from (repeatable; "
+        "default: the sitemaps listed in robots.txt).",
+    )
+    parser.add_argument(
+        "--feed",
+        action="append",
+        default=[],
+        metavar="URL",
+        help="JSON catalog feed to ingest page by page (repeatable). Entries become "
+        "records directly; only those without a name or play URL are scraped "
+        "from their detail page. Use {page} in the URL to place the page number, "
+        "otherwise a page parameter is added.",
+    )
+    parser.add_argument(
+        "--feed-pages",
+        type=int,
+        help="Read at most this many pages of each --feed.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-scrape the most stale records already in the dataset.",
+    )
+    parser.add_argument(
+        "--refresh-limit",
+        type=int,
+        default=DEFAULT_REFRESH_LIMIT,
+        help="Maximum number of records picked by --refresh (default: 1000).",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="Stop starting new targets after this many seconds.",
+    )
+    parser.add_argument(
+        "--request-budget",
+        type=int,
+        help="Stop starting new targets after this many HTTP requests.",
+    )
+    parser.add_argument(
+        "--no-compact",
+        action="store_true",
+        help="Leave scraped records in the dataset log instead of folding them "
+        "into the snapshot at the end of the run.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the previous run from its journal (<output>.journal), "
+        "scraping only the targets it did not finish.",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        help="Skip targets whose stored record is error-free and younger than "
+        "this many seconds.",
+    )
+    parser.add_argument(
+        "--changes-file",
+        type=Path,
+        help="Append this run's added/changed/removed/error events here "
+        "(default: <output>.changes.jsonl).",
+    )
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        help="SQLite work queue shared with other workers. Without --work, the "
+        "targets are queued instead of scraped.",
+    )
+    parser.add_argument(
+        "--work",
+        action="store_true",
+        help="Lease targets from --queue and scrape them into this worker's shard "
+        "until the queue is drained.",
+    )
+    parser.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Name of this worker and its shard (default: <hostname>-<pid>).",
+    )
+    parser.add_argument(
+        "--lease-size",
+        type=int,
+        default=DEFAULT_LEASE_SIZE,
+        help="Targets leased from --queue at a time (default: 50).",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help="Lease length; leases of a worker that stops heartbeating are "
+        "handed out again after this long (default: 600).",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Fold every worker shard next to --output into the dataset.",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        type=Path,
+        help="Archive the raw HTML of every fetched game page here for --reextract.",
+    )
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Rebuild the dataset from the pages in --archive-dir without any "
+        "network traffic.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes used by --reextract and --build-site (default: number "
+        "of CPUs).",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        help="SQLite catalog mirroring the dataset with tag, publisher and "
+        "full-text indexes; scraped records are written to it in batches.",
+    )
+    parser.add_argument(
+        "--import-db",
+        action="store_true",
+        help="Load the whole --output dataset into --db and exit.",
+    )
+    parser.add_argument(
+        "--query",
+        action="store_true",
+        help="Search --db instead of scraping and print matching records as JSON "
+        "Lines; filter with --search, --tag and --publisher.",
+    )
+    parser.add_argument(
+        "--search",
+        metavar="TEXT",
+        help="Words that must all appear in the game name or description.",
+    )
+    parser.add_argument(
+        "--tag",
+        action="append",
+        default=[],
+        help="Only games with this tag (repeatable; all must match).",
+    )
+    parser.add_argument(
+        "--publisher",
+        help="Only games from this publisher.",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=DEFAULT_QUERY_LIMIT,
+        help="Maximum number of records printed by --query (default: 20).",
+    )
+    parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="Skip this many matching records, for paging through --query results.",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve read-only JSON queries over --output via HTTP instead of scraping.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address --serve and --daemon listen on (default: 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_SERVE_PORT,
+        help="Port --serve and --daemon listen on (default: 8080).",
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=DEFAULT_RELOAD_INTERVAL,
+        help="Seconds between --serve checks for dataset changes (default: 2).",
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=DEFAULT_SERVE_CACHE_ENTRIES,
+        help="Rendered responses kept in the --serve LRU cache (default: 4096).",
+    )
+    parser.add_argument(
+        "--build-site",
+        type=Path,
+        metavar="DIR",
+        help="Render static game, tag and publisher pages from --output into DIR, "
+        "regenerating only the pages whose inputs changed.",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay resident with the dataset and scraper warm, scraping jobs sent "
+        "with --submit (or POSTed to /jobs) on --socket or --host/--port.",
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        help="Unix socket used by --daemon and --submit instead of a TCP port.",
+    )
+    parser.add_argument(
+        "--submit",
+        action="store_true",
+        help="Send the targets to a running --daemon and print its per-target "
+        "results as JSON Lines.",
+    )
+    parser.add_argument(
+        "--priority",
+        type=int,
+        default=0,
+        help="Priority of a --submit job; higher runs first (default: 0).",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help="Seconds between --daemon checkpoints that fold new records into the "
+        "snapshot; 0 only checkpoints on shutdown (default: 60).",
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        metavar="CASSETTE",
+        help="Record every HTTP exchange of the run (robots.txt, pages, images) "
+        "into this gzip cassette for --replay. The HTTP cache is not used.",
+    )
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        metavar="CASSETTE",
+        help="Answer every request from a cassette made with --record instead of "
+        "the network. The HTTP cache is not used.",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        metavar="SCALE",
+        help="Multiply the recorded response times by this during --replay; 1 "
+        "reproduces them, 0 replays as fast as possible (default: 0).",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        help="Write run metrics here: Prometheus text for .prom/.txt, JSON otherwise.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        help="Capture a cProfile of the run into this file (readable with pstats). "
+        "Only the main thread is profiled, so combine with --concurrency 1 and "
+        "--image-workers 0 to see the whole pipeline.",
+    )
+    return parser.parse_args(argv)
+
+
+def collect_targets(args: argparse.Namespace) -> List[str]:
+    targets: List[str] = list(args.targets)
+    if args.input_file:
+        for line in args.input_file.read_text(encoding="utf-8").splitlines():
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            targets.append(stripped)
+    return targets
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.profile:
+        return run(args)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(str(args.profile))
+        print(f"[info] Profile written to {args.profile}; top functions by cumulative time:")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+
+
+def robots_prefetch_urls(
+    targets: Iterable[str], dataset: Optional[Mapping[str, Dict[str, object]]] = None
+) -> Iterator[str]:
+    """Page URLs of ``targets`` plus the cover URLs already stored for them."""
+    for target in targets:
+        yield build_game_url(target)
+        if dataset is None:
+            continue
+        try:
+            entry = dataset.get(determine_slug(target))
+        except ValueError:
+            continue
+        image = entry.get("og_image") if entry else None
+        if isinstance(image, str) and image:
+            yield image
+
+
+def open_change_feed(args: argparse.Namespace) -> ChangeFeed:
+    if args.changes_file:
+        return ChangeFeed(args.changes_file)
+    return ChangeFeed.for_dataset(args.output)
+
+
+def build_rate_limiter(args: argparse.Namespace) -> HostRateLimiter:
+    if args.no_adaptive:
+        return HostRateLimiter(args.rate_limit)
+    return AdaptiveRateLimiter(
+        args.rate_limit,
+        min_interval=args.min_rate_limit,
+        max_interval=args.max_rate_limit,
+    )
+
+
+def build_transport(args: argparse.Namespace) -> Transport:
+    if args.replay:
+        return ReplayTransport(args.replay, latency=args.replay_latency)
+    pool = ConnectionPool(timeout=args.timeout)
+    if args.record:
+        return RecordingTransport(pool, Cassette(args.record))
+    return pool
+
+
+def build_scraper(
+    args: argparse.Namespace,
+    metrics: Metrics,
+    *,
+    rate_limiter: Optional[HostRateLimiter] = None,
+) -> GameScraper:
+    # Record and replay runs bypass the on-disk caches, so a cassette holds
+    # full responses and replaying it neither reads nor writes the cache.
+    use_cache = not (args.no_cache or args.record or args.replay)
+    return GameScraper(
+        timeout=args.timeout,
+        rate_limit=args.rate_limit,
+        retries=args.retries,
+        backoff_factor=args.backoff,
+        transport=build_transport(args),
+        cache=HttpCache(args.cache_dir) if use_cache else None,
+        image_workers=args.image_workers,
+        metrics=metrics,
+        archive=ResponseArchive(args.archive_dir) if args.archive_dir else None,
+        rate_limiter=rate_limiter or build_rate_limiter(args),
+        retry_budget=RetryBudget(args.retry_budget),
+        robots_cache=RobotsCache(args.cache_dir / "robots") if use_cache else None,
+    )
+
+
+def describe_transport(transport: Transport) -> Optional[str]:
+    if isinstance(transport, RecordingTransport):
+        return f"Recorded {transport.cassette.count} exchanges to {transport.cassette.path}"
+    if isinstance(transport, ReplayTransport):
+        return f"Replayed from {transport.path} ({transport.misses} requests not in the cassette)"
+    return None
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.submit:
+        return run_submit(args)
+    if args.query or args.import_db:
+        return run_catalog(args)
+    if args.serve:
+        return run_serve(args)
+    if args.build_site:
+        return run_build_site(args)
+    if is_catalog_path(args.output):
+        print("[error] --output must be a JSON Lines file; use --db for a SQLite catalog.")
+        return 1
+    if args.record and args.replay:
+        print("[error] --record and --replay cannot be combined.")
+        return 1
+    if args.daemon:
+        return run_daemon(args)
+    if args.reextract:
+        return run_reextract(args)
+    if args.merge_shards:
+        return run_merge_shards(args)
+    if args.work:
+        return run_worker(args)
+    targets = collect_targets(args)
+    journal: Optional[RunJournal] = None
+    if not args.queue:
+        journal = RunJournal.for_dataset(args.output)
+        if args.resume:
+            resumed = journal.resume()
+            if journal.completed:
+                print("[info] The previous run finished; nothing to resume")
+            else:
+                print(f"[info] Resuming {len(resumed)} unfinished targets of the previous run")
+            targets = resumed + targets
+    if not targets and not (args.discover or args.refresh or args.feed):
+        if journal is not None and args.resume:
+            return 0
+        print(
+            "[error] No targets provided. Use positional arguments, --input-file, "
+            "--discover, --feed, --refresh or --resume."
+        )
+        return 1
+    if args.queue:
+        return run_enqueue(args, targets)
+
+    metrics = Metrics()
+    with metrics.timer("load"):
+        dataset = open_dataset(args.output)
+    refresh_state = RefreshState.for_dataset(args.output)
+    if args.refresh:
+        planned = plan_refresh(dataset, refresh_state, limit=args.refresh_limit)
+        print(f"[info] Refresh planned {len(planned)} stale records")
+        targets.extend(planned)
+    if journal is not None and not args.resume:
+        journal.start()
+        # Known targets go into the plan up front, so a resumed run also
+        # covers the ones this run never got to; discovered ones are added
+        # as they are found.
+        for target in targets:
+            try:
+                journal.plan(determine_slug(target), target)
+            except ValueError:
+                pass
+    log = DatasetLog(args.output, sync_every=args.sync_every)
+    catalog = CatalogDB(args.db) if args.db else None
+    changes = open_change_feed(args)
+    scraper = build_scraper(args, metrics)
+    with metrics.timer("robots_prefetch"):
+        origins = scraper.prefetch_robots(robots_prefetch_urls(targets, dataset))
+    if origins:
+        print(f"[info] Loaded robots.txt rules for {origins} hosts")
+
+    def store(record: GameRecord, image_path: Optional[Path]) -> None:
+        store_record(record, image_path, dataset, refresh_state, log, changes, catalog, metrics)
+
+    def ingest(record: GameRecord) -> None:
+        store(*scraper.ingest(record, args.img_dir, dataset.get(record.slug)))
+
+    work: Iterable[str] = targets
+    feeds: Optional[FeedIngest] = None
+    if args.feed:
+        # Complete feed entries are stored as the feed is read; only the
+        # incomplete ones come out as targets for a detail-page scrape.
+        feeds = FeedIngest(
+            scraper,
+            args.feed,
+            ingest,
+            seen_slugs=target_slugs(targets),
+            max_pages=args.feed_pages,
+        )
+        work = itertools.chain(work, feeds)
+    discovery: Optional[SitemapDiscovery] = None
+    if args.discover:
+        discovery = SitemapDiscovery(
+            scraper,
+            args.sitemap or default_sitemaps(scraper),
+            seen_slugs=target_slugs(targets),
+        )
+        work = itertools.chain(work, discovery)
+    plan_stats: Dict[str, int] = {}
+    work = plan_targets(
+        work, journal, dataset=dataset, max_age=args.max_age, stats=plan_stats
+    )
+    budget: Optional[CrawlBudget] = None
+    if args.time_budget or args.request_budget:
+        budget = CrawlBudget(scraper, seconds=args.time_budget, requests=args.request_budget)
+        work = budget.limit(work)
+
+    try:
+        results = scrape_many(
+            scraper,
+            work,
+            args.img_dir,
+            concurrency=args.concurrency,
+            previous=dataset,
+        )
+        for record, image_path in results:
+            store(record, image_path)
+            if journal is not None:
+                journal.finish(record.slug, ok=not record.error)
+        if journal is not None and (budget is None or not budget.stopped):
+            journal.complete()
+    finally:
+        if journal is not None:
+            journal.close()
+        if discovery is not None:
+            discovery.close()
+        scraper.close()
+        if scraper.archive is not None:
+            scraper.archive.close()
+        dataset.close()
+        with metrics.timer("compact"):
+            log.close(compact=not args.no_compact)
+        changes.close()
+        if catalog is not None:
+            catalog.close()
+        refresh_state.save()
+        if args.metrics_file:
+            metrics.write(args.metrics_file)
+
+    skipped = {reason: count for reason, count in plan_stats.items() if count}
+    if skipped:
+        print(f"[info] Skipped targets: {format_counts(skipped)}")
+    print(f"[info] Changes: {format_counts(changes.counts)} (feed: {changes.path})")
+    transport_note = describe_transport(scraper.transport)
+    if transport_note:
+        print(f"[info] {transport_note}")
+    if feeds is not None:
+        print(
+            f"[info] Feeds: {feeds.stats['records']} records from {feeds.stats['entries']} "
+            f"entries on {feeds.stats['pages']} pages, {feeds.stats['detail']} sent to "
+            f"detail pages, {feeds.stats['duplicates']} duplicates"
+        )
+    if discovery is not None:
+        print(
+            f"[info] Discovered {discovery.stats['games']} games in "
+            f"{discovery.stats['sitemaps']} sitemaps ({discovery.stats['skipped']} disallowed)"
+        )
+    stats = scraper.images.stats
+    print(
+        f"[info] Images: {stats['written']} written, {stats['deduplicated']} deduplicated, "
+        f"{stats['unchanged']} unchanged, {stats['failed']} failed"
+    )
+    for host, interval in sorted(scraper.rate_intervals().items()):
+        print(f"[info] Rate limit for {host} ended at {interval:.2f}s between requests")
+    for line in metrics.summary_lines():
+        print(f"[info] {line}")
+    if args.metrics_file:
+        print(f"[info] Metrics written to {args.metrics_file}")
+    if args.no_compact:
+        print(f"[info] Appended records to the log of {args.output}")
+    else:
+        print(f"[info] Wrote dataset to {args.output}")
+    if catalog is not None:
+        print(f"[info] Updated catalog {args.db}")
+    return 0
+
+
+def store_record(
+    record: GameRecord,
+    image_path: Optional[Path],
+    dataset: DatasetView,
+    refresh_state: RefreshState,
+    log: DatasetLog,
+    changes: ChangeFeed,
+    catalog: Optional[CatalogDB],
+    metrics: Metrics,
+) -> None:
+    previous = dataset.get(record.slug)
+    refresh_state.observe(record.to_dict(), previous)
+    entry, event = reconcile_record(record.to_dict(), previous)
+    if event is not None:
+        changes.append(event)
+    dataset[record.slug] = entry
+    line = log_entry(entry, previous)
+    with metrics.timer("save"):
+        log.append(line)
+        # A last_seen touch leaves the catalog's copy as it is.
+        if catalog is not None and line is entry:
+            catalog.append(entry)
+    if record.error:
+        print(f"[error] {record.slug}: {record.error}")
+    else:
+        message = f"[info] Captured {record.slug}"
+        if image_path:
+            message += f" (image saved to {image_path})"
+        print(message)
+
+
+def run_enqueue(args: argparse.Namespace, targets: List[str]) -> int:
+    """Coordinator side of ``--queue``: plan the targets and only enqueue them.
+
+    A scraper is built only for ``--discover``/``--feed``, and the dataset
+    log, change feed and catalog only for the complete feed entries that
+    are stored here instead of being queued.
+    """
+    metrics = Metrics()
+    dataset = open_dataset(args.output)
+    refresh_state = RefreshState.for_dataset(args.output)
+    if args.refresh:
+        planned = plan_refresh(dataset, refresh_state, limit=args.refresh_limit)
+        print(f"[info] Refresh planned {len(planned)} stale records")
+        targets.extend(planned)
+    scraper: Optional[GameScraper] = None
+    discovery: Optional[SitemapDiscovery] = None
+    log: Optional[DatasetLog] = None
+    changes: Optional[ChangeFeed] = None
+    catalog: Optional[CatalogDB] = None
+    work_queue = WorkQueue(args.queue)
+    try:
+        work: Iterable[str] = targets
+        if args.feed or args.discover:
+            scraper = build_scraper(args, metrics)
+        if args.feed:
+            log = DatasetLog(args.output, sync_every=args.sync_every)
+            changes = open_change_feed(args)
+            catalog = CatalogDB(args.db) if args.db else None
+
+            def ingest(record: GameRecord) -> None:
+                store_record(
+                    *scraper.ingest(record, args.img_dir, dataset.get(record.slug)),
+                    dataset, refresh_state, log, changes, catalog, metrics,
+                )
+
+            feeds = FeedIngest(
+                scraper,
+                args.feed,
+                ingest,
+                seen_slugs=target_slugs(targets),
+                max_pages=args.feed_pages,
+            )
+            work = itertools.chain(work, feeds)
+        if args.discover:
+            discovery = SitemapDiscovery(
+                scraper,
+                args.sitemap or default_sitemaps(scraper),
+                seen_slugs=target_slugs(targets),
+            )
+            work = itertools.chain(work, discovery)
+        work = plan_targets(work, None, dataset=dataset, max_age=args.max_age)
+        queued = work_queue.enqueue(work)
+        counts = work_queue.counts()
+    finally:
+        work_queue.close()
+        if discovery is not None:
+            discovery.close()
+        if scraper is not None:
+            scraper.close()
+        dataset.close()
+        if log is not None:
+            log.close(compact=not args.no_compact)
+            refresh_state.save()
+        if changes is not None:
+            changes.close()
+        if catalog is not None:
+            catalog.close()
+    print(f"[info] Queued {queued} targets in {args.queue} ({format_counts(counts)})")
+    return 0
+
+
+def format_counts(counts: Mapping[str, int]) -> str:
+    return ", ".join(f"{count} {state}" for state, count in sorted(counts.items())) or "empty"
+
+
+def run_worker(args: argparse.Namespace) -> int:
+    if not args.queue:
+        print("[error] --work needs --queue.")
+        return 1
+    work_queue = WorkQueue(args.queue)
+    worker = args.worker_id
+    shard = shard_path(args.output, worker)
+    dataset = open_dataset(args.output)
+    # Reconcile against what this worker already wrote to its shard, so a
+    # slug that comes back through an expired lease is not reported twice.
+    written = open_dataset(shard)
+    previous = collections.ChainMap(written, dataset)
+    log = DatasetLog(shard, sync_every=args.sync_every)
+    changes = open_change_feed(args)
+    metrics = Metrics()
+    catalog = CatalogDB(args.db) if args.db else None
+    rate_limiter = SharedRateLimiter(
+        work_queue,
+        args.rate_limit,
+        adaptive=not args.no_adaptive,
+        min_interval=args.min_rate_limit,
+        max_interval=args.max_rate_limit,
+    )
+    scraper = build_scraper(args, metrics, rate_limiter=rate_limiter)
+    done = failed = 0
+    print(f"[info] Worker {worker} writing to {shard}")
+    try:
+        while True:
+            batch = work_queue.lease(worker, args.lease_size, args.lease_seconds)
+            if not batch:
+                counts = work_queue.counts()
+                if not counts.get("pending") and not counts.get("leased"):
+                    break
+                # Other workers still hold leases; wait in case they expire.
+                time.sleep(min(5.0, args.lease_seconds / 10))
+                continue
+            with LeaseKeeper(work_queue, worker, args.lease_seconds):
+                scraper.prefetch_robots(
+                    robots_prefetch_urls([target for _, target in batch], previous)
+                )
+                results = scrape_many(
+                    scraper,
+                    [target for _, target in batch],
+                    args.img_dir,
+                    concurrency=args.concurrency,
+                    previous=previous,
+                )
+                for record, _ in results:
+                    entry, event = reconcile_record(record.to_dict(), previous.get(record.slug))
+                    if event is not None:
+                        changes.append(event)
+                    written[record.slug] = entry
+                    log.append(entry)
+                    if catalog is not None:
+                        catalog.append(entry)
+                    work_queue.complete(worker, record.slug, ok=not record.error)
+                    if record.error:
+                        failed += 1
+                        print(f"[error] {record.slug}: {record.error}")
+                    else:
+                        done += 1
+    finally:
+        scraper.close()
+        if scraper.archive is not None:
+            scraper.archive.close()
+        dataset.close()
+        written.close()
+        log.close(compact=True)
+        if catalog is not None:
+            catalog.close()
+        changes.close()
+        counts = work_queue.counts()
+        work_queue.close()
+    print(
+        f"[info] Worker {worker} scraped {done} targets ({failed} failed); "
+        f"queue: {format_counts(counts)}"
+    )
+    transport_note = describe_transport(scraper.transport)
+    if transport_note:
+        print(f"[info] {transport_note}")
+    return 0
+
+
+def run_merge_shards(args: argparse.Namespace) -> int:
+    refresh_state = RefreshState.for_dataset(args.output)
+    merged = merge_shards(args.output, refresh_state)
+    refresh_state.save()
+    print(f"[info] Merged {merged} records from worker shards into {args.output}")
+    return 0
+
+
+def run_reextract(args: argparse.Namespace) -> int:
+    if not args.archive_dir:
+        print("[error] --reextract needs --archive-dir.")
+        return 1
+    archive = ResponseArchive(args.archive_dir)
+    refresh_state = RefreshState.for_dataset(args.output)
+    log = DatasetLog(args.output, sync_every=max(args.sync_every, 1000))
+    catalog = CatalogDB(args.db) if args.db else None
+    started = time.monotonic()
+    count = 0
+    try:
+        for entry in reextract_archive(archive, jobs=args.jobs):
+            refresh_state.rebase(entry)
+            log.append(entry)
+            if catalog is not None:
+                catalog.append(entry)
+            count += 1
+    finally:
+        log.close(compact=not args.no_compact)
+        if catalog is not None:
+            catalog.close()
+        refresh_state.save()
+    elapsed = time.monotonic() - started
+    print(
+        f"[info] Re-extracted {count} archived pages with {args.jobs} workers "
+        f"in {elapsed:.1f}s into {args.output}"
+    )
+    return 0
+
+
+def run_catalog(args: argparse.Namespace) -> int:
+    if not args.db:
+        print("[error] --query and --import-db need --db.")
+        return 1
+    if args.import_db:
+        started = time.monotonic()
+        records = load_dataset(args.output)
+        save_catalog(args.db, records)
+        elapsed = time.monotonic() - started
+        print(
+            f"[info] Imported {len(records)} records from {args.output} into {args.db} "
+            f"in {elapsed:.1f}s"
+        )
+        if not args.query:
+            return 0
+    if not args.db.exists():
+        print(f"[error] Catalog {args.db} does not exist; create it with --import-db.")
+        return 1
+    catalog = CatalogDB(args.db)
+    try:
+        matches = catalog.query(
+            args.search,
+            tags=args.tag,
+            publisher=args.publisher,
+            limit=args.limit,
+            offset=args.offset,
+        )
+    finally:
+        catalog.close()
+    for entry in matches:
+        print(json.dumps(entry, ensure_ascii=False))
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    index = CatalogIndex()
+    watcher = DatasetWatcher(args.output, index)
+    started = time.monotonic()
+    watcher.poll()
+    print(
+        f"[info] Indexed {len(index.records)} records from {args.output} "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    service = CatalogService(index, ResponseCache(args.cache_entries))
+    server = make_catalog_server(service, args.host, args.port)
+    watcher.start(args.reload_interval)
+    host, port = server.server_address[:2]
+    print(f"[info] Serving {args.output} on http://{host}:{port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        watcher.stop()
+    return 0
+
+
+def run_daemon(args: argparse.Namespace) -> int:
+    metrics = Metrics()
+    started = time.monotonic()
+    dataset = open_dataset(args.output)
+    log = DatasetLog(args.output, sync_every=args.sync_every)
+    catalog = CatalogDB(args.db) if args.db else None
+    changes = open_change_feed(args)
+    refresh_state = RefreshState.for_dataset(args.output)
+    scraper = build_scraper(args, metrics)
+    daemon = ScrapeDaemon(
+        scraper,
+        dataset,
+        log,
+        args.img_dir,
+        refresh_state=refresh_state,
+        changes=changes,
+        catalog=catalog,
+        workers=args.concurrency,
+        checkpoint_interval=args.checkpoint_interval,
+    )
+    server = make_daemon_server(
+        daemon, socket_path=args.socket, host=args.host, port=args.port
+    )
+    daemon.start()
+
+    def stop(signum: int, frame: object) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    if args.socket:
+        where = str(args.socket)
+    else:
+        host, port = server.server_address[:2]  # type: ignore[misc]
+        where = f"http://{host}:{port}/"
+    print(
+        f"[info] Daemon for {args.output} ({len(dataset)} records) ready in "
+        f"{time.monotonic() - started:.1f}s on {where}",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket:
+            args.socket.unlink(missing_ok=True)
+        daemon.close()
+        scraper.close()
+        if scraper.archive is not None:
+            scraper.archive.close()
+        daemon.dataset.close()
+        log.close(compact=not args.no_compact)
+        changes.close()
+        if catalog is not None:
+            catalog.close()
+        refresh_state.save()
+        if args.metrics_file:
+            metrics.write(args.metrics_file)
+    stats = daemon.status()
+    print(
+        f"[info] Daemon stopped after {stats.get('jobs', 0)} jobs: "
+        f"{stats.get('scraped', 0)} scraped, {stats.get('failed', 0)} failed"
+    )
+    return 0
+
+
+def run_submit(args: argparse.Namespace) -> int:
+    targets = collect_targets(args)
+    if not targets:
+        print("[error] No targets provided. Use positional arguments or --input-file.")
+        return 1
+    failed = 0
+    try:
+        for result in submit_job(
+            targets,
+            priority=args.priority,
+            socket_path=args.socket,
+            host=args.host,
+            port=args.port,
+        ):
+            if not result.get("done") and not result.get("ok"):
+                failed += 1
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    except (OSError, RuntimeError, http.client.HTTPException) as exc:
+        print(f"[error] Could not submit the job: {exc}")
+        return 1
+    return 1 if failed else 0
+
+
+def run_build_site(args: argparse.Namespace) -> int:
+    started = time.monotonic()
+    records = load_dataset(args.output)
+    loaded = time.monotonic()
+    stats = build_site(records, args.build_site, jobs=args.jobs)
+    print(
+        f"[info] Site {args.build_site}: rendered {stats['games']} game pages "
+        f"({stats['unchanged']} unchanged, {stats['removed']} removed) and "
+        f"{stats['listings']} listing pages in {time.monotonic() - loaded:.1f}s "
+        f"(dataset loaded in {loaded - started:.1f}s)"
+    )
+    return 0
@@ -0,0 +1,3869 @@
+"""Fetching, parsing and dataset storage shared by every mode of the scraper."""
+
+from __future__ import annotations
+
+import array
+import bisect
+import codecs
+import collections
+import contextlib
+import dataclasses
+import email.utils
+import gzip
+import hashlib
+import heapq
+import http.client
+import io
+import json
+import mimetypes
+import mmap
+import operator
+import os
+import queue
+import re
+import shutil
+import ssl
+import struct
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+from urllib import error, parse, robotparser
+
+if TYPE_CHECKING:
+    from .cassette import Transport
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/122.0 Safari/537.36"
+)
+DEFAULT_RATE_LIMIT_SECONDS = 0.7
+DEFAULT_MIN_RATE_LIMIT_SECONDS = 0.2
+DEFAULT_MAX_RATE_LIMIT_SECONDS = 60.0
+DEFAULT_RETRY_BUDGET = 0.2
+MAX_RETRY_AFTER_SECONDS = 300.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2.0
+DEFAULT_CONCURRENCY = 1
+DEFAULT_POOL_SIZE = 8
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+CHUNK_SIZE = 64 * 1024
+DEFAULT_DRAIN_BYTES = 64 * 1024
+DEFAULT_DRAIN_SECONDS = 0.1
+PARSE_CHUNK_SIZE = 16 * 1024
+DEFAULT_IMAGE_WORKERS = 2
+IMAGE_OBJECTS_DIR = ".objects"
+IMAGE_MANIFEST_FLUSH_EVERY = 100
+DEFAULT_DISCOVERY_BUFFER = 10000
+DEFAULT_REFRESH_LIMIT = 1000
+DEFAULT_QUEUE_ATTEMPTS = 3
+DEFAULT_RETRY_SPACING = 3600.0
+MAX_RETRY_SPACING = 7 * 24 * 3600.0
+ROBOTS_MIN_TTL_SECONDS = 3600.0
+ROBOTS_MAX_TTL_SECONDS = 24 * 3600.0
+DEFAULT_ROBOTS_PREFETCH_WORKERS = 8
+CACHED_HEADERS = ("ETag", "Last-Modified", "Content-Type")
+DEFAULT_SYNC_EVERY = 50
+DEFAULT_SYNC_INTERVAL = 5.0
+DEFAULT_LOG_ROTATE_BYTES = 8 * 1024 * 1024
+DEFAULT_ARCHIVE_SEGMENT_BYTES = 256 * 1024 * 1024
+DEFAULT_REEXTRACT_BATCH = 500
+CATALOG_SUFFIXES = frozenset({".db", ".sqlite", ".sqlite3"})
+_TOUCH_FIELDS = frozenset({"slug", "last_seen"})
+DEFAULT_SERVE_PORT = 8080
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+_INDEX_MAGIC = b"GDIDX002"
+_INDEX_HEADER = struct.Struct(">8sQQQQQQ8s")
+_INDEX_FINGERPRINT_BYTES = 4096
+_INDEX_ENTRY = struct.Struct(">QQIdIHBx")
+_HASH_FIELD = struct.Struct(">Q")
+GAME_JSONLD_TYPES = frozenset({"videogame", "game", "softwareapplication"})
+
+
+RECORD_FIELDS = (
+    "name",
+    "slug",
+    "canonical_url",
+    "description",
+    "og_image",
+    "play_url",
+    "publisher",
+    "tags",
+    "fetched_at",
+    "error",
+    "last_seen",
+)
+_RECORD_FIELD_SET = frozenset(RECORD_FIELDS)
+
+
+@dataclass
+class GameRecord:
+    """One game as stored; ``fetched_at`` only moves when the content changes."""
+
+    name: Optional[str]
+    slug: str
+    canonical_url: str
+    description: Optional[str]
+    og_image: Optional[str]
+    play_url: Optional[str]
+    publisher: Optional[str]
+    tags: Optional[List[str]]
+    fetched_at: str
+    error: Optional[str] = None
+    last_seen: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        # Built by hand: ``dataclasses.asdict`` deep-copies every value.
+        return {
+            "name": self.name,
+            "slug": self.slug,
+            "canonical_url": self.canonical_url,
+            "description": self.description,
+            "og_image": self.og_image,
+            "play_url": self.play_url,
+            "publisher": self.publisher,
+            "tags": list(self.tags) if self.tags else None,
+            "fetched_at": self.fetched_at,
+            "error": self.error,
+            "last_seen": self.last_seen,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "GameRecord":
+        names = {field.name for field in dataclasses.fields(cls)}
+        values = {key: value for key, value in data.items() if key in names}
+        tags = values.get("tags")
+        values["tags"] = list(tags) if isinstance(tags, list) else None
+        return cls(**values)  # type: ignore[arg-type]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, cumulative like Prometheus expects."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding ``fraction`` of the samples."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(bound) for bound in self.bounds] + ["+Inf"], self.counts)),
+        }
+
+
+class Metrics:
+    """Thread-safe counters and per-phase latency histograms for one run."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def observe(self, phase: str, seconds: float, **labels: str) -> None:
+        key = (phase, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextlib.contextmanager
+    def timer(self, phase: str, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started, **labels)
+
+    def phase_totals(self) -> Dict[str, Histogram]:
+        merged: Dict[str, Histogram] = {}
+        with self._lock:
+            for (phase, _), histogram in self._histograms.items():
+                target = merged.setdefault(phase, Histogram(histogram.bounds))
+                target.counts = [a + b for a, b in zip(target.counts, histogram.counts)]
+                target.count += histogram.count
+                target.total += histogram.total
+                target.max = max(target.max, histogram.max)
+        return merged
+
+    def counter_totals(self, name: str, label: str) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for (counter, labels), value in self._counters.items():
+                if counter == name:
+                    key = dict(labels).get(label, "")
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def summary_lines(self) -> List[str]:
+        elapsed = time.monotonic() - self.started
+        lines = [f"Run time {elapsed:.2f}s"]
+        for phase, histogram in sorted(
+            self.phase_totals().items(), key=lambda item: -item[1].total
+        ):
+            lines.append(
+                f"  {phase:<16} {histogram.count:>8} x  total {histogram.total:9.3f}s  "
+                f"mean {histogram.total / histogram.count * 1000:8.2f}ms  "
+                f"p50 <={histogram.quantile(0.5) * 1000:.1f}ms  "
+                f"p99 <={histogram.quantile(0.99) * 1000:.1f}ms"
+            )
+        requests = self.counter_totals("requests", "host")
+        transferred = self.counter_totals("bytes", "host")
+        retries = self.counter_totals("retries", "host")
+        for host in sorted(requests, key=lambda name: -requests[name]):
+            lines.append(
+                f"  {host or '-'}: {int(requests[host])} requests, "
+                f"{int(transferred.get(host, 0))} bytes, {int(retries.get(host, 0))} retries"
+            )
+        return lines
+
+    def to_dict(self) -> Dict[str, object]:
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+        return {
+            "elapsed_seconds": round(time.monotonic() - self.started, 6),
+            "phases": [
+                {"phase": phase, "labels": dict(labels), **histogram.to_dict()}
+                for (phase, labels), histogram in histograms
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ],
+        }
+
+    def prometheus_text(self, prefix: str = "gamedistribution") -> str:
+        """Render everything in the Prometheus text exposition format."""
+
+        def render_labels(labels: Iterable[Tuple[str, str]]) -> str:
+            parts = [
+                '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                for name, value in labels
+            ]
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        lines = [
+            f"# TYPE {prefix}_run_seconds gauge",
+            f"{prefix}_run_seconds {time.monotonic() - self.started:.6f}",
+            f"# TYPE {prefix}_phase_seconds histogram",
+        ]
+        for (phase, labels), histogram in histograms:
+            base = (("phase", phase),) + labels
+            cumulative = 0
+            for bound, count in zip(
+                [str(bound) for bound in histogram.bounds] + ["+Inf"], histogram.counts
+            ):
+                cumulative += count
+                lines.append(
+                    f"{prefix}_phase_seconds_bucket{render_labels(base + (('le', bound),))} "
+                    f"{cumulative}"
+                )
+            lines.append(f"{prefix}_phase_seconds_sum{render_labels(base)} {histogram.total:.6f}")
+            lines.append(f"{prefix}_phase_seconds_count{render_labels(base)} {histogram.count}")
+        declared: Set[str] = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{render_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Save as Prometheus text for ``.prom``/``.txt`` paths, JSON otherwise."""
+        if path.suffix in {".prom", ".txt"}:
+            payload = self.prometheus_text().encode("utf-8")
+        else:
+            payload = json.dumps(self.to_dict(), indent=2).encode("utf-8")
+        atomic_write_bytes(path, payload)
+
+
+class TokenBucket:
+    """Hands out request slots spaced ``interval`` apart."""
+
+    def __init__(self, interval: float, capacity: int = 1) -> None:
+        self.interval = max(0.0, interval)
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated: Optional[float] = None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            paused = max(0.0, self._paused_until - now)
+            if self.interval <= 0:
+                return paused
+            if self._updated is None:
+                # The first request to a host is never delayed.
+                self._tokens = float(self.capacity)
+            else:
+                refill = (now - self._updated) / self.interval
+                self._tokens = min(float(self.capacity), self._tokens + refill)
+            self._updated = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return paused
+            return max(paused, -self._tokens * self.interval)
+
+    def set_interval(self, interval: float) -> None:
+        with self._lock:
+            self.interval = max(0.0, interval)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no slot for the next ``seconds``, e.g. for ``Retry-After``."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class HostRateLimiter:
+    """One :class:`TokenBucket` per host, floored at the host's ``Crawl-delay``."""
+
+    def __init__(self, interval: float, capacity: int = 1) -> None:
+        self.interval = interval
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._floors: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        key = host.lower()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                interval = max(self.interval, self._floors.get(key, 0.0))
+                bucket = TokenBucket(interval, self.capacity)
+                self._buckets[key] = bucket
+            return bucket
+
+    def acquire(self, host: str) -> float:
+        """Block until ``host`` may be contacted again; returns the time slept."""
+        delay = self.bucket(host).reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def set_floor(self, host: str, seconds: float) -> None:
+        key = host.lower()
+        with self._lock:
+            self._floors[key] = seconds
+        bucket = self.bucket(key)
+        if bucket.interval < seconds:
+            bucket.set_interval(seconds)
+
+    def floor(self, host: str) -> float:
+        with self._lock:
+            return self._floors.get(host.lower(), 0.0)
+
+    def pause(self, host: str, seconds: float) -> None:
+        self.bucket(host).pause(seconds)
+
+    def record(self, host: str, status: int, latency: float) -> None:
+        """Feedback from one response; a fixed limiter does not adapt."""
+
+    def intervals(self) -> Dict[str, float]:
+        with self._lock:
+            return {host: bucket.interval for host, bucket in self._buckets.items()}
+
+
+class AdaptiveRateLimiter(HostRateLimiter):
+    """Per-host AIMD: slow down on throttling and errors, speed up when healthy."""
+
+    def __init__(
+        self,
+        interval: float,
+        capacity: int = 1,
+        *,
+        min_interval: float = DEFAULT_MIN_RATE_LIMIT_SECONDS,
+        max_interval: float = DEFAULT_MAX_RATE_LIMIT_SECONDS,
+        healthy_streak: int = 5,
+        speedup: float = 0.8,
+        slowdown: float = 1.5,
+        slow_factor: float = 2.0,
+    ) -> None:
+        super().__init__(interval, capacity)
+        self.min_interval = max(0.0, min(min_interval, interval))
+        self.max_interval = max(max_interval, interval)
+        self.healthy_streak = max(1, healthy_streak)
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.slow_factor = slow_factor
+        # Per host: healthy responses in a row, a latency moving average and
+        # when the interval was last raised.
+        self._health: Dict[str, Tuple[int, float, float]] = {}
+
+    def record(self, host: str, status: int, latency: float) -> None:
+        """Adjust ``host``'s interval; ``status`` 0 stands for a network error."""
+        key = host.lower()
+        bucket = self.bucket(key)
+        floor = max(self.min_interval, self.floor(key))
+        now = time.monotonic()
+        with self._lock:
+            streak, average, raised = self._health.get(key, (0, latency, 0.0))
+            interval = bucket.interval
+            failed = status == 0 or status == 429 or status >= 500
+            slow = latency > average * self.slow_factor and latency > 0.05
+            if failed or slow:
+                streak = 0
+                if now - raised >= interval:
+                    step = self.slowdown if failed else 1.0 + (self.slowdown - 1.0) / 2
+                    interval = min(self.max_interval, max(interval * step, floor, 0.05))
+                    raised = now
+            else:
+                streak += 1
+                if streak >= self.healthy_streak:
+                    streak = 0
+                    interval = max(floor, interval * self.speedup)
+            self._health[key] = (streak, average * 0.8 + latency * 0.2, raised)
+            bucket.set_interval(interval)
+
+
+class RetryBudget:
+    """Caps retries at ``ratio`` of all requests made so far, plus ``minimum``."""
+
+    def __init__(self, ratio: float = DEFAULT_RETRY_BUDGET, minimum: int = 10) -> None:
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.retries >= self.minimum + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+
+def retry_after_seconds(
+    value: Optional[str], *, limit: float = MAX_RETRY_AFTER_SECONDS
+) -> Optional[float]:
+    """Parse a ``Retry-After`` header (delta seconds or an HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(limit, max(0.0, seconds))
+
+
+class PooledResponse:
+    """Response decoded on the fly whose socket is pooled once fully read."""
+
+    def __init__(
+        self,
+        pool: "ConnectionPool",
+        key: Tuple[str, str, int],
+        conn: http.client.HTTPConnection,
+        raw: http.client.HTTPResponse,
+        url: str,
+    ) -> None:
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._raw = raw
+        self.url = url
+        self.status = raw.status
+        self.reason = raw.reason
+        self.message = raw.msg
+        self.headers: Dict[str, str] = dict(raw.msg.items())
+        encoding = (header_value(self.headers, "Content-Encoding") or "").strip().lower()
+        self._decoder: Any = _content_decoder(encoding)
+        self._finished = False
+        # Raw bytes off the socket and the time spent waiting for them versus
+        # decompressing them, for :class:`Metrics`.
+        self.wire_bytes = 0
+        self.read_seconds = 0.0
+        self.decode_seconds = 0.0
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """Return up to ``amt`` decoded bytes, or the rest of the body if omitted."""
+        if self._finished:
+            return b""
+        if amt is None:
+            chunks = []
+            while True:
+                chunk = self.read(CHUNK_SIZE)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+        while True:
+            started = time.perf_counter()
+            try:
+                raw = self._raw.read(amt)
+            except Exception:
+                self.close()
+                raise
+            finally:
+                self.read_seconds += time.perf_counter() - started
+            self.wire_bytes += len(raw)
+            if not raw:
+                started = time.perf_counter()
+                tail = self._decoder.flush() if self._decoder is not None else b""
+                self.decode_seconds += time.perf_counter() - started
+                self._finish()
+                return tail
+            if self._decoder is None:
+                return raw
+            started = time.perf_counter()
+            decoded = self._decoder.decompress(raw)
+            self.decode_seconds += time.perf_counter() - started
+            if decoded:
+                return decoded
+
+    def _finish(self) -> None:
+        self._finished = True
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self._raw.will_close:
+            conn.close()
+        else:
+            self._pool._release(self._key, conn)
+
+    def discard(
+        self, limit: int = DEFAULT_DRAIN_BYTES, *, seconds: float = DEFAULT_DRAIN_SECONDS
+    ) -> None:
+        """Stop reading, keeping the connection if at most ``limit`` bytes are left."""
+        if self._finished:
+            return
+        remaining = self._raw.length
+        if remaining is None or remaining > limit or self._raw.will_close:
+            self.close()
+            return
+        started = time.perf_counter()
+        deadline = started + seconds
+        try:
+            while self._raw.length:
+                raw = self._raw.read1(CHUNK_SIZE)
+                self.wire_bytes += len(raw)
+                if not raw or time.perf_counter() > deadline:
+                    self.close()
+                    return
+            # Reading the empty rest marks the response done on the connection.
+            self._raw.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return
+        finally:
+            self.read_seconds += time.perf_counter() - started
+        self._finish()
+
+    def close(self) -> None:
+        """Stop reading; an unfinished body means the socket cannot be reused."""
+        if self._finished:
+            return
+        self._finished = True
+        self._raw.close()
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """Keep-alive connections per origin; redirects and errors behave like urlopen."""
+
+    def __init__(self, *, timeout: float, max_idle_per_host: int = DEFAULT_POOL_SIZE) -> None:
+        self.timeout = timeout
+        self.max_idle_per_host = max(1, max_idle_per_host)
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def open(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        *,
+        max_redirects: int = MAX_REDIRECTS,
+    ) -> PooledResponse:
+        current = url
+        for _ in range(max_redirects + 1):
+            resp = self._send("GET", current, headers)
+            if resp.status in REDIRECT_STATUSES:
+                location = header_value(resp.headers, "Location")
+                if location:
+                    _drain(resp)
+                    current = parse.urljoin(current, location)
+                    continue
+            if resp.status >= 400:
+                body = resp.read()
+                raise error.HTTPError(current, resp.status, resp.reason, resp.message, io.BytesIO(body))
+            return resp
+        resp.close()
+        raise error.URLError(f"too many redirects fetching {url}")
+
+    def _send(self, method: str, url: str, headers: Dict[str, str]) -> PooledResponse:
+        parsed = parse.urlsplit(url)
+        scheme = (parsed.scheme or "https").lower()
+        if scheme not in {"http", "https"}:
+            raise error.URLError(f"unsupported URL scheme {scheme!r}")
+        host = parsed.hostname or ""
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, host.lower(), port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+
+        conn, reused = self._acquire(key)
+        try:
+            conn.request(method, path, headers=headers)
+            raw = conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive socket; retry once on a
+            # fresh connection before reporting a failure.
+            conn = self._connect(key)
+            try:
+                conn.request(method, path, headers=headers)
+                raw = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+        return PooledResponse(self, key, conn, raw, url)
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _connect(self, key: Tuple[str, str, int]) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+def header_value(headers: Dict[str, str], name: str) -> Optional[str]:
+    value = headers.get(name)
+    if value is not None:
+        return value
+    target = name.lower()
+    for key, value in headers.items():
+        if key.lower() == target:
+            return value
+    return None
+
+
+def _content_decoder(encoding: str) -> Any:
+    if encoding in {"gzip", "x-gzip"}:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _DeflateDecoder()  # type: ignore[return-value]
+    return None
+
+
+class _DeflateDecoder:
+    """Handles both zlib-wrapped and raw deflate, which servers mix up."""
+
+    def __init__(self) -> None:
+        self._decoder: Any = None
+        self._pending = b""
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._decoder is None:
+            self._pending += data
+            if len(self._pending) < 2:
+                return b""
+            data, self._pending = self._pending, b""
+            wrapped = (data[0] & 0x0F) == 8 and ((data[0] << 8) | data[1]) % 31 == 0
+            self._decoder = zlib.decompressobj(zlib.MAX_WBITS if wrapped else -zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self) -> bytes:
+        if self._decoder is None:
+            if not self._pending:
+                return b""
+            return zlib.decompress(self._pending, -zlib.MAX_WBITS)
+        return self._decoder.flush()
+
+
+def _drain(resp: PooledResponse, limit: int = DEFAULT_DRAIN_BYTES) -> None:
+    """Read a small redirect body so its connection can be reused."""
+    consumed = 0
+    while consumed <= limit:
+        chunk = resp.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        consumed += len(chunk)
+    resp.close()
+
+
+@dataclass
+class FetchResult:
+    """Outcome of a GET; ``not_modified`` marks a 304 answered by a validator."""
+
+    url: str
+    status: int
+    body: bytes
+    headers: Dict[str, str]
+    not_modified: bool = False
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    headers: Dict[str, str]
+    stored_at: str
+    body_path: Optional[Path] = None
+    extra: Dict[str, str] = dataclasses.field(default_factory=dict)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers derived from the stored validators."""
+        result: Dict[str, str] = {}
+        etag = header_value(self.headers, "ETag")
+        if etag:
+            result["If-None-Match"] = etag
+        last_modified = header_value(self.headers, "Last-Modified")
+        if last_modified:
+            result["If-Modified-Since"] = last_modified
+        return result
+
+    def read_body(self) -> Optional[bytes]:
+        if self.body_path is None:
+            return None
+        try:
+            return gzip.decompress(self.body_path.read_bytes())
+        except (OSError, EOFError, zlib.error):
+            return None
+
+
+class HttpCache:
+    """On-disk cache of pages that carry an ``ETag`` or ``Last-Modified``."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = self.root / digest[:2] / digest
+        return base.with_suffix(".json"), base.with_suffix(".body.gz")
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(meta, dict) or meta.get("url") != url:
+            return None
+        return CacheEntry(
+            url=url,
+            headers=dict(meta.get("headers") or {}),
+            stored_at=str(meta.get("stored_at") or ""),
+            body_path=body_path if meta.get("has_body") and body_path.exists() else None,
+            extra=dict(meta.get("extra") or {}),
+        )
+
+    def store(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        body: Optional[bytes] = None,
+        *,
+        extra: Optional[Dict[str, str]] = None,
+    ) -> bool:
+        kept = {
+            name: value
+            for name in CACHED_HEADERS
+            for value in [header_value(headers, name)]
+            if value
+        }
+        if "ETag" not in kept and "Last-Modified" not in kept:
+            return False
+        meta_path, body_path = self._paths(url)
+        if body is not None:
+            atomic_write_bytes(body_path, gzip.compress(body, compresslevel=5))
+        meta = {
+            "url": url,
+            "headers": kept,
+            "stored_at": datetime.now(timezone.utc).isoformat(),
+            "has_body": body is not None,
+            "extra": extra or {},
+        }
+        atomic_write_bytes(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        return True
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str]) -> None:
+        """Merge the headers of a 304 into ``entry`` (validators may rotate)."""
+        merged = dict(entry.headers)
+        for name in CACHED_HEADERS:
+            value = header_value(headers, name)
+            if value:
+                merged[name] = value
+        entry.headers = merged
+        meta_path, _ = self._paths(entry.url)
+        meta = {
+            "url": entry.url,
+            "headers": merged,
+            "stored_at": datetime.now(timezone.utc).isoformat(),
+            "has_body": entry.body_path is not None,
+            "extra": entry.extra,
+        }
+        atomic_write_bytes(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+class RobotsCache:
+    """robots.txt kept on disk for its ``Cache-Control`` age, clamped to 1h-24h."""
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        min_ttl: float = ROBOTS_MIN_TTL_SECONDS,
+        max_ttl: float = ROBOTS_MAX_TTL_SECONDS,
+    ) -> None:
+        self.root = root
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+
+    def _path(self, origin: str) -> Path:
+        return self.root / f"{hashlib.sha256(origin.encode('utf-8')).hexdigest()}.json"
+
+    def load(self, origin: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = json.loads(self._path(origin).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("origin") != origin:
+            return None
+        return entry
+
+    def store(self, origin: str, text: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        entry = {
+            "origin": origin,
+            "text": text,
+            "headers": _validator_headers(headers),
+            "expires_at": time.time() + self.ttl(headers),
+        }
+        atomic_write_bytes(
+            self._path(origin), json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        )
+        return entry
+
+    def ttl(self, headers: Dict[str, str]) -> float:
+        seconds: Optional[float] = None
+        cache_control = (header_value(headers, "Cache-Control") or "").lower()
+        match = re.search(r"max-age\s*=\s*(\d+)", cache_control)
+        if "no-store" in cache_control or "no-cache" in cache_control:
+            seconds = 0.0
+        elif match:
+            seconds = float(match.group(1))
+        else:
+            expires = header_value(headers, "Expires")
+            if expires:
+                try:
+                    when = email.utils.parsedate_to_datetime(expires)
+                except (TypeError, ValueError):
+                    when = None
+                if when is not None:
+                    if when.tzinfo is None:
+                        when = when.replace(tzinfo=timezone.utc)
+                    seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        if seconds is None:
+            seconds = self.max_ttl
+        return min(self.max_ttl, max(self.min_ttl, seconds))
+
+    @staticmethod
+    def fresh(entry: Mapping[str, Any]) -> bool:
+        return float(entry.get("expires_at") or 0) > time.time()
+
+
+class GamePageParser(HTMLParser):
+    """Light-weight HTML parser that indexes the tags the field rules read."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.meta_index: Dict[Tuple[str, str], str] = {}
+        self.link_index: Dict[str, str] = {}
+        self.game_jsonld: Optional[Dict[str, object]] = None
+        self.play_frame: Optional[str] = None
+        self.first_frame: Optional[str] = None
+        self._title_chunks: List[str] = []
+        self._capture_title = False
+        self._capture_jsonld = False
+        self.heading: Optional[str] = None
+        self._capture_h1 = False
+        self._h1_depth = 0
+        self._h1_chunks: List[str] = []
+        self._jsonld_chunks: List[str] = []
+        self._head_closed = False
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        # HTMLParser already lower-cases tag and attribute names.
+        if tag == "meta":
+            self._index_meta(attrs)
+        elif tag == "link":
+            self._index_link(attrs)
+        elif tag == "script":
+            script_type = next((value for name, value in attrs if name == "type"), None)
+            # Once the game node is known, later JSON-LD is not even buffered.
+            self._capture_jsonld = self.game_jsonld is None and (
+                (script_type or "").lower() == "application/ld+json"
+            )
+            self._jsonld_chunks = []
+        elif tag == "title":
+            self._capture_title = True
+        elif tag == "body":
+            self._head_closed = True
+        elif tag == "iframe":
+            attrs_dict = dict(attrs)
+            src = attrs_dict.get("src") or attrs_dict.get("data-src") or ""
+            if src:
+                if self.first_frame is None:
+                    self.first_frame = src
+                if self.play_frame is None and (
+                    "html5.gamedistribution.com" in parse.urlparse(src).netloc.lower()
+                ):
+                    self.play_frame = src
+        elif tag == "h1" and self.heading is None:
+            self._capture_h1 = True
+            self._h1_depth = 1
+            self._h1_chunks = []
+        elif self._capture_h1:
+            self._h1_depth += 1
+
+    def _index_meta(self, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attrs_dict = dict(attrs)
+        content = attrs_dict.get("content") or attrs_dict.get("value")
+        if not content:
+            return
+        for attr in META_KEY_ATTRIBUTES:
+            value = attrs_dict.get(attr)
+            if value:
+                key = (attr, value.lower())
+                if key in INDEXED_META and key not in self.meta_index:
+                    self.meta_index[key] = content
+
+    def _index_link(self, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attrs_dict = dict(attrs)
+        rel = (attrs_dict.get("rel") or "").lower()
+        href = attrs_dict.get("href")
+        if href and rel in INDEXED_LINKS and rel not in self.link_index:
+            self.link_index[rel] = href
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "script":
+            if self._capture_jsonld:
+                self._finish_jsonld()
+            self._capture_jsonld = False
+        elif tag == "title":
+            self._capture_title = False
+        elif tag == "head":
+            self._head_closed = True
+        elif self._capture_h1:
+            self._h1_depth -= 1
+            if self._h1_depth <= 0:
+                text = "".join(self._h1_chunks).strip()
+                if text:
+                    self.heading = text
+                self._capture_h1 = False
+                self._h1_chunks = []
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+
+    def handle_data(self, data: str) -> None:
+        if self._capture_jsonld:
+            # Script bodies can arrive in several pieces when the page is fed
+            # incrementally, so they are joined when the tag closes.
+            self._jsonld_chunks.append(data)
+        if self._capture_title:
+            self._title_chunks.append(data)
+        if self._capture_h1:
+            self._h1_chunks.append(data)
+
+    def _finish_jsonld(self) -> None:
+        if self.game_jsonld is None:
+            self.game_jsonld = extract_game_jsonld(["".join(self._jsonld_chunks)])
+        self._jsonld_chunks = []
+
+    @property
+    def title(self) -> Optional[str]:
+        text = "".join(self._title_chunks).strip()
+        return text or None
+
+    @property
+    def complete(self) -> bool:
+        """True once no later markup can change what ``build_record`` returns."""
+        game = self.game_jsonld
+        if game is None or not self._head_closed or self.play_frame is None:
+            return False
+        raw_name = game.get("name")
+        if isinstance(raw_name, str) and clean_game_name(raw_name):
+            return True
+        if self.title and clean_game_name(self.title):
+            return True
+        return self.heading is not None
+
+
+class PageStream:
+    """Parses a response body as it arrives, stopping once the record is complete."""
+
+    def __init__(self, *, early_exit: bool = True, chunk_size: int = PARSE_CHUNK_SIZE) -> None:
+        self.early_exit = early_exit
+        self.chunk_size = chunk_size
+        self.parser = GamePageParser()
+        self.truncated = False
+        self.decode_seconds = 0.0
+        self.parse_seconds = 0.0
+
+    def __call__(self, resp: PooledResponse) -> bytes:
+        # Each retry attempt starts over with a clean parser.
+        self.parser = GamePageParser()
+        self.truncated = False
+        self.decode_seconds = 0.0
+        self.parse_seconds = 0.0
+        decoder = codecs.getincrementaldecoder(_charset(resp.headers))(errors="replace")
+        chunks: List[bytes] = []
+        while True:
+            chunk = resp.read(self.chunk_size)
+            final = not chunk
+            started = time.perf_counter()
+            text = decoder.decode(chunk, final=final)
+            decoded = time.perf_counter()
+            self.parser.feed(text)
+            self.decode_seconds += decoded - started
+            self.parse_seconds += time.perf_counter() - decoded
+            if final:
+                break
+            chunks.append(chunk)
+            if self.early_exit and self.parser.complete:
+                self.truncated = True
+                resp.discard()
+                break
+        return b"".join(chunks)
+
+
+class GameScraper:
+    def __init__(
+        self,
+        *,
+        timeout: float,
+        rate_limit: float,
+        retries: int,
+        backoff_factor: float,
+        transport: Optional[Transport] = None,
+        cache: Optional[HttpCache] = None,
+        image_workers: int = 0,
+        metrics: Optional[Metrics] = None,
+        archive: Optional[ResponseArchive] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        robots_cache: Optional[RobotsCache] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._limiter = rate_limiter or HostRateLimiter(rate_limit)
+        self.retry_budget = retry_budget
+        self.robots_cache = robots_cache
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self.transport = transport or ConnectionPool(timeout=timeout)
+        self.cache = cache
+        self.archive = archive
+        self.metrics = metrics or Metrics()
+        self.images = ImagePipeline(
+            self._request_binary, workers=image_workers, metrics=self.metrics
+        )
+        self._robots: Dict[str, Tuple[robotparser.RobotFileParser, float]] = {}
+        self._robots_lock = threading.Lock()
+        self._robots_fetch_locks: Dict[str, threading.Lock] = {}
+
+    def close(self) -> None:
+        self.images.close()
+        self.transport.close()
+
+    # ------------------------------------------------------------------
+    # Networking helpers
+    # ------------------------------------------------------------------
+    def _wait_for_rate_limit(self, url: str) -> None:
+        host = parse.urlparse(url).netloc
+        if host:
+            waited = self._limiter.acquire(host)
+            self.metrics.observe("rate_limit", waited, host=host)
+
+    def _build_headers(self) -> Dict[str, str]:
+        return {
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": "gzip, deflate",
+        }
+
+    def _robots_for(self, scheme: str, netloc: str) -> robotparser.RobotFileParser:
+        key = f"{scheme}://{netloc}"
+        with self._robots_lock:
+            cached = self._robots.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+            fetch_lock = self._robots_fetch_locks.setdefault(key, threading.Lock())
+        # Only one worker fetches robots.txt for a given origin; the others
+        # wait on the per-origin lock and then reuse the parsed result.
+        with fetch_lock:
+            with self._robots_lock:
+                cached = self._robots.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+            robots_url = parse.urlunparse((scheme, netloc, "/robots.txt", "", "", ""))
+            rp = robotparser.RobotFileParser()
+            rp.set_url(robots_url)
+            rp.parse(self._robots_text(key, robots_url, netloc).splitlines())
+            delay = rp.crawl_delay(USER_AGENT)
+            if delay:
+                self._limiter.set_floor(netloc, float(delay))
+            # Parsed rules are rechecked after the shortest robots TTL, so a
+            # long-running daemon picks up changes; the disk cache decides
+            # whether that costs a request.
+            with self._robots_lock:
+                self._robots[key] = (rp, time.monotonic() + ROBOTS_MIN_TTL_SECONDS)
+            return rp
+
+    def _robots_text(self, origin: str, robots_url: str, netloc: str) -> str:
+        """robots.txt for ``origin`` from the disk cache or the network."""
+        entry = self.robots_cache.load(origin) if self.robots_cache else None
+        if entry is not None and RobotsCache.fresh(entry):
+            self.metrics.increment("robots_cache_hits", host=netloc)
+            return str(entry.get("text") or "")
+        validators = (
+            CacheEntry(robots_url, dict(entry.get("headers") or {}), "") if entry else None
+        )
+        with self.metrics.timer("robots", host=netloc):
+            try:
+                result = self._request_raw(robots_url, check_robots=False, cached=validators)
+            except error.HTTPError as exc:
+                if not 400 <= exc.code < 500:
+                    return str(entry.get("text") or "") if entry else ""
+                text, headers = "", dict(exc.headers.items()) if exc.headers else {}
+            except Exception:  # noqa: BLE001
+                return str(entry.get("text") or "") if entry else ""
+            else:
+                headers = result.headers
+                if result.not_modified and entry is not None:
+                    text = str(entry.get("text") or "")
+                else:
+                    text = decode_body(result.body, result.headers)
+        if self.robots_cache is not None:
+            try:
+                self.robots_cache.store(origin, text, headers)
+            except OSError as exc:
+                print(f"[warn] Could not cache robots.txt for {origin}: {exc}")
+        return text
+
+    def prefetch_robots(
+        self, urls: Iterable[str], *, workers: int = DEFAULT_ROBOTS_PREFETCH_WORKERS
+    ) -> int:
+        """Load robots rules for every origin in ``urls``; returns how many."""
+        origins: Set[Tuple[str, str]] = set()
+        for url in urls:
+            parsed = parse.urlparse(url)
+            if parsed.netloc:
+                origins.add((parsed.scheme or "https", parsed.netloc))
+        if not origins:
+            return 0
+        with ThreadPoolExecutor(
+            max_workers=min(workers, len(origins)), thread_name_prefix="robots"
+        ) as executor:
+            list(executor.map(lambda origin: self._robots_for(*origin), origins))
+        return len(origins)
+
+    def crawl_delay(self, url: str) -> float:
+        return self._limiter.floor(parse.urlparse(url).netloc)
+
+    def rate_intervals(self) -> Dict[str, float]:
+        return self._limiter.intervals()
+
+    def _ensure_allowed(self, url: str) -> None:
+        parsed = parse.urlparse(url)
+        scheme = parsed.scheme or "https"
+        netloc = parsed.netloc
+        if not netloc:
+            return
+        rp = self._robots_for(scheme, netloc)
+        path = parsed.path or "/"
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        if not rp.can_fetch(USER_AGENT, path):
+            raise PermissionError(f"robots.txt forbids accessing {url}")
+
+    def _request_raw(
+        self,
+        url: str,
+        *,
+        check_robots: bool = True,
+        cached: Optional[CacheEntry] = None,
+        reader: Optional[Callable[[PooledResponse], bytes]] = None,
+    ) -> FetchResult:
+        """GET ``url`` with retries; a 304 is only accepted when ``cached`` is given."""
+        if check_robots:
+            self._ensure_allowed(url)
+        headers = self._build_headers()
+        if cached is not None:
+            headers.update(cached.validators())
+        host = parse.urlparse(url).netloc
+        last_error: Optional[Exception] = None
+        retry_after: Optional[float] = None
+        for attempt in range(self.retries):
+            if attempt:
+                if self.retry_budget is not None and not self.retry_budget.try_spend():
+                    self.metrics.increment("retry_budget_exhausted", host=host)
+                    break
+                # A Retry-After already paused the host's bucket, which the
+                # rate-limit wait below honours; otherwise back off locally.
+                delay = 0.0 if retry_after is not None else self.backoff_factor ** (attempt - 1)
+                time.sleep(delay)
+                self.metrics.observe("backoff", delay, host=host)
+                self.metrics.increment("retries", host=host)
+            retry_after = None
+            self._wait_for_rate_limit(url)
+            with self._count_lock:
+                self.request_count += 1
+            if self.retry_budget is not None:
+                self.retry_budget.request()
+            self.metrics.increment("requests", host=host)
+            started = time.perf_counter()
+            try:
+                with self.transport.open(url, headers) as resp:
+                    opened = time.perf_counter() - started
+                    status = resp.status
+                    headers_map = resp.headers
+                    if status == 304:
+                        data = b""
+                    elif reader is not None:
+                        data = reader(resp)
+                    else:
+                        data = resp.read()
+            except error.HTTPError as exc:
+                elapsed = time.perf_counter() - started
+                self.metrics.observe("fetch", elapsed, host=host)
+                self.metrics.increment("responses", host=host, status=str(exc.code))
+                self._limiter.record(host, exc.code, elapsed)
+                if exc.code in (429, 503) and exc.headers is not None:
+                    retry_after = retry_after_seconds(exc.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        self._limiter.pause(host, retry_after)
+                        self.metrics.observe("retry_after", retry_after, host=host)
+                last_error = exc
+                if 400 <= exc.code < 500 and exc.code != 429:
+                    break
+                continue
+            except Exception as exc:  # noqa: BLE001
+                self.metrics.increment("errors", host=host, type=type(exc).__name__)
+                self._limiter.record(host, 0, time.perf_counter() - started)
+                last_error = exc
+                continue
+            self._limiter.record(host, status, opened)
+            self._record_response(host, resp, opened, status)
+            if status == 304:
+                if cached is None:
+                    # Without a stored copy there is nothing to reuse, so an
+                    # empty 304 must not pass for the page itself.
+                    last_error = RuntimeError(f"Unexpected 304 Not Modified for {url}")
+                    break
+                return FetchResult(url, status, b"", headers_map, not_modified=True)
+            return FetchResult(url, status, data, headers_map)
+        if last_error is None:
+            raise RuntimeError(f"Failed to fetch {url}")
+        raise last_error
+
+    def _record_response(
+        self, host: str, resp: PooledResponse, opened: float, status: int
+    ) -> None:
+        # Time to the response headers plus time blocked on body reads.
+        self.metrics.observe("fetch", opened + resp.read_seconds, host=host)
+        if resp.decode_seconds:
+            self.metrics.observe("decompress", resp.decode_seconds, host=host)
+        self.metrics.increment("bytes", resp.wire_bytes, host=host)
+        self.metrics.increment("responses", host=host, status=str(status))
+
+    def _request_text(
+        self,
+        url: str,
+        *,
+        check_robots: bool = True,
+    ) -> Tuple[str, Dict[str, str]]:
+        result = self._request_raw(url, check_robots=check_robots)
+        return decode_body(result.body, result.headers), result.headers
+
+    def _request_binary(
+        self,
+        url: str,
+        *,
+        check_robots: bool = True,
+        cached: Optional[CacheEntry] = None,
+        reader: Optional[Callable[[PooledResponse], bytes]] = None,
+    ) -> FetchResult:
+        return self._request_raw(url, check_robots=check_robots, cached=cached, reader=reader)
+
+    # ------------------------------------------------------------------
+    # Scraping helpers
+    # ------------------------------------------------------------------
+    def _download_image(
+        self,
+        url: str,
+        target_dir: Path,
+        filename_hint: str,
+    ) -> Optional[Path]:
+        return self.images.submit(url, target_dir, filename_hint)
+
+    @staticmethod
+    def _guess_extension(url: str, content_type: Optional[str]) -> str:
+        parsed_url = parse.urlparse(url)
+        ext = Path(parsed_url.path).suffix
+        if ext:
+            return _normalise_extension(ext)
+        if content_type:
+            guessed = mimetypes.guess_extension(content_type.split(";")[0].strip())
+            if guessed:
+                return _normalise_extension(guessed)
+        return ".jpg"
+
+    def scrape(
+        self,
+        target: str,
+        image_dir: Path,
+        previous: Optional[Dict[str, object]] = None,
+    ) -> Tuple[GameRecord, Optional[Path]]:
+        """Scrape one game page, reusing ``previous`` when it answers 304."""
+        slug = determine_slug(target)
+        game_url = build_game_url(target)
+        with self.metrics.timer("scrape"):
+            return self._scrape(slug, game_url, image_dir, previous)
+
+    def _scrape(
+        self,
+        slug: str,
+        game_url: str,
+        image_dir: Path,
+        previous: Optional[Dict[str, object]],
+    ) -> Tuple[GameRecord, Optional[Path]]:
+        fetched_at = datetime.now(timezone.utc).isoformat()
+
+        entry = self.cache.lookup(game_url) if self.cache else None
+        reusable = previous if previous and not previous.get("error") else None
+        if entry is not None and reusable is None and entry.body_path is None:
+            entry = None
+        if entry is not None and self.archive is not None and slug not in self.archive:
+            # A 304 would leave nothing to archive, so fetch the page in full.
+            entry = None
+
+        # Archived pages are kept whole so later extraction fixes can use
+        # parts of the page the current rules stop reading before.
+        stream = PageStream(early_exit=self.archive is None)
+        try:
+            result = self._request_raw(game_url, cached=entry, reader=stream)
+        except Exception as exc:  # noqa: BLE001
+            record = GameRecord(
+                name=None,
+                slug=slug,
+                canonical_url=game_url,
+                description=None,
+                og_image=None,
+                play_url=None,
+                publisher=None,
+                tags=None,
+                fetched_at=fetched_at,
+                error=str(exc),
+            )
+            return record, None
+
+        if result.not_modified and entry is not None:
+            if self.cache:
+                self.cache.refresh(entry, result.headers)
+            if reusable is not None:
+                record = GameRecord.from_dict(reusable)
+                record.fetched_at = fetched_at
+            else:
+                parser = GamePageParser()
+                with self.metrics.timer("parse"):
+                    parser.feed(decode_body(entry.read_body() or b"", entry.headers))
+                with self.metrics.timer("extract"):
+                    record = build_record(parser, game_url, slug, fetched_at)
+        else:
+            self.metrics.observe("decode", stream.decode_seconds)
+            self.metrics.observe("parse", stream.parse_seconds)
+            # A body cut short by early exit still holds everything the
+            # extraction needs, so it is a valid cache entry as well.
+            if self.cache:
+                with self.metrics.timer("cache_store"):
+                    self.cache.store(game_url, result.headers, result.body)
+            if self.archive is not None:
+                with self.metrics.timer("archive"):
+                    self.archive.store(slug, game_url, result.headers, result.body, fetched_at)
+            with self.metrics.timer("extract"):
+                record = build_record(stream.parser, game_url, slug, fetched_at)
+
+        return record, self._cover(record, image_dir, reusable)
+
+    def ingest(
+        self,
+        record: GameRecord,
+        image_dir: Path,
+        previous: Optional[Dict[str, object]] = None,
+    ) -> Tuple[GameRecord, Optional[Path]]:
+        """Take a record built elsewhere (a catalog feed) as if it were scraped."""
+        reusable = previous if previous and not previous.get("error") else None
+        return record, self._cover(record, image_dir, reusable)
+
+    def _cover(
+        self,
+        record: GameRecord,
+        image_dir: Path,
+        reusable: Optional[Dict[str, object]],
+    ) -> Optional[Path]:
+        if not record.og_image:
+            return None
+        if (
+            reusable is not None
+            and record_fingerprint(record.to_dict()) == record_fingerprint(reusable)
+            and self.images.has(record.og_image, image_dir)
+        ):
+            # Unchanged game with its cover already on disk: image work
+            # only follows content churn.
+            self.metrics.increment("images_unchanged_skipped")
+            return None
+        filename_hint = record.name or record.slug
+        return self._download_image(record.og_image, image_dir, filename_hint)
+
+
+class _FileSink:
+    """Streams a response body to a temp file, hashing it along the way."""
+
+    def __init__(self, tmp_dir: Path) -> None:
+        self.tmp_dir = tmp_dir
+        self.path: Optional[Path] = None
+        self.sha256 = ""
+        self.size = 0
+        self.write_seconds = 0.0
+
+    def __call__(self, resp: PooledResponse) -> bytes:
+        self.discard()
+        self.write_seconds = 0.0
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+        self.path = Path(name)
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as fh:
+            while True:
+                chunk = resp.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                started = time.perf_counter()
+                digest.update(chunk)
+                fh.write(chunk)
+                self.write_seconds += time.perf_counter() - started
+                size += len(chunk)
+        # mkstemp creates 0600 files; covers should read like any other file.
+        os.chmod(self.path, 0o644)
+        self.sha256 = digest.hexdigest()
+        self.size = size
+        return b""
+
+    def discard(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+            self.path = None
+
+
+class ImagePipeline:
+    """Downloads covers on worker threads into a content-addressed store."""
+
+    def __init__(
+        self,
+        fetch: Callable[..., FetchResult],
+        *,
+        workers: int = DEFAULT_IMAGE_WORKERS,
+        queue_size: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self._fetch = fetch
+        self.metrics = metrics or Metrics()
+        self.workers = max(0, workers)
+        self._queue: "queue.Queue[Optional[Tuple[str, Path, str]]]" = queue.Queue(
+            maxsize=queue_size or max(1, self.workers * 4)
+        )
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._manifests: Dict[Path, Dict[str, Dict[str, object]]] = {}
+        self._dirty: Set[Path] = set()
+        self._updates = 0
+        self.stats: Dict[str, int] = {"written": 0, "deduplicated": 0, "unchanged": 0, "failed": 0}
+
+    def submit(self, url: str, image_dir: Path, filename_hint: str) -> Optional[Path]:
+        """Queue a download; returns the saved path only when running inline."""
+        if self.workers == 0:
+            return self.download(url, image_dir, filename_hint)
+        self._start()
+        # Blocks while the queue is full, which throttles page scraping to
+        # the pace the image workers can sustain.
+        self._queue.put((url, image_dir, filename_hint))
+        return None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"image-{number}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self.download(*job)
+            finally:
+                self._queue.task_done()
+
+    def download(self, url: str, image_dir: Path, filename_hint: str) -> Optional[Path]:
+        with self.metrics.timer("image"):
+            return self._download(url, image_dir, filename_hint)
+
+    def has(self, url: str, image_dir: Path) -> bool:
+        """Whether ``url`` was stored before and its object is still intact."""
+        known = self._manifest(image_dir).get(url)
+        return known is not None and self._present(image_dir, known)
+
+    @staticmethod
+    def _present(image_dir: Path, known: Mapping[str, object]) -> bool:
+        stored = image_dir / IMAGE_OBJECTS_DIR / str(known.get("object", ""))
+        try:
+            return stored.is_file() and stored.stat().st_size == known.get("size")
+        except OSError:
+            return False
+
+    def _download(self, url: str, image_dir: Path, filename_hint: str) -> Optional[Path]:
+        safe_name = sanitize_filename(filename_hint) or "image"
+        objects_dir = image_dir / IMAGE_OBJECTS_DIR
+        known = self._manifest(image_dir).get(url)
+        cached: Optional[CacheEntry] = None
+        if known is not None and self._present(image_dir, known):
+            cached = CacheEntry(url, dict(known.get("headers") or {}), "")
+
+        sink = _FileSink(objects_dir / "tmp")
+        try:
+            result = self._fetch(url, cached=cached, reader=sink)
+        except Exception as exc:  # noqa: BLE001
+            sink.discard()
+            self._count("failed")
+            print(f"[warn] Image download failed for {url}: {exc}")
+            return None
+
+        store_started = time.perf_counter()
+        try:
+            if result.not_modified and known is not None:
+                stored = objects_dir / str(known["object"])
+                headers = {**dict(known.get("headers") or {}), **_validator_headers(result.headers)}
+                self._count("unchanged")
+            else:
+                if sink.path is None:
+                    raise RuntimeError(f"no body received for {url}")
+                content_type = header_value(result.headers, "Content-Type")
+                extension = GameScraper._guess_extension(url, content_type)
+                stored = objects_dir / sink.sha256[:2] / f"{sink.sha256}{extension}"
+                if stored.exists():
+                    sink.discard()
+                    self._count("deduplicated")
+                else:
+                    stored.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(sink.path, stored)
+                    sink.path = None
+                    self._count("written")
+                headers = _validator_headers(result.headers)
+                if content_type:
+                    headers["Content-Type"] = content_type
+            extension = stored.suffix
+            link = image_dir / f"{safe_name}{extension}"
+            _link_into_place(stored, link)
+        except OSError as exc:
+            sink.discard()
+            self._count("failed")
+            print(f"[warn] Could not store image for {url}: {exc}")
+            return None
+
+        self._remember(
+            image_dir,
+            url,
+            {
+                "object": stored.relative_to(objects_dir).as_posix(),
+                "size": stored.stat().st_size,
+                "headers": headers,
+                "link": link.name,
+            },
+        )
+        self.metrics.observe(
+            "image_write", sink.write_seconds + time.perf_counter() - store_started
+        )
+        return link
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _manifest(self, image_dir: Path) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            manifest = self._manifests.get(image_dir)
+            if manifest is None:
+                manifest = {}
+                path = image_dir / IMAGE_OBJECTS_DIR / "manifest.json"
+                try:
+                    loaded = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    loaded = {}
+                if isinstance(loaded, dict):
+                    manifest.update(loaded)
+                self._manifests[image_dir] = manifest
+            return manifest
+
+    def _remember(self, image_dir: Path, url: str, entry: Dict[str, object]) -> None:
+        manifest = self._manifest(image_dir)
+        with self._lock:
+            manifest[url] = entry
+            self._dirty.add(image_dir)
+            self._updates += 1
+            flush = self._updates % IMAGE_MANIFEST_FLUSH_EVERY == 0
+        if flush:
+            self._save_manifests()
+
+    def _save_manifests(self) -> None:
+        with self._lock:
+            pending = [(image_dir, dict(self._manifests[image_dir])) for image_dir in self._dirty]
+            self._dirty.clear()
+        for image_dir, manifest in pending:
+            path = image_dir / IMAGE_OBJECTS_DIR / "manifest.json"
+            atomic_write_bytes(path, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+
+    def flush(self) -> None:
+        self._save_manifests()
+
+    def close(self) -> None:
+        """Wait for queued downloads, stop the workers and save manifests."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+        self._save_manifests()
+
+
+def _validator_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    kept: Dict[str, str] = {}
+    for name in ("ETag", "Last-Modified"):
+        value = header_value(headers, name)
+        if value:
+            kept[name] = value
+    return kept
+
+
+def _link_into_place(source: Path, link: Path) -> None:
+    """Point ``link`` at ``source`` with a hard link, swapped in atomically."""
+    try:
+        if link.exists() and os.path.samefile(source, link):
+            return
+    except OSError:
+        pass
+    link.parent.mkdir(parents=True, exist_ok=True)
+    tmp_link = link.with_name(f".{link.name}.{threading.get_ident()}.link")
+    tmp_link.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp_link)
+    except OSError:
+        # Filesystems without hard links get a plain copy instead.
+        shutil.copyfile(source, tmp_link)
+    os.replace(tmp_link, link)
+
+
+# ----------------------------------------------------------------------
+# Parsing helpers
+# ----------------------------------------------------------------------
+
+def build_record(
+    parser: GamePageParser,
+    game_url: str,
+    slug: str,
+    fetched_at: str,
+) -> GameRecord:
+    """Resolve every record field from a fed parser in one pass."""
+    canonical_href = parser.link_index.get("canonical")
+    canonical_url = parse.urljoin(game_url, canonical_href) if canonical_href else game_url
+    fields = resolve_fields(parser, canonical_url)
+    return GameRecord(
+        name=fields.get("name"),  # type: ignore[arg-type]
+        slug=slug,
+        canonical_url=canonical_url,
+        description=fields.get("description"),  # type: ignore[arg-type]
+        og_image=fields.get("og_image"),  # type: ignore[arg-type]
+        play_url=fields.get("play_url"),  # type: ignore[arg-type]
+        publisher=fields.get("publisher"),  # type: ignore[arg-type]
+        tags=fields.get("tags") or None,  # type: ignore[arg-type]
+        fetched_at=fetched_at,
+    )
+
+
+def feed_until_complete(
+    parser: GamePageParser, text: str, chunk_size: int = PARSE_CHUNK_SIZE
+) -> None:
+    """Feed ``text`` in chunks, stopping once :attr:`GamePageParser.complete`."""
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start : start + chunk_size])
+        if parser.complete:
+            return
+
+
+def decode_body(data: bytes, headers_map: Dict[str, str]) -> str:
+    return data.decode(_charset(headers_map), errors="replace")
+
+
+def _charset(headers_map: Dict[str, str]) -> str:
+    encoding = "utf-8"
+    content_type = header_value(headers_map, "Content-Type") or ""
+    if "charset=" in content_type:
+        encoding = content_type.split("charset=")[-1].split(";")[0].strip().strip('"')
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return "utf-8"
+
+
+def determine_slug(url_or_slug: str) -> str:
+    if "://" not in url_or_slug:
+        return url_or_slug.strip("/")
+    parsed = parse.urlparse(url_or_slug)
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    if not segments:
+        raise ValueError(f"Cannot determine slug from {url_or_slug!r}")
+    if "games" in segments:
+        idx = segments.index("games")
+        if idx + 1 >= len(segments):
+            raise ValueError(f"URL lacks slug component: {url_or_slug!r}")
+        return segments[idx + 1]
+    return segments[-1]
+
+
+def build_game_url(url_or_slug: str) -> str:
+    if "://" in url_or_slug:
+        base = url_or_slug
+    else:
+        base = f"https://gamedistribution.com/games/{url_or_slug.strip('/')}/"
+    parsed = parse.urlparse(base)
+    scheme = parsed.scheme or "https"
+    netloc = parsed.netloc or "gamedistribution.com"
+    path = parsed.path
+    if not path.endswith("/"):
+        path += "/"
+    return parse.urlunparse((scheme, netloc, path, "", "", ""))
+
+
+def extract_game_jsonld(blocks: Iterable[str]) -> Optional[Dict[str, object]]:
+    """First VideoGame/Game/SoftwareApplication node, searched breadth-first."""
+    for block in blocks:
+        text = block.strip()
+        if not text:
+            continue
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            continue
+        pending: Deque[Dict[str, object]] = collections.deque()
+        if isinstance(parsed, dict):
+            pending.append(parsed)
+        elif isinstance(parsed, list):
+            pending.extend(item for item in parsed if isinstance(item, dict))
+        while pending:
+            item = pending.popleft()
+            type_field = item.get("@type")
+            if isinstance(type_field, str):
+                if type_field.lower() in GAME_JSONLD_TYPES:
+                    return item
+            elif isinstance(type_field, list):
+                if any(str(value).lower() in GAME_JSONLD_TYPES for value in type_field):
+                    return item
+            for value in item.values():
+                if isinstance(value, dict):
+                    pending.append(value)
+                elif isinstance(value, list):
+                    pending.extend(child for child in value if isinstance(child, dict))
+    return None
+
+
+def clean_game_name(raw: str) -> str:
+    value = raw.strip()
+    suffixes = [
+        " - Play Free Online Games on GameDistribution.com",
+        " - Play Free Online Games | GameDistribution.com",
+        " - Play Free Online Games",
+        " | GameDistribution.com",
+        " - GameDistribution.com",
+    ]
+    lower_value = value.lower()
+    for suffix in suffixes:
+        if lower_value.endswith(suffix.lower()):
+            value = value[: -len(suffix)]
+            lower_value = value.lower()
+    return value.strip()
+
+
+def _clean_name(value: object, base_url: str) -> Optional[str]:
+    if isinstance(value, str):
+        return clean_game_name(value) or None
+    return None
+
+
+def _clean_text(value: object, base_url: str) -> Optional[str]:
+    if isinstance(value, str):
+        return value.strip() or None
+    return None
+
+
+def _clean_url(value: object, base_url: str) -> Optional[str]:
+    if isinstance(value, list):
+        value = next((item for item in value if isinstance(item, str)), None)
+    if isinstance(value, str) and value:
+        return parse.urljoin(base_url, value)
+    return None
+
+
+def _clean_publisher(value: object, base_url: str) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("name")
+    return _clean_text(value, base_url)
+
+
+def _clean_tags(values: List[object], base_url: str) -> List[str]:
+    unique: List[str] = []
+    seen = set()
+    for value in values:
+        for tag in split_keywords(value):
+            key = tag.lower()
+            if key not in seen:
+                seen.add(key)
+                unique.append(tag)
+    return unique
+
+
+class FieldRule(NamedTuple):
+    """How one record field is resolved from its ``sources``, best first."""
+
+    field: str
+    sources: Tuple[Tuple[str, ...], ...]
+    clean: Callable[..., Any]
+    collect: bool = False
+
+
+FIELD_RULES: Tuple[FieldRule, ...] = (
+    FieldRule(
+        "name",
+        (("jsonld", "name"), ("page", "title"), ("page", "heading")),
+        _clean_name,
+    ),
+    FieldRule(
+        "description",
+        (("jsonld", "description"), ("jsonld", "abstract"), ("meta", "name", "description")),
+        _clean_text,
+    ),
+    FieldRule(
+        "og_image",
+        (
+            ("jsonld", "image"),
+            ("meta", "property", "og:image"),
+            ("meta", "itemprop", "image"),
+            ("link", "image_src"),
+            ("link", "image"),
+        ),
+        _clean_url,
+    ),
+    FieldRule("play_url", (("page", "play_frame"), ("page", "first_frame")), _clean_url),
+    FieldRule("publisher", (("jsonld", "publisher"), ("jsonld", "provider")), _clean_publisher),
+    FieldRule(
+        "tags",
+        (
+            ("jsonld", "keywords"),
+            ("jsonld", "genre"),
+            ("jsonld", "applicationCategory"),
+            ("meta", "name", "keywords"),
+        ),
+        _clean_tags,
+        collect=True,
+    ),
+)
+
+
+def _source_getter(source: Tuple[str, ...]) -> Callable[[GamePageParser], object]:
+    kind = source[0]
+    if kind == "jsonld":
+        key = source[1]
+        return lambda parser: parser.game_jsonld.get(key) if parser.game_jsonld else None
+    if kind == "meta":
+        meta_key = (source[1], source[2].lower())
+        return lambda parser: parser.meta_index.get(meta_key)
+    if kind == "link":
+        rel = source[1].lower()
+        return lambda parser: parser.link_index.get(rel)
+    if kind == "page":
+        return operator.attrgetter(source[1])
+    raise ValueError(f"unknown field source {source!r}")
+
+
+def _compile_rules(
+    rules: Iterable[FieldRule],
+) -> List[Tuple[str, List[Callable[[GamePageParser], object]], Callable[..., Any], bool]]:
+    return [
+        (rule.field, [_source_getter(source) for source in rule.sources], rule.clean, rule.collect)
+        for rule in rules
+    ]
+
+
+_COMPILED_RULES = _compile_rules(FIELD_RULES)
+INDEXED_META = frozenset(
+    (source[1], source[2].lower())
+    for rule in FIELD_RULES
+    for source in rule.sources
+    if source[0] == "meta"
+)
+META_KEY_ATTRIBUTES = tuple(sorted({attribute for attribute, _ in INDEXED_META}))
+INDEXED_LINKS = frozenset(
+    [source[1].lower() for rule in FIELD_RULES for source in rule.sources if source[0] == "link"]
+    + ["canonical"]
+)
+
+
+def resolve_fields(parser: GamePageParser, base_url: str) -> Dict[str, object]:
+    """Apply :data:`FIELD_RULES` to a fed parser; unresolved fields are None."""
+    resolved: Dict[str, object] = {}
+    for field, getters, clean, collect in _COMPILED_RULES:
+        if collect:
+            resolved[field] = clean([getter(parser) for getter in getters], base_url)
+            continue
+        value = None
+        for getter in getters:
+            value = clean(getter(parser), base_url)
+            if value is not None:
+                break
+        resolved[field] = value
+    return resolved
+
+
+def split_keywords(value: object) -> List[str]:
+    if isinstance(value, list):
+        result: List[str] = []
+        for item in value:
+            result.extend(split_keywords(item))
+        return result
+    if isinstance(value, str):
+        if "," in value or ";" in value:
+            return [segment.strip() for segment in re.split(r"[,;]", value) if segment.strip()]
+        stripped = value.strip()
+        return [stripped] if stripped else []
+    return []
+
+
+def sanitize_filename(value: str) -> str:
+    cleaned = re.sub(r"[\\/\:*?\"<>|]+", "", value)
+    cleaned = re.sub(r"\s+", "_", cleaned)
+    cleaned = cleaned.strip("._")
+    return cleaned[:120]
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write ``data`` to a temp file next to ``path`` and rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp_path.open("wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _normalise_extension(ext: str) -> str:
+    cleaned = ext.lower()
+    if cleaned in {".jpeg", ".jpe"}:
+        return ".jpg"
+    if cleaned == ".svgz":
+        return ".svg"
+    return cleaned
+
+
+# ----------------------------------------------------------------------
+# Record store
+# ----------------------------------------------------------------------
+
+_ABSENT: Any = object()
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+class CompactRecord:
+    """One stored record without per-record keys, shared strings or tag lists."""
+
+    __slots__ = (
+        "name",
+        "canonical_url",
+        "description",
+        "og_image",
+        "play_url",
+        "publisher",
+        "tags",
+        "fetched_at",
+        "error",
+        "last_seen",
+        "extra",
+        "partial",
+    )
+
+
+class RecordStore(MutableMapping[str, Dict[str, object]]):
+    """Dataset records held compactly in memory, keyed by slug."""
+
+    def __init__(self, records: Optional[Mapping[str, Dict[str, object]]] = None) -> None:
+        self._records: Dict[str, Any] = {}
+        self._strings: Dict[str, str] = {}
+        self._tag_ids: Dict[str, int] = {}
+        self._tag_names: List[str] = []
+        if records:
+            for slug, entry in records.items():
+                self[slug] = entry
+
+    def _shared(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        return value
+
+    def _tag(self, name: str) -> int:
+        tag_id = self._tag_ids.get(name)
+        if tag_id is None:
+            tag_id = self._tag_ids[name] = len(self._tag_names)
+            self._tag_names.append(name)
+        return tag_id
+
+    def _pack(self, entry: Mapping[str, object]) -> Any:
+        record = CompactRecord()
+        get = entry.get
+        record.name = get("name", _ABSENT)
+        record.canonical_url = get("canonical_url", _ABSENT)
+        record.description = get("description", _ABSENT)
+        record.og_image = get("og_image", _ABSENT)
+        record.play_url = get("play_url", _ABSENT)
+        record.publisher = get("publisher", _ABSENT)
+        record.fetched_at = get("fetched_at", _ABSENT)
+        record.error = get("error", _ABSENT)
+        record.last_seen = get("last_seen", _ABSENT)
+        for value in (
+            record.name,
+            record.canonical_url,
+            record.description,
+            record.og_image,
+            record.play_url,
+            record.publisher,
+            record.fetched_at,
+            record.error,
+            record.last_seen,
+        ):
+            if value.__class__ is not str and value is not None and value is not _ABSENT:
+                return dict(entry)
+        tags = get("tags", _ABSENT)
+        if tags.__class__ is list:
+            if not all(tag.__class__ is str for tag in tags):
+                return dict(entry)
+            tags = array.array("I", [self._tag(tag) for tag in tags])
+        elif tags is not None and tags is not _ABSENT:
+            return dict(entry)
+        record.tags = tags
+        record.publisher = self._shared(record.publisher)
+        record.error = self._shared(record.error)
+        if entry.keys() <= _RECORD_FIELD_SET:
+            record.extra = None
+            record.partial = len(entry) != len(RECORD_FIELDS)
+        else:
+            extra = {key: value for key, value in entry.items() if key not in _RECORD_FIELD_SET}
+            record.extra = extra
+            record.partial = len(entry) - len(extra) != len(RECORD_FIELDS)
+        return record
+
+    def _unpack(self, slug: str, record: Any) -> Dict[str, object]:
+        if not isinstance(record, CompactRecord):
+            return dict(record)
+        tags = record.tags
+        if isinstance(tags, array.array):
+            names = self._tag_names
+            tags = [names[tag_id] for tag_id in tags]
+        entry = {
+            "name": record.name,
+            "slug": slug,
+            "canonical_url": record.canonical_url,
+            "description": record.description,
+            "og_image": record.og_image,
+            "play_url": record.play_url,
+            "publisher": record.publisher,
+            "tags": tags,
+            "fetched_at": record.fetched_at,
+            "error": record.error,
+            "last_seen": record.last_seen,
+        }
+        if record.partial:
+            entry = {key: value for key, value in entry.items() if value is not _ABSENT}
+        if record.extra:
+            entry.update(record.extra)
+        return entry
+
+    def __getitem__(self, slug: str) -> Dict[str, object]:
+        return self._unpack(slug, self._records[slug])
+
+    def get(self, slug: str, default: Any = None) -> Any:  # type: ignore[override]
+        record = self._records.get(slug)
+        return default if record is None else self._unpack(slug, record)
+
+    def __setitem__(self, slug: str, entry: Mapping[str, object]) -> None:
+        self._records[slug] = self._pack(entry)
+
+    def __delitem__(self, slug: str) -> None:
+        del self._records[slug]
+
+    def __contains__(self, slug: object) -> bool:
+        return slug in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def json_line(self, slug: str) -> str:
+        return _JSON_ENCODER.encode(self[slug])
+
+
+# ----------------------------------------------------------------------
+# Dataset helpers
+# ----------------------------------------------------------------------
+
+def is_catalog_path(path: Path) -> bool:
+    return path.suffix.lower() in CATALOG_SUFFIXES
+
+
+def _is_touch(entry: Mapping[str, object]) -> bool:
+    """Whether a log line only moves ``last_seen`` (see :func:`log_entry`)."""
+    return "last_seen" in entry and entry.keys() <= _TOUCH_FIELDS
+
+
+def _touched(base: Mapping[str, object], touch: Mapping[str, object]) -> Dict[str, object]:
+    return {**base, "last_seen": touch["last_seen"]}
+
+
+def load_dataset(path: Path) -> RecordStore:
+    """Load the snapshot at ``path`` plus any write-ahead log segments."""
+    if is_catalog_path(path):
+        from .catalog import load_catalog  # the catalog module builds on this one
+
+        return load_catalog(path)
+    records = RecordStore()
+    for source in [path, *wal_segments(path)]:
+        for entry in _iter_jsonl(source):
+            slug = entry.get("slug")
+            if not slug:
+                continue
+            if _is_touch(entry):
+                base = records.get(str(slug))
+                if base is None:
+                    continue
+                entry = _touched(base, entry)
+            records[str(slug)] = entry
+    return records
+
+
+def save_dataset(path: Path, records: Mapping[str, Dict[str, object]]) -> None:
+    """Rewrite the sorted snapshot atomically (temp file, fsync, rename)."""
+    if is_catalog_path(path):
+        from .catalog import save_catalog
+
+        save_catalog(path, records)
+        return
+    writer = _SnapshotWriter(path)
+    try:
+        for slug in sorted(records.keys()):
+            entry = records[slug]
+            writer.write(slug, entry, _JSON_ENCODER.encode(entry))
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+
+
+def _iter_jsonl(path: Path) -> Iterator[Dict[str, object]]:
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                yield entry
+
+
+def _fsync_directory(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def wal_segments(path: Path) -> List[Path]:
+    prefix = f"{path.name}.wal."
+    segments: List[Tuple[int, Path]] = []
+    if not path.parent.exists():
+        return []
+    for candidate in path.parent.iterdir():
+        name = candidate.name
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            segments.append((int(name[len(prefix):]), candidate))
+    return [segment for _, segment in sorted(segments)]
+
+
+def compact_dataset(
+    path: Path,
+    segments: Optional[List[Path]] = None,
+    *,
+    key: Optional[Callable[[Mapping[str, object]], float]] = None,
+) -> int:
+    """Fold log ``segments`` (default: all of them) into the sorted snapshot.
+
+    The latest record for a slug wins, or with ``key`` the one with the largest key.
+    """
+    if segments is None:
+        segments = wal_segments(path)
+    if not segments:
+        return 0
+    updates: Dict[str, Tuple[Dict[str, object], str]] = {}
+    for segment in segments:
+        for entry in _iter_jsonl(segment):
+            slug = entry.get("slug")
+            if not slug:
+                continue
+            earlier = updates.get(str(slug))
+            if key is not None and earlier is not None and key(entry) < key(earlier[0]):
+                continue
+            if _is_touch(entry) and earlier is not None and not _is_touch(earlier[0]):
+                entry = _touched(earlier[0], entry)
+            updates[str(slug)] = (entry, _JSON_ENCODER.encode(entry))
+
+    def overlay(
+        slug: str, entry: Dict[str, object], line: str
+    ) -> Tuple[str, Dict[str, object], str]:
+        update = updates.get(slug)
+        if update is None:
+            return slug, entry, line
+        if _is_touch(update[0]):
+            entry = _touched(entry, update[0])
+            return slug, entry, _JSON_ENCODER.encode(entry)
+        return (slug, *update)
+
+    pending = sorted(updates)
+    index = 0
+    ordered = True
+    writer = _SnapshotWriter(path, suffix="compact")
+    try:
+        previous: Optional[Tuple[str, Dict[str, object], str]] = None
+        for entry, line in _iter_snapshot_lines(path):
+            slug = str(entry.get("slug") or "")
+            if not slug:
+                continue
+            if previous is not None and slug < previous[0]:
+                ordered = False
+                break
+            if previous is not None and slug == previous[0]:
+                # Later duplicates replace earlier snapshot lines, but never
+                # a pending log update for the same slug.
+                if slug not in updates or _is_touch(updates[slug][0]):
+                    previous = overlay(slug, entry, line)
+                continue
+            if previous is not None:
+                writer.write(*previous)
+            while index < len(pending) and pending[index] < slug:
+                if not _is_touch(updates[pending[index]][0]):
+                    writer.write(pending[index], *updates[pending[index]])
+                index += 1
+            previous = overlay(slug, entry, line)
+            if index < len(pending) and pending[index] == slug:
+                index += 1
+        if ordered:
+            if previous is not None:
+                writer.write(*previous)
+            for slug in pending[index:]:
+                if not _is_touch(updates[slug][0]):
+                    writer.write(slug, *updates[slug])
+    except BaseException:
+        writer.abort()
+        raise
+
+    if ordered:
+        writer.commit()
+    else:
+        # A hand-edited or legacy snapshot that is not sorted by slug cannot
+        # be stream-merged; fall back to a full load and rewrite.
+        writer.abort()
+        records = RecordStore()
+        for entry in _iter_jsonl(path):
+            slug = entry.get("slug")
+            if slug:
+                records[str(slug)] = entry
+        for slug, (entry, _) in updates.items():
+            if _is_touch(entry):
+                base = records.get(slug)
+                if base is None:
+                    continue
+                entry = _touched(base, entry)
+            records[slug] = entry
+        save_dataset(path, records)
+
+    for segment in segments:
+        segment.unlink(missing_ok=True)
+    return len(updates)
+
+
+def _iter_snapshot_lines(path: Path) -> Iterator[Tuple[Dict[str, object], str]]:
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as fh:
+        for raw in fh:
+            line = raw.rstrip("\n")
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                yield entry, line
+
+
+class _SnapshotWriter:
+    """Writes a new snapshot next to ``path`` together with its offset index."""
+
+    def __init__(self, path: Path, *, suffix: str = "save") -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = path.with_name(f".{path.name}.{suffix}.tmp")
+        self._fh = self._tmp_path.open("wb")
+        self._offset = 0
+        self._index: Dict[str, IndexEntry] = {}
+
+    def write(self, slug: str, entry: Dict[str, object], line: str) -> None:
+        data = line.encode("utf-8") + b"\n"
+        self._fh.write(data)
+        self._index[slug] = IndexEntry(
+            slug,
+            self._offset,
+            len(data) - 1,
+            _seen_at(entry),
+            bool(entry.get("error")),
+        )
+        self._offset += len(data)
+
+    def commit(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        os.replace(self._tmp_path, self.path)
+        _fsync_directory(self.path.parent)
+        write_dataset_index(self.path, self._index.values())
+
+    def abort(self) -> None:
+        self._fh.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+# ----------------------------------------------------------------------
+# Dataset index
+# ----------------------------------------------------------------------
+
+class IndexEntry(NamedTuple):
+    slug: str
+    offset: int
+    length: int
+    fetched_at: float
+    error: bool
+
+
+def dataset_index_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.idx")
+
+
+def _slug_hash(slug: str) -> int:
+    return int.from_bytes(hashlib.blake2b(slug.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _timestamp(value: object) -> float:
+    if not isinstance(value, str) or not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def _seen_at(entry: Mapping[str, object]) -> float:
+    """When a record was last confirmed by a scrape, changed or not."""
+    return _timestamp(entry.get("last_seen") or entry.get("fetched_at"))
+
+
+def _snapshot_identity(path: Path) -> Tuple[int, int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def _prefix_fingerprint(path: Path, end: int) -> bytes:
+    """Hash of the first and last few KiB of ``path[:end]``."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(end.to_bytes(8, "big"))
+    with path.open("rb") as fh:
+        digest.update(fh.read(min(end, _INDEX_FINGERPRINT_BYTES)))
+        tail = max(0, end - _INDEX_FINGERPRINT_BYTES)
+        fh.seek(tail)
+        digest.update(fh.read(end - tail))
+    return digest.digest()
+
+
+def write_dataset_index(
+    path: Path, entries: Iterable[IndexEntry], *, indexed_end: Optional[int] = None
+) -> None:
+    """Write the sidecar index for the snapshot currently at ``path``."""
+    blob = bytearray()
+    packed: List[bytes] = []
+    for item in entries:
+        slug_bytes = item.slug.encode("utf-8")
+        packed.append(
+            _INDEX_ENTRY.pack(
+                _slug_hash(item.slug),
+                item.offset,
+                item.length,
+                item.fetched_at,
+                len(blob),
+                len(slug_bytes),
+                1 if item.error else 0,
+            )
+        )
+        blob += slug_bytes
+    # The hash is packed big-endian first, so byte order is numeric order.
+    packed.sort()
+    size, mtime_ns, inode = _snapshot_identity(path)
+    end = size if indexed_end is None else indexed_end
+    header = _INDEX_HEADER.pack(
+        _INDEX_MAGIC,
+        size,
+        mtime_ns,
+        inode,
+        len(packed),
+        _INDEX_HEADER.size + len(packed) * _INDEX_ENTRY.size,
+        end,
+        _prefix_fingerprint(path, end),
+    )
+    atomic_write_bytes(dataset_index_path(path), header + b"".join(packed) + bytes(blob))
+
+
+class DatasetIndex:
+    """Memory-mapped reader for the sidecar written by :func:`write_dataset_index`."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fh = path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fh.close()
+            raise
+        try:
+            (
+                magic, self.size, self.mtime_ns, self.inode, self.count, self._blob,
+                self.indexed_end, self.fingerprint,
+            ) = _INDEX_HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic = b""
+        if magic != _INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a dataset index")
+
+    def matches(self, snapshot: Path) -> bool:
+        return (self.size, self.mtime_ns, self.inode) == _snapshot_identity(snapshot)
+
+    def _entry(self, position: int) -> IndexEntry:
+        _, offset, length, fetched_at, slug_offset, slug_len, flags = _INDEX_ENTRY.unpack_from(
+            self._mm, _INDEX_HEADER.size + position * _INDEX_ENTRY.size
+        )
+        start = self._blob + slug_offset
+        slug = self._mm[start:start + slug_len].decode("utf-8")
+        return IndexEntry(slug, offset, length, fetched_at, bool(flags))
+
+    def _hash_at(self, position: int) -> int:
+        return _HASH_FIELD.unpack_from(self._mm, _INDEX_HEADER.size + position * _INDEX_ENTRY.size)[0]
+
+    def lookup(self, slug: str) -> Optional[IndexEntry]:
+        target = _slug_hash(slug)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._hash_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.count and self._hash_at(lo) == target:
+            entry = self._entry(lo)
+            if entry.slug == slug:
+                return entry
+            lo += 1
+        return None
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        for position in range(self.count):
+            yield self._entry(position)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._fh.close()
+
+
+def build_dataset_index(path: Path, *, full: bool = False) -> None:
+    """Bring the sidecar index of ``path`` up to date."""
+    entries: Dict[str, IndexEntry] = {}
+    start = 0
+    index_path = dataset_index_path(path)
+    size, _, inode = _snapshot_identity(path)
+    if index_path.exists() and not full:
+        try:
+            existing = DatasetIndex(index_path)
+        except (OSError, ValueError, struct.error):
+            existing = None
+        if existing is not None:
+            if (
+                existing.inode == inode
+                and existing.indexed_end <= size
+                and existing.fingerprint == _prefix_fingerprint(path, existing.indexed_end)
+            ):
+                start = existing.indexed_end
+                entries = {entry.slug: entry for entry in existing}
+            existing.close()
+    with path.open("rb") as fh:
+        fh.seek(start)
+        offset = start
+        for raw in fh:
+            line_offset, offset = offset, offset + len(raw)
+            if not raw.endswith(b"\n"):
+                # A partial trailing line is left for the next rebuild.
+                offset = line_offset
+                break
+            try:
+                entry = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(entry, dict) or not entry.get("slug"):
+                continue
+            slug = str(entry["slug"])
+            entries[slug] = IndexEntry(
+                slug,
+                line_offset,
+                len(raw) - 1,
+                _seen_at(entry),
+                bool(entry.get("error")),
+            )
+    write_dataset_index(path, entries.values(), indexed_end=offset)
+
+
+class DatasetView(MutableMapping[str, Dict[str, object]]):
+    """Lazy, memory-mapped view of a dataset snapshot plus its log."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._overlay = RecordStore()
+        self._index: Optional[DatasetIndex] = None
+        self._fh: Optional[BinaryIO] = None
+        self._mm: Optional[mmap.mmap] = None
+        if path.exists() and path.stat().st_size > 0:
+            self._open_snapshot()
+        for segment in wal_segments(path):
+            for entry in _iter_jsonl(segment):
+                slug = entry.get("slug")
+                if not slug:
+                    continue
+                if _is_touch(entry):
+                    base = self.get(str(slug))
+                    if base is None:
+                        continue
+                    entry = _touched(base, entry)
+                self._overlay[str(slug)] = entry
+
+    def _open_snapshot(self) -> None:
+        index_path = dataset_index_path(self.path)
+        index: Optional[DatasetIndex] = None
+        if index_path.exists():
+            try:
+                index = DatasetIndex(index_path)
+            except (OSError, ValueError, struct.error):
+                index = None
+            if index is not None and not index.matches(self.path):
+                index.close()
+                index = None
+        if index is None:
+            build_dataset_index(self.path)
+            index = DatasetIndex(index_path)
+        self._index = index
+        self._fh = self.path.open("rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def meta(self, slug: str) -> Optional[IndexEntry]:
+        """Index entry for ``slug`` without decoding the record itself."""
+        entry = self._overlay.get(slug)
+        if entry is not None:
+            return IndexEntry(
+                slug, -1, -1, _seen_at(entry), bool(entry.get("error"))
+            )
+        if self._index is None:
+            return None
+        return self._index.lookup(slug)
+
+    def raw_line(self, slug: str) -> Optional[bytes]:
+        if self._index is None or self._mm is None or slug in self._overlay:
+            return None
+        entry = self._index.lookup(slug)
+        if entry is None:
+            return None
+        return self._mm[entry.offset:entry.offset + entry.length]
+
+    def load(self, meta: IndexEntry) -> Dict[str, object]:
+        """The record ``meta`` (from :meth:`iter_meta`) points at, without a lookup."""
+        if meta.offset < 0 or self._mm is None:
+            return self[meta.slug]
+        entry = _decode_line(self._mm[meta.offset:meta.offset + meta.length], meta.slug)
+        if entry is None:
+            return self[meta.slug]
+        return entry
+
+    def __getitem__(self, slug: str) -> Dict[str, object]:
+        entry = self._overlay.get(slug)
+        if entry is not None:
+            return entry
+        raw = self.raw_line(slug)
+        if raw is None:
+            raise KeyError(slug)
+        entry = _decode_line(raw, slug)
+        if entry is None:
+            # The snapshot no longer matches its index (it was edited in
+            # place behind our back); rebuild the index and look again.
+            self._reindex()
+            raw = self.raw_line(slug)
+            entry = _decode_line(raw, slug) if raw is not None else None
+            if entry is None:
+                raise KeyError(slug)
+        return entry
+
+    def _reindex(self) -> None:
+        self.close()
+        if self.path.exists() and self.path.stat().st_size > 0:
+            build_dataset_index(self.path, full=True)
+            self._open_snapshot()
+
+    def __setitem__(self, slug: str, entry: Dict[str, object]) -> None:
+        self._overlay[slug] = entry
+
+    def __delitem__(self, slug: str) -> None:
+        raise TypeError("records cannot be deleted from a DatasetView")
+
+    def __contains__(self, slug: object) -> bool:
+        return isinstance(slug, str) and self.meta(slug) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        if self._index is not None:
+            for entry in self._index:
+                if entry.slug not in self._overlay:
+                    yield entry.slug
+        yield from self._overlay
+
+    def iter_meta(self) -> Iterator[IndexEntry]:
+        if self._index is not None:
+            for entry in self._index:
+                if entry.slug not in self._overlay:
+                    yield entry
+        for slug in self._overlay:
+            meta = self.meta(slug)
+            if meta is not None:
+                yield meta
+
+    def __len__(self) -> int:
+        count = len(self._overlay)
+        if self._index is not None:
+            count += self._index.count
+            count -= sum(1 for slug in self._overlay if self._index.lookup(slug) is not None)
+        return count
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+
+def _decode_line(raw: bytes, slug: str) -> Optional[Dict[str, object]]:
+    """The record in ``raw`` if it is one and belongs to ``slug``."""
+    try:
+        entry = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(entry, dict) or str(entry.get("slug")) != slug:
+        return None
+    return entry
+
+
+def open_dataset(path: Path) -> DatasetView:
+    return DatasetView(path)
+
+
+class DatasetLog:
+    """Append-only write-ahead log for scraped records."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        sync_every: int = DEFAULT_SYNC_EVERY,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        rotate_bytes: int = DEFAULT_LOG_ROTATE_BYTES,
+    ) -> None:
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self.sync_interval = sync_interval
+        self.rotate_bytes = rotate_bytes
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        existing = wal_segments(path)
+        self._next_seq = self._segment_seq(existing[-1]) + 1 if existing else 1
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._segment, self._fh = self._open_segment()
+
+    def _segment_seq(self, segment: Path) -> int:
+        return int(segment.name.rsplit(".", 1)[-1])
+
+    def _open_segment(self) -> Tuple[Path, io.TextIOWrapper]:
+        segment = self.path.with_name(f"{self.path.name}.wal.{self._next_seq:06d}")
+        self._next_seq += 1
+        fh = segment.open("a", encoding="utf-8")
+        _fsync_directory(self.path.parent)
+        return segment, fh
+
+    def append(self, entry: Dict[str, object]) -> None:
+        line = _JSON_ENCODER.encode(entry)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval
+            ):
+                self._sync()
+            if self._fh.tell() >= self.rotate_bytes:
+                self._rotate()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def checkpoint(self) -> None:
+        """Seal the active segment and fold the log into the snapshot in the background."""
+        with self._lock:
+            if self._fh.tell():
+                self._rotate()
+            else:
+                self._sync()
+
+    def _sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._fh.close()
+        self._segment, self._fh = self._open_segment()
+        self._start_compaction()
+
+    def _start_compaction(self) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(
+            target=self._compact_sealed, name="dataset-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def _compact_sealed(self) -> None:
+        with self._compact_lock:
+            with self._lock:
+                active = self._segment
+            sealed = [segment for segment in wal_segments(self.path) if segment != active]
+            try:
+                compact_dataset(self.path, sealed)
+            except OSError as exc:
+                print(f"[warn] Dataset compaction failed: {exc}")
+
+    def wait_compaction(self) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self, *, compact: bool = True) -> None:
+        """Sync and seal the active segment, optionally folding every segment."""
+        with self._lock:
+            self._sync()
+            self._fh.close()
+            if self._segment.stat().st_size == 0:
+                self._segment.unlink()
+        if self._compactor is not None:
+            self._compactor.join()
+        if compact:
+            with self._compact_lock:
+                compact_dataset(self.path)
+
+
+# ----------------------------------------------------------------------
+# Response archive
+# ----------------------------------------------------------------------
+
+class ArchiveEntry(NamedTuple):
+    slug: str
+    url: str
+    segment: str
+    offset: int
+    length: int
+    fetched_at: str
+    content_type: str
+
+
+class ResponseArchive:
+    """Segmented archive of raw game page bodies for offline re-extraction."""
+
+    def __init__(self, root: Path, *, segment_bytes: int = DEFAULT_ARCHIVE_SEGMENT_BYTES) -> None:
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.index_path = root / "index.jsonl"
+        self._lock = threading.Lock()
+        self._slugs: Optional[Set[str]] = None
+        self._segment: Optional[Path] = None
+        self._fh: Optional[BinaryIO] = None
+        self._index_fh: Optional[io.TextIOWrapper] = None
+
+    def segments(self) -> List[Path]:
+        if not self.root.exists():
+            return []
+        return sorted(self.root.glob("pages-*.gz"))
+
+    def entries(self) -> Dict[str, ArchiveEntry]:
+        latest: Dict[str, ArchiveEntry] = {}
+        for data in _iter_jsonl(self.index_path):
+            try:
+                entry = ArchiveEntry(
+                    str(data["slug"]),
+                    str(data["url"]),
+                    str(data["segment"]),
+                    int(data["offset"]),  # type: ignore[arg-type]
+                    int(data["length"]),  # type: ignore[arg-type]
+                    str(data.get("fetched_at") or ""),
+                    str(data.get("content_type") or ""),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            latest[entry.slug] = entry
+        return latest
+
+    def __contains__(self, slug: object) -> bool:
+        with self._lock:
+            if self._slugs is None:
+                self._slugs = set(self.entries())
+            return slug in self._slugs
+
+    def store(
+        self,
+        slug: str,
+        url: str,
+        headers: Dict[str, str],
+        body: bytes,
+        fetched_at: str,
+    ) -> None:
+        member = gzip.compress(body, compresslevel=6)
+        with self._lock:
+            fh = self._writer()
+            offset = fh.tell()
+            fh.write(member)
+            fh.flush()
+            assert self._segment is not None and self._index_fh is not None
+            record = {
+                "slug": slug,
+                "url": url,
+                "segment": self._segment.name,
+                "offset": offset,
+                "length": len(member),
+                "fetched_at": fetched_at,
+                "content_type": header_value(headers, "Content-Type") or "",
+            }
+            self._index_fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._index_fh.flush()
+            if self._slugs is not None:
+                self._slugs.add(slug)
+            if offset + len(member) >= self.segment_bytes:
+                fh.close()
+                self._fh = None
+
+    def _writer(self) -> BinaryIO:
+        if self._fh is not None:
+            return self._fh
+        self.root.mkdir(parents=True, exist_ok=True)
+        existing = self.segments()
+        if existing and existing[-1].stat().st_size < self.segment_bytes and self._segment is None:
+            # Keep filling the last segment of an earlier run.
+            segment = existing[-1]
+        else:
+            number = int(existing[-1].name[len("pages-"):-len(".gz")]) + 1 if existing else 1
+            segment = self.root / f"pages-{number:06d}.gz"
+        self._segment = segment
+        self._fh = segment.open("ab")
+        if self._index_fh is None:
+            self._index_fh = self.index_path.open("a", encoding="utf-8")
+        return self._fh
+
+    def close(self) -> None:
+        with self._lock:
+            for fh in (self._fh, self._index_fh):
+                if fh is not None:
+                    fh.close()
+            self._fh = None
+            self._index_fh = None
+
+
+def read_archived(root: Path, entry: ArchiveEntry) -> bytes:
+    with (root / entry.segment).open("rb") as fh:
+        fh.seek(entry.offset)
+        return gzip.decompress(fh.read(entry.length))
+
+
+def _reextract_batch(root: str, entries: List[ArchiveEntry]) -> List[Dict[str, object]]:
+    """Worker: rebuild records for ``entries``, which share one segment."""
+    records: List[Dict[str, object]] = []
+    base = Path(root)
+    with (base / entries[0].segment).open("rb") as fh:
+        for entry in entries:
+            fh.seek(entry.offset)
+            try:
+                body = gzip.decompress(fh.read(entry.length))
+            except (OSError, EOFError, zlib.error):
+                continue
+            parser = GamePageParser()
+            feed_until_complete(parser, decode_body(body, {"Content-Type": entry.content_type}))
+            record = build_record(parser, entry.url, entry.slug, entry.fetched_at)
+            records.append(record.to_dict())
+    return records
+
+
+def reextract_archive(
+    archive: ResponseArchive,
+    *,
+    jobs: Optional[int] = None,
+    batch_size: int = DEFAULT_REEXTRACT_BATCH,
+) -> Iterator[Dict[str, object]]:
+    """Re-run extraction over every archived page on a process pool."""
+    by_segment: Dict[str, List[ArchiveEntry]] = {}
+    for entry in archive.entries().values():
+        by_segment.setdefault(entry.segment, []).append(entry)
+    batches: List[List[ArchiveEntry]] = []
+    for segment in sorted(by_segment):
+        ordered = sorted(by_segment[segment], key=lambda item: item.offset)
+        for start in range(0, len(ordered), batch_size):
+            batches.append(ordered[start : start + batch_size])
+    if not batches:
+        return
+    root = str(archive.root)
+    workers = max(1, jobs or os.cpu_count() or 1)
+    if workers == 1:
+        for batch in batches:
+            yield from _reextract_batch(root, batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_reextract_batch, root, batch) for batch in batches]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+# ----------------------------------------------------------------------
+# Catalog discovery
+# ----------------------------------------------------------------------
+
+class SitemapDiscovery:
+    """Walks sitemaps on a background thread and yields game URLs."""
+
+    def __init__(
+        self,
+        scraper: GameScraper,
+        sitemap_urls: Iterable[str],
+        *,
+        seen_slugs: Iterable[str] = (),
+        buffer: int = DEFAULT_DISCOVERY_BUFFER,
+        spool_dir: Optional[Path] = None,
+    ) -> None:
+        self.scraper = scraper
+        self.sitemap_urls = list(sitemap_urls)
+        self.seen: Set[str] = set(seen_slugs)
+        self.spool_dir = spool_dir or Path(tempfile.gettempdir())
+        self.stats: Dict[str, int] = {"sitemaps": 0, "games": 0, "skipped": 0}
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max(1, buffer))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __iter__(self) -> Iterator[str]:
+        self._thread = threading.Thread(
+            target=self._walk, name="sitemap-discovery", daemon=True
+        )
+        self._thread.start()
+        try:
+            while True:
+                url = self._queue.get()
+                if url is None:
+                    break
+                yield url
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop walking, e.g. once the consumer ran out of budget."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _put(self, item: Optional[str]) -> bool:
+        # A bounded put that gives up once the consumer has gone away.
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _walk(self) -> None:
+        try:
+            pending = collections.deque(self.sitemap_urls)
+            visited: Set[str] = set()
+            while pending and not self._stop.is_set():
+                sitemap_url = pending.popleft()
+                if sitemap_url in visited:
+                    continue
+                visited.add(sitemap_url)
+                try:
+                    for kind, loc in self._read_sitemap(sitemap_url):
+                        if self._stop.is_set():
+                            return
+                        if kind == "sitemap":
+                            pending.append(parse.urljoin(sitemap_url, loc))
+                        else:
+                            self._offer(parse.urljoin(sitemap_url, loc))
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[warn] Sitemap {sitemap_url} failed: {exc}")
+                    continue
+                self.stats["sitemaps"] += 1
+        finally:
+            self._put(None)
+
+    def _read_sitemap(self, url: str) -> Iterator[Tuple[str, str]]:
+        sink = _FileSink(self.spool_dir)
+        try:
+            self.scraper._request_raw(url, reader=sink)
+            if sink.path is None:
+                return
+            yield from iter_sitemap_locs(sink.path)
+        finally:
+            sink.discard()
+
+    def _offer(self, loc: str) -> None:
+        game_url = game_url_from_loc(loc)
+        if game_url is None:
+            return
+        slug = determine_slug(game_url)
+        if slug in self.seen:
+            return
+        self.seen.add(slug)
+        try:
+            self.scraper._ensure_allowed(game_url)
+        except PermissionError:
+            self.stats["skipped"] += 1
+            return
+        if self._put(game_url):
+            self.stats["games"] += 1
+
+
+def iter_sitemap_locs(path: Path) -> Iterator[Tuple[str, str]]:
+    """Yield ``("sitemap", loc)`` and ``("url", loc)`` pairs from a sitemap file."""
+    with path.open("rb") as raw:
+        magic = raw.read(2)
+        raw.seek(0)
+        fh: BinaryIO = gzip.GzipFile(fileobj=raw) if magic == b"\x1f\x8b" else raw  # type: ignore[assignment]
+        parents: List[str] = []
+        root: Optional[ET.Element] = None
+        for event, elem in ET.iterparse(fh, events=("start", "end")):
+            name = elem.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                if root is None:
+                    root = elem
+                parents.append(name)
+                continue
+            parents.pop()
+            if name == "loc" and parents and elem.text:
+                kind = parents[-1]
+                if kind in {"sitemap", "url"}:
+                    yield kind, elem.text.strip()
+            elif name in {"sitemap", "url"} and root is not None:
+                # Drop finished entries so the tree never grows.
+                root.clear()
+
+
+def game_url_from_loc(loc: str) -> Optional[str]:
+    """Normalised game page URL for a sitemap ``loc``, or None for other pages."""
+    parsed = parse.urlparse(loc)
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    if "games" not in segments or segments.index("games") + 1 >= len(segments):
+        return None
+    try:
+        determine_slug(loc)
+    except ValueError:
+        return None
+    return build_game_url(loc)
+
+
+def default_sitemaps(scraper: GameScraper) -> List[str]:
+    """Sitemaps advertised by GameDistribution's robots.txt, or the usual path."""
+    robots = scraper._robots_for("https", "gamedistribution.com")
+    return list(robots.site_maps() or []) or ["https://gamedistribution.com/sitemap.xml"]
+
+
+# ----------------------------------------------------------------------
+# Catalog feeds
+# ----------------------------------------------------------------------
+
+# Feed keys tried for each record field, compared case-insensitively. The
+# names cover GameDistribution's JSON catalog feed (``Title``, ``Asset``,
+# ``Company``, ``Category``/``Tag``...) as well as plainer listings.
+FEED_FIELD_KEYS: Dict[str, Tuple[str, ...]] = {
+    "name": ("title", "name"),
+    "description": ("description", "summary", "abstract"),
+    "og_image": ("asset", "assets", "image", "images", "thumbnail", "thumb", "cover"),
+    "publisher": ("company", "publisher", "developer", "author"),
+}
+FEED_TAG_KEYS = ("category", "categories", "genre", "genres", "tag", "tags", "keywords")
+FEED_LINK_KEYS = ("link", "page_url", "canonical_url", "url")
+FEED_PLAY_KEYS = ("play_url", "embed_url", "embed", "game_url", "url")
+FEED_LIST_KEYS = ("items", "games", "data", "results", "entries")
+# Entries lacking any of these are scraped from their detail page instead.
+FEED_REQUIRED_FIELDS = ("name", "play_url")
+
+
+def feed_page_url(feed_url: str, page: int) -> str:
+    """``feed_url`` for ``page``: fills ``{page}`` or sets the ``page`` parameter."""
+    if "{page}" in feed_url:
+        return feed_url.replace("{page}", str(page))
+    split = parse.urlsplit(feed_url)
+    query = [(key, value) for key, value in parse.parse_qsl(split.query) if key != "page"]
+    query.append(("page", str(page)))
+    return parse.urlunsplit(split._replace(query=parse.urlencode(query)))
+
+
+def feed_entries(payload: object) -> List[Dict[str, object]]:
+    if isinstance(payload, dict):
+        lowered = {str(key).lower(): value for key, value in payload.items()}
+        for key in FEED_LIST_KEYS:
+            if isinstance(lowered.get(key), list):
+                payload = lowered[key]
+                break
+        else:
+            payload = next((value for value in payload.values() if isinstance(value, list)), [])
+    if not isinstance(payload, list):
+        return []
+    return [entry for entry in payload if isinstance(entry, dict)]
+
+
+def _is_play_url(url: str) -> bool:
+    return parse.urlparse(url).netloc.lower().startswith("html5.")
+
+
+def feed_record(
+    entry: Mapping[str, object], base_url: str, fetched_at: str
+) -> Optional[GameRecord]:
+    """Map one feed entry onto a :class:`GameRecord`, or None without a slug."""
+    fields = {str(key).lower(): value for key, value in entry.items()}
+
+    def first(keys: Tuple[str, ...]) -> object:
+        return next((fields[key] for key in keys if fields.get(key)), None)
+
+    name = _clean_name(first(FEED_FIELD_KEYS["name"]), base_url)
+    urls = [
+        _clean_url(fields.get(key), base_url) for key in FEED_LINK_KEYS + FEED_PLAY_KEYS
+    ]
+    play_url = next(
+        (
+            _clean_url(fields[key], base_url)
+            for key in FEED_PLAY_KEYS
+            if fields.get(key) and (key != "url" or _is_play_url(str(fields[key])))
+        ),
+        None,
+    )
+    link = next(
+        (url for url in urls if url and game_url_from_loc(url) and not _is_play_url(url)),
+        None,
+    )
+    slug_value = fields.get("slug")
+    if isinstance(slug_value, str) and slug_value.strip("/ "):
+        slug = slug_value.strip("/ ")
+    elif link is not None:
+        slug = determine_slug(link)
+    elif name:
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    else:
+        return None
+    if not slug:
+        return None
+    tags: List[object] = []
+    for key in FEED_TAG_KEYS:
+        value = fields.get(key)
+        tags.extend(value if isinstance(value, list) else [value] if value else [])
+    return GameRecord(
+        name=name,
+        slug=slug,
+        canonical_url=link or build_game_url(slug),
+        description=_clean_text(first(FEED_FIELD_KEYS["description"]), base_url),
+        og_image=_clean_url(first(FEED_FIELD_KEYS["og_image"]), base_url),
+        play_url=play_url,
+        publisher=_clean_publisher(first(FEED_FIELD_KEYS["publisher"]), base_url),
+        tags=_clean_tags(tags, base_url) or None,
+        fetched_at=fetched_at,
+    )
+
+
+class FeedIngest:
+    """Pages through JSON catalog feeds and turns entries into records."""
+
+    def __init__(
+        self,
+        scraper: GameScraper,
+        feed_urls: Iterable[str],
+        on_record: Callable[[GameRecord], None],
+        *,
+        seen_slugs: Iterable[str] = (),
+        required: Tuple[str, ...] = FEED_REQUIRED_FIELDS,
+        max_pages: Optional[int] = None,
+    ) -> None:
+        self.scraper = scraper
+        self.feed_urls = list(feed_urls)
+        self.on_record = on_record
+        self.seen: Set[str] = set(seen_slugs)
+        self.required = required
+        self.max_pages = max_pages
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("pages", "entries", "records", "detail", "duplicates"), 0
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        for feed_url in self.feed_urls:
+            page = 1
+            while self.max_pages is None or page <= self.max_pages:
+                url = feed_page_url(feed_url, page)
+                try:
+                    with self.scraper.metrics.timer("feed"):
+                        result = self.scraper._request_raw(url)
+                        payload = json.loads(decode_body(result.body, result.headers))
+                    entries = feed_entries(payload)
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[warn] Feed page {url} failed: {exc}")
+                    break
+                self.stats["pages"] += 1
+                fresh = 0
+                fetched_at = datetime.now(timezone.utc).isoformat()
+                for entry in entries:
+                    self.stats["entries"] += 1
+                    record = feed_record(entry, url, fetched_at)
+                    if record is None:
+                        continue
+                    if record.slug in self.seen:
+                        self.stats["duplicates"] += 1
+                        continue
+                    self.seen.add(record.slug)
+                    fresh += 1
+                    values = record.to_dict()
+                    if all(values.get(field) for field in self.required):
+                        self.stats["records"] += 1
+                        self.on_record(record)
+                    else:
+                        self.stats["detail"] += 1
+                        yield record.canonical_url
+                # A feed that ignores the page parameter would repeat itself
+                # forever; stop once a page brings nothing new.
+                if not fresh:
+                    break
+                page += 1
+
+
+# ----------------------------------------------------------------------
+# Refresh scheduling
+# ----------------------------------------------------------------------
+
+FINGERPRINT_FIELDS = (
+    "name",
+    "canonical_url",
+    "description",
+    "og_image",
+    "play_url",
+    "publisher",
+    "tags",
+)
+
+
+def record_fingerprint(entry: Mapping[str, object]) -> str:
+    """Stable hash of a record's content, ignoring fetch bookkeeping."""
+    payload = {name: entry.get(name) for name in FINGERPRINT_FIELDS}
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+class RefreshState:
+    """Per-slug crawl history kept in ``<output>.refresh.json``."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.slugs: Dict[str, Dict[str, object]] = {}
+        try:
+            loaded = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            loaded = {}
+        if isinstance(loaded, dict):
+            self.slugs.update(loaded)
+
+    @classmethod
+    def for_dataset(cls, dataset_path: Path) -> "RefreshState":
+        return cls(dataset_path.with_name(f"{dataset_path.name}.refresh.json"))
+
+    def observe(
+        self,
+        entry: Mapping[str, object],
+        previous: Optional[Mapping[str, object]] = None,
+    ) -> bool:
+        """Record one scrape result; returns True when the content changed."""
+        slug = str(entry["slug"])
+        stats = self.slugs.setdefault(slug, {"checks": 0, "changes": 0, "failures": 0})
+        stats["checks"] = int(stats.get("checks", 0)) + 1
+        if entry.get("error"):
+            stats["failures"] = int(stats.get("failures", 0)) + 1
+            return False
+        stats["failures"] = 0
+        fingerprint = record_fingerprint(entry)
+        known = stats.get("fingerprint")
+        if known is None and previous is not None and not previous.get("error"):
+            known = record_fingerprint(previous)
+        stats["fingerprint"] = fingerprint
+        if known is not None and known != fingerprint:
+            stats["changes"] = int(stats.get("changes", 0)) + 1
+            stats["last_changed"] = entry.get("fetched_at")
+            return True
+        return False
+
+    def rebase(self, entry: Mapping[str, object]) -> None:
+        """Adopt ``entry``'s fingerprint without counting it as a site change."""
+        if not entry.get("error"):
+            stats = self.slugs.setdefault(
+                str(entry["slug"]), {"checks": 0, "changes": 0, "failures": 0}
+            )
+            stats["fingerprint"] = record_fingerprint(entry)
+
+    def save(self) -> None:
+        atomic_write_bytes(
+            self.path, json.dumps(self.slugs, ensure_ascii=False).encode("utf-8")
+        )
+
+
+def refresh_priority(
+    meta: IndexEntry,
+    stats: Optional[Mapping[str, object]],
+    now: float,
+    *,
+    retry_base: float = DEFAULT_RETRY_SPACING,
+) -> Optional[float]:
+    """Staleness score for one record, or None while it is not due."""
+    if meta.fetched_at <= 0:
+        return float("inf")
+    age = max(0.0, now - meta.fetched_at)
+    stats = stats or {}
+    failures = int(stats.get("failures", 0) or 0)
+    if meta.error and failures == 0:
+        failures = 1
+    if failures:
+        spacing = min(retry_base * 2 ** (failures - 1), MAX_RETRY_SPACING)
+        if age < spacing:
+            return None
+        return age
+    checks = int(stats.get("checks", 0) or 0)
+    changes = int(stats.get("changes", 0) or 0)
+    return age * (changes + 1) / (checks + 1)
+
+
+def plan_refresh(
+    dataset: "DatasetView",
+    state: RefreshState,
+    *,
+    limit: int,
+    now: Optional[float] = None,
+) -> List[str]:
+    """Slugs of the ``limit`` most stale records, most stale first."""
+    moment = time.time() if now is None else now
+    scored: Iterator[Tuple[float, str]] = (
+        (score, meta.slug)
+        for meta in dataset.iter_meta()
+        for score in [refresh_priority(meta, state.slugs.get(meta.slug), moment)]
+        if score is not None
+    )
+    return [slug for _, slug in heapq.nlargest(limit, scored)]
+
+
+class CrawlBudget:
+    """Stops handing out targets once a time or request budget is spent."""
+
+    def __init__(
+        self,
+        scraper: GameScraper,
+        *,
+        seconds: Optional[float] = None,
+        requests: Optional[int] = None,
+    ) -> None:
+        self.scraper = scraper
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.requests = requests
+        self.stopped = False
+        self._start_requests = scraper.request_count
+
+    def exhausted(self) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        if self.requests is not None:
+            return self.scraper.request_count - self._start_requests >= self.requests
+        return False
+
+    def limit(self, targets: Iterable[str]) -> Iterator[str]:
+        for target in targets:
+            if self.exhausted():
+                print("[info] Crawl budget exhausted; stopping early.")
+                self.stopped = True
+                return
+            yield target
+
+
+# ----------------------------------------------------------------------
+# Change detection
+# ----------------------------------------------------------------------
+
+BOOKKEEPING_FIELDS = frozenset({"fetched_at", "last_seen"})
+_GONE_ERROR = re.compile(r"\bHTTP Error (?:404|410)\b")
+
+
+def same_content(first: Mapping[str, object], second: Mapping[str, object]) -> bool:
+    """Whether two stored records differ at most in fetch bookkeeping."""
+    keys = (first.keys() | second.keys()) - BOOKKEEPING_FIELDS
+    return all(first.get(key) == second.get(key) for key in keys)
+
+
+def diff_fields(
+    old: Mapping[str, object], new: Mapping[str, object]
+) -> Dict[str, List[object]]:
+    """``{field: [old, new]}`` for every content field that differs."""
+    return {
+        name: [old.get(name), new.get(name)]
+        for name in FINGERPRINT_FIELDS
+        if old.get(name) != new.get(name)
+    }
+
+
+def reconcile_record(
+    entry: Dict[str, object], previous: Optional[Mapping[str, object]]
+) -> Tuple[Dict[str, object], Optional[Dict[str, object]]]:
+    """Merge a fresh scrape into the stored record; returns it and the change event."""
+    slug = str(entry["slug"])
+    seen = entry.get("fetched_at")
+    error_message = entry.get("error")
+    if error_message:
+        change = "removed" if _GONE_ERROR.search(str(error_message)) else "error"
+        earlier = previous.get("error") if previous else None
+        if earlier and ("removed" if _GONE_ERROR.search(str(earlier)) else "error") == change:
+            return entry, None
+        return entry, {"slug": slug, "change": change, "at": seen, "error": error_message}
+    if previous is None:
+        return {**entry, "last_seen": seen}, {"slug": slug, "change": "added", "at": seen}
+    if previous.get("error"):
+        stored = {**entry, "last_seen": seen}
+        return stored, {"slug": slug, "change": "recovered", "at": seen}
+    if record_fingerprint(entry) == record_fingerprint(previous):
+        return {**previous, "last_seen": seen}, None
+    stored = {**entry, "last_seen": seen}
+    event = {"slug": slug, "change": "changed", "at": seen, "fields": diff_fields(previous, entry)}
+    return stored, event
+
+
+def log_entry(
+    entry: Dict[str, object], previous: Optional[Mapping[str, object]]
+) -> Dict[str, object]:
+    """The log line for ``entry``: a ``{slug, last_seen}`` touch if only that moved."""
+    if previous is None:
+        return entry
+    if {**entry, "last_seen": previous.get("last_seen")} == dict(previous):
+        return {"slug": entry["slug"], "last_seen": entry.get("last_seen")}
+    return entry
+
+
+class ChangeFeed:
+    """Append-only feed of per-run record changes, ``<output>.changes.jsonl``."""
+
+    def __init__(self, path: Path, *, run: Optional[str] = None) -> None:
+        self.path = path
+        self.run = run or datetime.now(timezone.utc).isoformat()
+        self.counts: Dict[str, int] = {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_dataset(cls, dataset_path: Path) -> "ChangeFeed":
+        return cls(dataset_path.with_name(f"{dataset_path.name}.changes.jsonl"))
+
+    def append(self, event: Dict[str, object]) -> None:
+        line = json.dumps({"run": self.run, **event}, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.write(self._fd, line.encode("utf-8"))
+            change = str(event.get("change"))
+            self.counts[change] = self.counts.get(change, 0) + 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd >= 0:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = -1
+
+
+# ----------------------------------------------------------------------
+# Run journal
+# ----------------------------------------------------------------------
+
+class RunJournal:
+    """Append-only record of what one run planned and finished."""
+
+    def __init__(self, path: Path, *, sync_every: int = DEFAULT_SYNC_EVERY) -> None:
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self.planned: Dict[str, str] = {}
+        self.finished: Dict[str, Tuple[str, int]] = {}
+        self.completed = False
+        self._fh: Optional[io.TextIOWrapper] = None
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_dataset(cls, dataset_path: Path) -> "RunJournal":
+        return cls(dataset_path.with_name(f"{dataset_path.name}.journal"))
+
+    def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("w", encoding="utf-8")
+
+    def resume(self, max_attempts: int = DEFAULT_QUEUE_ATTEMPTS) -> List[str]:
+        """Continue the previous run; returns its unfinished targets in plan order."""
+        for event in _iter_jsonl(self.path):
+            slug = str(event.get("slug") or "")
+            state = event.get("state")
+            if state == "planned" and slug:
+                self.planned.setdefault(slug, str(event.get("target") or slug))
+            elif state in {"done", "failed"} and slug:
+                attempts = event.get("attempts")
+                self.finished[slug] = (str(state), attempts if isinstance(attempts, int) else 1)
+            elif state == "complete":
+                self.completed = True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+        if self.completed:
+            return []
+        remaining: List[str] = []
+        for slug, target in self.planned.items():
+            state, attempts = self.finished.get(slug, ("pending", 0))
+            if state == "done" or (state == "failed" and attempts >= max_attempts):
+                continue
+            remaining.append(target)
+        return remaining
+
+    def is_finished(self, slug: str, max_attempts: int = DEFAULT_QUEUE_ATTEMPTS) -> bool:
+        state, attempts = self.finished.get(slug, ("pending", 0))
+        return state == "done" or (state == "failed" and attempts >= max_attempts)
+
+    def plan(self, slug: str, target: str) -> None:
+        if slug in self.planned:
+            return
+        self.planned[slug] = target
+        self._write({"state": "planned", "slug": slug, "target": target})
+
+    def finish(self, slug: str, *, ok: bool) -> None:
+        _, attempts = self.finished.get(slug, ("pending", 0))
+        state = "done" if ok else "failed"
+        self.finished[slug] = (state, attempts + 1)
+        self._write({"state": state, "slug": slug, "attempts": attempts + 1})
+
+    def complete(self) -> None:
+        self.completed = True
+        self._write({"state": "complete"}, sync=True)
+
+    def _write(self, event: Dict[str, object], *, sync: bool = False) -> None:
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._fh.flush()
+            self._unsynced += 1
+            if sync or self._unsynced >= self.sync_every:
+                os.fsync(self._fh.fileno())
+                self._unsynced = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+            self._fh = None
+
+
+def target_slugs(targets: Iterable[str]) -> Set[str]:
+    """Slugs of ``targets``, leaving out the malformed ones :func:`plan_targets` skips."""
+    slugs: Set[str] = set()
+    for target in targets:
+        try:
+            slugs.add(determine_slug(target))
+        except ValueError:
+            continue
+    return slugs
+
+
+def plan_targets(
+    targets: Iterable[str],
+    journal: Optional[RunJournal] = None,
+    *,
+    dataset: Optional[DatasetView] = None,
+    max_age: Optional[float] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[str]:
+    """Deduplicate targets by slug and drop the ones that need no fetch."""
+    counts = stats if stats is not None else {}
+    for key in ("duplicate", "finished", "fresh", "invalid"):
+        counts.setdefault(key, 0)
+    seen: Set[str] = set()
+    cutoff = time.time() - max_age if max_age else None
+    for target in targets:
+        try:
+            slug = determine_slug(target)
+        except ValueError as exc:
+            counts["invalid"] += 1
+            print(f"[warn] Skipping target: {exc}")
+            continue
+        if slug in seen:
+            counts["duplicate"] += 1
+            continue
+        seen.add(slug)
+        if journal is not None and journal.is_finished(slug):
+            counts["finished"] += 1
+            continue
+        if cutoff is not None and dataset is not None:
+            meta = dataset.meta(slug)
+            if meta is not None and not meta.error and meta.fetched_at >= cutoff:
+                counts["fresh"] += 1
+                continue
+        if journal is not None:
+            journal.plan(slug, target)
+        yield target
+
+
+# ----------------------------------------------------------------------
+# Scrape scheduling
+# ----------------------------------------------------------------------
+
+def scrape_many(
+    scraper: GameScraper,
+    targets: Iterable[str],
+    image_dir: Path,
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    previous: Optional[Mapping[str, Dict[str, object]]] = None,
+) -> Iterator[Tuple[GameRecord, Optional[Path]]]:
+    """Scrape ``targets`` and yield results as they complete."""
+
+    def previous_for(target: str) -> Optional[Dict[str, object]]:
+        if previous is None:
+            return None
+        return previous.get(determine_slug(target))
+
+    if concurrency <= 1:
+        for target in targets:
+            yield scraper.scrape(target, image_dir, previous_for(target))
+        return
+
+    window = concurrency * 2
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scrape") as executor:
+        pending: Set[Future[Tuple[GameRecord, Optional[Path]]]] = set()
+        for target in targets:
+            pending.add(
+                executor.submit(scraper.scrape, target, image_dir, previous_for(target))
+            )
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
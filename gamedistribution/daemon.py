@@ -0,0 +1,445 @@
+"""Resident scrape daemon that keeps the scraper and dataset warm between jobs
+submitted over a local socket.
+"""
+
+from __future__ import annotations
+
+import collections
+import heapq
+import http.client
+import http.server
+import itertools
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib import parse
+
+from .core import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_SERVE_PORT,
+    ChangeFeed,
+    DatasetLog,
+    DatasetView,
+    GameRecord,
+    GameScraper,
+    RefreshState,
+    determine_slug,
+    log_entry,
+    open_dataset,
+    reconcile_record,
+)
+from .catalog import CatalogDB
+
+
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+
+class ScrapeJob:
+    """Targets submitted together; each one's result arrives on :meth:`results`."""
+
+    def __init__(self, job_id: int, targets: List[str], priority: int) -> None:
+        self.id = job_id
+        self.targets = targets
+        self.priority = priority
+        self.submitted = time.monotonic()
+        self._results: "queue.Queue[Dict[str, object]]" = queue.Queue()
+
+    def put(self, result: Dict[str, object]) -> None:
+        self._results.put(result)
+
+    def results(self) -> Iterator[Dict[str, object]]:
+        """Yield one result per target, in the order they finish."""
+        for _ in range(len(self.targets)):
+            yield self._results.get()
+
+
+class _DaemonTask:
+    __slots__ = ("slug", "target", "priority", "jobs", "started")
+
+    def __init__(self, slug: str, target: str, priority: int) -> None:
+        self.slug = slug
+        self.target = target
+        self.priority = priority
+        self.jobs: List[ScrapeJob] = []
+        self.started = False
+
+
+class ScrapeDaemon:
+    """Keeps one :class:`GameScraper` and the dataset warm between jobs.
+
+    Submitted targets go into a single priority queue (higher first, then
+    in submission order) drained by ``workers`` threads, so connections,
+    robots.txt rules, rate-limit state and the dataset index are shared by
+    every job. A slug that is already queued or being scraped is not
+    fetched twice; the later job waits for the same result, and a higher
+    priority moves the queued task forward. Results go through the same
+    reconcile/log/catalog path as a normal run. Every ``checkpoint_interval``
+    seconds with new records, the log is sealed and folded into the
+    snapshot, the refresh state and image manifests are saved, and the
+    dataset view is reopened so its in-memory overlay only holds records
+    the snapshot does not have yet.
+    """
+
+    def __init__(
+        self,
+        scraper: GameScraper,
+        dataset: DatasetView,
+        log: DatasetLog,
+        image_dir: Path,
+        *,
+        refresh_state: RefreshState,
+        changes: ChangeFeed,
+        catalog: Optional[CatalogDB] = None,
+        workers: int = DEFAULT_CONCURRENCY,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    ) -> None:
+        self.scraper = scraper
+        self.dataset = dataset
+        self.log = log
+        self.image_dir = image_dir
+        self.refresh_state = refresh_state
+        self.changes = changes
+        self.catalog = catalog
+        self.workers = max(1, workers)
+        self.checkpoint_interval = checkpoint_interval
+        self.stats: Dict[str, int] = collections.Counter()
+        self.last_checkpoint: Optional[str] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._heap: List[Tuple[int, int, _DaemonTask]] = []
+        self._tasks: Dict[str, _DaemonTask] = {}
+        self._sequence = itertools.count()
+        self._job_ids = itertools.count(1)
+        self._write_lock = threading.Lock()
+        self._unsaved = 0
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._started = time.monotonic()
+
+    def start(self) -> None:
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"daemon-scrape-{number}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        if self.checkpoint_interval > 0:
+            thread = threading.Thread(
+                target=self._checkpoints, name="daemon-checkpoint", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, targets: Iterable[str], priority: int = 0) -> ScrapeJob:
+        """Queue ``targets`` (slugs or URLs); invalid ones are answered at once."""
+        unique: Dict[str, str] = {}
+        invalid: List[Tuple[str, str]] = []
+        for target in targets:
+            try:
+                if not target.strip():
+                    raise ValueError("empty target")
+                slug = determine_slug(target.strip())
+            except ValueError as exc:
+                invalid.append((target, str(exc)))
+                continue
+            unique.setdefault(slug, target.strip())
+        job = ScrapeJob(
+            next(self._job_ids), [target for target, _ in invalid] + list(unique.values()), priority
+        )
+        for target, message in invalid:
+            job.put({"job": job.id, "target": target, "slug": None, "ok": False, "error": message})
+        with self._lock:
+            if self._stopping.is_set():
+                raise RuntimeError("the daemon is shutting down")
+            self.stats["jobs"] += 1
+            self.stats["targets"] += len(job.targets)
+            for slug, target in unique.items():
+                task = self._tasks.get(slug)
+                if task is None:
+                    task = self._tasks[slug] = _DaemonTask(slug, target, priority)
+                elif task.started or task.priority >= priority:
+                    self.stats["coalesced"] += 1
+                    task.jobs.append(job)
+                    continue
+                else:
+                    self.stats["coalesced"] += 1
+                    task.priority = priority
+                task.jobs.append(job)
+                # A re-prioritised task gets a second heap entry; whichever
+                # comes out first runs it and the other is skipped.
+                heapq.heappush(self._heap, (-priority, next(self._sequence), task))
+            self._ready.notify(len(unique))
+        return job
+
+    def _next_task(self) -> Optional[_DaemonTask]:
+        with self._lock:
+            while True:
+                while self._heap:
+                    _, _, task = heapq.heappop(self._heap)
+                    if not task.started:
+                        task.started = True
+                        return task
+                if self._stopping.is_set():
+                    return None
+                self._ready.wait()
+
+    def _work(self) -> None:
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            with self._write_lock:
+                previous = self.dataset.get(task.slug)
+            try:
+                record, image_path = self.scraper.scrape(task.target, self.image_dir, previous)
+                result = self._store(record, image_path)
+            except Exception as exc:  # noqa: BLE001
+                result = {"slug": task.slug, "ok": False, "error": f"{type(exc).__name__}: {exc}"}
+            with self._lock:
+                del self._tasks[task.slug]
+                jobs = task.jobs
+                self.stats["scraped" if result["ok"] else "failed"] += 1
+            for job in jobs:
+                job.put({"job": job.id, "target": task.target, **result})
+
+    def _store(self, record: GameRecord, image_path: Optional[Path]) -> Dict[str, object]:
+        with self._write_lock:
+            previous = self.dataset.get(record.slug)
+            self.refresh_state.observe(record.to_dict(), previous)
+            entry, event = reconcile_record(record.to_dict(), previous)
+            if event is not None:
+                self.changes.append(event)
+            self.dataset[record.slug] = entry
+            line = log_entry(entry, previous)
+            self.log.append(line)
+            if self.catalog is not None and line is entry:
+                self.catalog.append(entry)
+            self._unsaved += 1
+        return {
+            "slug": record.slug,
+            "ok": not record.error,
+            "error": record.error,
+            "change": event["change"] if event is not None else "unchanged",
+            "image": str(image_path) if image_path else None,
+            "record": entry,
+        }
+
+    def _checkpoints(self) -> None:
+        while not self._stopping.wait(self.checkpoint_interval):
+            if self._unsaved:
+                try:
+                    self.checkpoint()
+                except OSError as exc:
+                    print(f"[warn] Daemon checkpoint failed: {exc}")
+
+    def checkpoint(self) -> None:
+        """Make everything scraped so far durable and fold it into the snapshot."""
+        with self._write_lock:
+            self.log.checkpoint()
+            if self.catalog is not None:
+                self.catalog.flush()
+            self.refresh_state.save()
+            self._unsaved = 0
+        self.scraper.images.flush()
+        self.log.wait_compaction()
+        self._reopen_dataset()
+        self.last_checkpoint = datetime.now(timezone.utc).isoformat()
+        self.stats["checkpoints"] += 1
+
+    def _reopen_dataset(self) -> None:
+        with self._write_lock:
+            # Flushed first, so records logged since the checkpoint are read
+            # back into the new view's overlay.
+            self.log.sync()
+            dataset = open_dataset(self.dataset.path)
+            self.dataset.close()
+            self.dataset = dataset
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            queued = sum(1 for task in self._tasks.values() if not task.started)
+            active = len(self._tasks) - queued
+            stats = dict(self.stats)
+        return {
+            "uptime": round(time.monotonic() - self._started, 1),
+            "queued": queued,
+            "in_flight": active,
+            "workers": self.workers,
+            "requests": self.scraper.request_count,
+            "last_checkpoint": self.last_checkpoint,
+            **stats,
+        }
+
+    def close(self) -> None:
+        """Stop the workers; targets still queued are answered with an error."""
+        with self._lock:
+            self._stopping.set()
+            abandoned = [task for task in self._tasks.values() if not task.started]
+            for task in abandoned:
+                task.started = True
+                del self._tasks[task.slug]
+            self._heap.clear()
+            self._ready.notify_all()
+        for task in abandoned:
+            for job in task.jobs:
+                job.put({
+                    "job": job.id,
+                    "target": task.target,
+                    "slug": task.slug,
+                    "ok": False,
+                    "error": "the daemon shut down before this target was scraped",
+                })
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class _DaemonRequestHandler(http.server.BaseHTTPRequestHandler):
+    """``POST /jobs`` streams results as JSON Lines; see :func:`run_daemon`."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "gd-daemon"
+    daemon: ScrapeDaemon
+
+    def do_GET(self) -> None:
+        if parse.urlsplit(self.path).path.rstrip("/") == "/status":
+            self._send_json(200, self.daemon.status())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        path = parse.urlsplit(self.path).path.rstrip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if path == "/checkpoint":
+            self.daemon.checkpoint()
+            self._send_json(200, self.daemon.status())
+            return
+        if path != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            request = json.loads(body or b"{}")
+            targets = request["targets"]
+            priority = int(request.get("priority") or 0)
+            if not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+                raise TypeError("targets must be a list of strings")
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            self._send_json(400, {"error": f"invalid job: {exc}"})
+            return
+        try:
+            job = self.daemon.submit(targets, priority)
+        except RuntimeError as exc:
+            self._send_json(503, {"error": str(exc)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        ok = failed = 0
+        try:
+            for result in job.results():
+                if result.get("ok"):
+                    ok += 1
+                else:
+                    failed += 1
+                self._send_chunk(result)
+            self._send_chunk({
+                "job": job.id,
+                "done": True,
+                "ok": ok,
+                "failed": failed,
+                "seconds": round(time.monotonic() - job.submitted, 3),
+            })
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The caller went away; its targets are still scraped and stored.
+            self.close_connection = True
+
+    def _send_chunk(self, payload: object) -> None:
+        line = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: object) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_daemon_server(
+    daemon: ScrapeDaemon,
+    *,
+    socket_path: Optional[Path] = None,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_SERVE_PORT,
+) -> socketserver.BaseServer:
+    """HTTP server for ``daemon`` on a Unix socket, or on ``host:port``."""
+    attributes: Dict[str, object] = {"daemon": daemon}
+    if socket_path is None:
+        attributes["disable_nagle_algorithm"] = True
+        handler = type("DaemonRequestHandler", (_DaemonRequestHandler,), attributes)
+        server = http.server.ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        return server
+    if socket_path.is_socket():
+        # Left behind by a daemon that did not shut down cleanly.
+        socket_path.unlink()
+    handler = type("DaemonRequestHandler", (_DaemonRequestHandler,), attributes)
+    return _UnixHTTPServer(str(socket_path), handler)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: Path, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(str(self.socket_path))
+
+
+def submit_job(
+    targets: List[str],
+    *,
+    priority: int = 0,
+    socket_path: Optional[Path] = None,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_SERVE_PORT,
+) -> Iterator[Dict[str, object]]:
+    """Send ``targets`` to a running daemon and yield its streamed results."""
+    conn: http.client.HTTPConnection
+    if socket_path is not None:
+        conn = _UnixHTTPConnection(socket_path)
+    else:
+        conn = http.client.HTTPConnection(host, port)
+    try:
+        body = json.dumps({"targets": targets, "priority": priority}).encode("utf-8")
+        conn.request("POST", "/jobs", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        if resp.status != 200:
+            message = resp.read().decode("utf-8", "replace")
+            raise RuntimeError(f"daemon answered {resp.status}: {message}")
+        for line in resp:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        conn.close()
@@ -0,0 +1,456 @@
+"""Read-only HTTP query service answering from in-memory indexes over the dataset."""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import http.server
+import json
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+from urllib import parse
+
+from .core import (
+    RecordStore,
+    _is_touch,
+    _seen_at,
+    _snapshot_identity,
+    _touched,
+    open_dataset,
+    same_content,
+    wal_segments,
+)
+
+
+DEFAULT_SERVE_PAGE_SIZE = 24
+MAX_SERVE_PAGE_SIZE = 200
+DEFAULT_SERVE_CACHE_ENTRIES = 4096
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+
+class CatalogIndex:
+    """In-memory inverted indexes over the dataset for the query service.
+
+    ``records`` maps slug to record; tag and publisher keys (compared
+    case-insensitively) map to sets of slugs. The sorted slug lists used for
+    pagination are built lazily per key and dropped only for the keys a
+    change touches, so an update to one game does not re-sort every tag.
+    Records carrying an ``error`` are reachable by slug but left out of
+    listings. An update that only moves ``last_seen``/``fetched_at`` swaps
+    the record in without reindexing, but still bumps :attr:`generation`
+    since cached responses embed those fields.
+    """
+
+    def __init__(self) -> None:
+        self.records = RecordStore()
+        self.generation = 0
+        self._listed: Set[str] = set()
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._by_publisher: Dict[str, Set[str]] = {}
+        self._tag_names: Dict[str, str] = {}
+        self._publisher_names: Dict[str, str] = {}
+        self._sorted: Dict[Tuple[str, str], List[str]] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, entries: Iterable[Dict[str, object]], removed: Iterable[str] = ()) -> int:
+        """Upsert ``entries`` and drop ``removed`` slugs. Returns the records touched."""
+        touched = 0
+        with self._lock:
+            for slug in removed:
+                if slug in self.records:
+                    self._unindex(slug, self.records.pop(slug))
+                    touched += 1
+            for entry in entries:
+                slug = entry.get("slug")
+                if not slug:
+                    continue
+                slug = str(slug)
+                previous = self.records.get(slug)
+                if previous == entry:
+                    continue
+                if previous is not None and same_content(previous, entry):
+                    self.records[slug] = entry
+                    touched += 1
+                    continue
+                if previous is not None:
+                    self._unindex(slug, previous)
+                self.records[slug] = entry
+                self._index(slug, entry)
+                touched += 1
+            if touched:
+                self.generation += 1
+        return touched
+
+    def _keys(self, entry: Mapping[str, object]) -> Iterator[Tuple[str, str, str]]:
+        if entry.get("error"):
+            return
+        yield "all", "", ""
+        publisher = entry.get("publisher")
+        if isinstance(publisher, str) and publisher:
+            yield "publisher", publisher.casefold(), publisher
+        tags = entry.get("tags")
+        if isinstance(tags, list):
+            for tag in tags:
+                if isinstance(tag, str) and tag:
+                    yield "tag", tag.casefold(), tag
+
+    def _index(self, slug: str, entry: Mapping[str, object]) -> None:
+        for kind, key, name in self._keys(entry):
+            if kind == "all":
+                self._listed.add(slug)
+            elif kind == "tag":
+                self._by_tag.setdefault(key, set()).add(slug)
+                self._tag_names.setdefault(key, name)
+            else:
+                self._by_publisher.setdefault(key, set()).add(slug)
+                self._publisher_names.setdefault(key, name)
+            self._sorted.pop((kind, key), None)
+
+    def _unindex(self, slug: str, entry: Mapping[str, object]) -> None:
+        for kind, key, _ in self._keys(entry):
+            if kind == "all":
+                self._listed.discard(slug)
+            else:
+                groups, names = (
+                    (self._by_tag, self._tag_names)
+                    if kind == "tag"
+                    else (self._by_publisher, self._publisher_names)
+                )
+                members = groups.get(key)
+                if members is not None:
+                    members.discard(slug)
+                    if not members:
+                        del groups[key]
+                        names.pop(key, None)
+            self._sorted.pop((kind, key), None)
+
+    def _members(self, kind: str, key: str) -> List[str]:
+        cached = self._sorted.get((kind, key))
+        if cached is None:
+            if kind == "all":
+                members: Set[str] = self._listed
+            elif kind == "tag":
+                members = self._by_tag.get(key, set())
+            else:
+                members = self._by_publisher.get(key, set())
+            cached = self._sorted[(kind, key)] = sorted(members)
+        return cached
+
+    def get(self, slug: str) -> Optional[Dict[str, object]]:
+        return self.records.get(slug)
+
+    def listing(
+        self,
+        *,
+        tag: Optional[str] = None,
+        publisher: Optional[str] = None,
+        offset: int = 0,
+        limit: int = DEFAULT_SERVE_PAGE_SIZE,
+    ) -> Tuple[int, List[Dict[str, object]]]:
+        """``(total, page)`` of listed records, ordered by slug."""
+        with self._lock:
+            if tag and publisher:
+                by_tag = self._members("tag", tag.casefold())
+                by_publisher = self._members("publisher", publisher.casefold())
+                smaller, larger = sorted((by_tag, by_publisher), key=len)
+                lookup = set(larger)
+                slugs = [slug for slug in smaller if slug in lookup]
+            elif tag:
+                slugs = self._members("tag", tag.casefold())
+            elif publisher:
+                slugs = self._members("publisher", publisher.casefold())
+            else:
+                slugs = self._members("all", "")
+            page = [self.records[slug] for slug in slugs[offset:offset + limit]]
+            return len(slugs), page
+
+    def facets(self, kind: str) -> List[Dict[str, object]]:
+        """Tag or publisher names with their record counts, most common first."""
+        with self._lock:
+            groups, names = (
+                (self._by_tag, self._tag_names)
+                if kind == "tag"
+                else (self._by_publisher, self._publisher_names)
+            )
+            counts = [(len(members), names[key]) for key, members in groups.items()]
+        counts.sort(key=lambda item: (-item[0], item[1].casefold()))
+        return [{"name": name, "count": count} for count, name in counts]
+
+
+class ResponseCache:
+    """Bounded LRU of rendered responses, emptied whenever the index changes."""
+
+    def __init__(self, max_entries: int = DEFAULT_SERVE_CACHE_ENTRIES) -> None:
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "collections.OrderedDict[str, Tuple[int, bytes, str]]" = (
+            collections.OrderedDict()
+        )
+        self._generation = -1
+        self._lock = threading.Lock()
+
+    def get(self, key: str, generation: int) -> Optional[Tuple[int, bytes, str]]:
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, key: str, generation: int, response: Tuple[int, bytes, str]) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = response
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DatasetWatcher:
+    """Keeps a :class:`CatalogIndex` in step with the dataset on disk.
+
+    Records appended to log segments are tailed from the last offset read.
+    When the snapshot is replaced (compaction, merge, re-extraction) its
+    sidecar index is compared against the records in memory, and only the
+    lines whose last-seen time or error flag changed are decoded; slugs that
+    disappeared are dropped. Changes are applied in small batches, so
+    queries keep being answered from the live index throughout.
+    """
+
+    def __init__(self, path: Path, index: CatalogIndex, *, batch_size: int = 1000) -> None:
+        self.path = path
+        self.index = index
+        self.batch_size = batch_size
+        self._snapshot: Optional[Tuple[int, int, int]] = None
+        self._offsets: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> int:
+        """Apply whatever changed since the last poll. Returns the records touched."""
+        snapshot = _snapshot_identity(self.path) if self.path.exists() else None
+        if snapshot != self._snapshot:
+            touched = self._resync()
+            self._snapshot = snapshot
+            return touched
+        return self._tail_segments()
+
+    def _resync(self) -> int:
+        # Offsets are taken before the view reads the segments, so lines
+        # appended meanwhile are tailed again later; applying a record twice
+        # is harmless.
+        offsets = {segment.name: segment.stat().st_size for segment in wal_segments(self.path)}
+        view = open_dataset(self.path)
+        touched = 0
+        try:
+            seen: Set[str] = set()
+            changed: List[Dict[str, object]] = []
+            for meta in view.iter_meta():
+                seen.add(meta.slug)
+                current = self.index.get(meta.slug)
+                if (
+                    current is not None
+                    and _seen_at(current) == meta.fetched_at
+                    and bool(current.get("error")) == meta.error
+                ):
+                    continue
+                changed.append(view.load(meta))
+                if len(changed) >= self.batch_size:
+                    touched += self.index.apply(changed)
+                    changed = []
+            removed = [slug for slug in list(self.index.records) if slug not in seen]
+            touched += self.index.apply(changed, removed)
+        finally:
+            view.close()
+        self._offsets = offsets
+        return touched
+
+    def _tail_segments(self) -> int:
+        touched = 0
+        offsets: Dict[str, int] = {}
+        for segment in wal_segments(self.path):
+            start = self._offsets.get(segment.name, 0)
+            try:
+                with segment.open("rb") as fh:
+                    fh.seek(start)
+                    data = fh.read()
+            except FileNotFoundError:
+                continue
+            # Stop at the last complete line; a record being written is
+            # picked up on the next poll.
+            end = data.rfind(b"\n") + 1
+            offsets[segment.name] = start + end
+            entries: Dict[str, Dict[str, object]] = {}
+            for line in data[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(entry, dict) or not entry.get("slug"):
+                    continue
+                slug = str(entry["slug"])
+                if _is_touch(entry):
+                    base = entries.get(slug) or self.index.get(slug)
+                    if base is None:
+                        continue
+                    entry = _touched(base, entry)
+                entries[slug] = entry
+                if len(entries) >= self.batch_size:
+                    touched += self.index.apply(list(entries.values()))
+                    entries = {}
+            touched += self.index.apply(list(entries.values()))
+        self._offsets = offsets
+        return touched
+
+    def start(self, interval: float) -> None:
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="dataset-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                touched = self.poll()
+            except (OSError, ValueError, struct.error) as exc:
+                print(f"[warn] Dataset reload failed: {exc}")
+                continue
+            if touched:
+                print(f"[info] Reloaded {touched} records from {self.path}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class CatalogService:
+    """Answers the query service's JSON endpoints from a :class:`CatalogIndex`.
+
+    ``GET /games`` lists records (filter with ``tag`` and ``publisher``,
+    page with ``page`` and ``per_page``), ``GET /games/<slug>`` returns one
+    record, ``GET /tags`` and ``GET /publishers`` list names with counts,
+    ``GET /tags/<tag>`` and ``GET /publishers/<name>`` are listing
+    shortcuts, and ``GET /status`` reports index and cache sizes. Rendered
+    bodies are cached per URL with a strong ETag until the index changes;
+    ``/status`` is rendered fresh every time.
+    """
+
+    def __init__(self, index: CatalogIndex, cache: ResponseCache) -> None:
+        self.index = index
+        self.cache = cache
+
+    def respond(self, target: str) -> Tuple[int, bytes, str]:
+        """``(status, body, etag)`` for the request target ``target``."""
+        generation = self.index.generation
+        cacheable = parse.urlsplit(target).path.strip("/") != "status"
+        if cacheable:
+            cached = self.cache.get(target, generation)
+            if cached is not None:
+                return cached
+        status, payload = self._route(target)
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        response = (status, body, '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"')
+        if cacheable and status != 400:
+            self.cache.put(target, generation, response)
+        return response
+
+    def _route(self, target: str) -> Tuple[int, object]:
+        split = parse.urlsplit(target)
+        parts = [parse.unquote(part) for part in split.path.split("/") if part]
+        params = dict(parse.parse_qsl(split.query))
+        if parts == ["status"]:
+            return 200, {
+                "records": len(self.index.records),
+                "generation": self.index.generation,
+                "cache": {
+                    "entries": len(self.cache),
+                    "hits": self.cache.hits,
+                    "misses": self.cache.misses,
+                },
+            }
+        if parts == ["games"]:
+            return self._listing(params, params.get("tag"), params.get("publisher"))
+        if len(parts) == 2 and parts[0] == "games":
+            record = self.index.get(parts[1])
+            if record is None:
+                return 404, {"error": f"unknown game {parts[1]!r}"}
+            return 200, record
+        if parts and parts[0] in ("tags", "publishers"):
+            kind = "tag" if parts[0] == "tags" else "publisher"
+            if len(parts) == 1:
+                return 200, {parts[0]: self.index.facets(kind)}
+            if len(parts) == 2:
+                if kind == "tag":
+                    return self._listing(params, parts[1], params.get("publisher"))
+                return self._listing(params, params.get("tag"), parts[1])
+        return 404, {"error": "not found"}
+
+    def _listing(
+        self, params: Mapping[str, str], tag: Optional[str], publisher: Optional[str]
+    ) -> Tuple[int, object]:
+        try:
+            page = max(1, int(params.get("page", 1)))
+            per_page = int(params.get("per_page", DEFAULT_SERVE_PAGE_SIZE))
+        except ValueError:
+            return 400, {"error": "page and per_page must be integers"}
+        per_page = min(max(1, per_page), MAX_SERVE_PAGE_SIZE)
+        total, games = self.index.listing(
+            tag=tag, publisher=publisher, offset=(page - 1) * per_page, limit=per_page
+        )
+        return 200, {"total": total, "page": page, "per_page": per_page, "games": games}
+
+
+class _CatalogRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "gd-catalog"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response would wait out the client's delayed ACK.
+    disable_nagle_algorithm = True
+    service: CatalogService
+
+    def do_GET(self) -> None:
+        status, body, etag = self.service.respond(self.path)
+        if status == 200 and _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def make_catalog_server(
+    service: CatalogService, host: str, port: int
+) -> http.server.ThreadingHTTPServer:
+    handler = type("CatalogRequestHandler", (_CatalogRequestHandler,), {"service": service})
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
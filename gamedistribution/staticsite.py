@@ -0,0 +1,342 @@
+"""Incremental static site rendered from the dataset."""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from .core import atomic_write_bytes
+
+
+SITE_TEMPLATE_VERSION = 2
+SITE_PAGE_SIZE = 100
+SITE_MANIFEST = ".site-manifest.json"
+DEFAULT_SITE_BATCH = 500
+
+
+SITE_FIELDS = (
+    "name",
+    "description",
+    "og_image",
+    "play_url",
+    "canonical_url",
+    "publisher",
+    "tags",
+)
+
+_SITE_HEAD = (
+    "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+    "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">\n"
+    "<title>{title}</title>\n{extra}</head>\n<body>\n"
+)
+_SITE_FOOT = "</body>\n</html>\n"
+
+
+@functools.lru_cache(maxsize=65536)
+def site_slug(value: str) -> str:
+    """Path segment for a game, tag or publisher page."""
+    cleaned = re.sub(r"[^\w]+", "-", value.casefold()).strip("-_")
+    return cleaned[:120] or hashlib.blake2b(value.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def site_record_hash(entry: Mapping[str, object]) -> str:
+    """Hash of everything a game page is rendered from.
+
+    The fields are JSON values (strings, lists of strings, None), whose
+    ``repr`` is stable and several times cheaper than ``json.dumps``.
+    """
+    data = repr([entry.get(field) for field in SITE_FIELDS]).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def site_groups(entry: Mapping[str, object]) -> List[Tuple[str, str]]:
+    """``(kind, name)`` of every listing page group ``entry`` appears in."""
+    groups: List[Tuple[str, str]] = []
+    tags = entry.get("tags")
+    if isinstance(tags, list):
+        groups.extend(("tags", tag) for tag in tags if isinstance(tag, str) and tag)
+    publisher = entry.get("publisher")
+    if isinstance(publisher, str) and publisher:
+        groups.append(("publishers", publisher))
+    return groups
+
+
+def site_page_dirs(slugs: Iterable[str]) -> Dict[str, str]:
+    """Page directory of every game in ``slugs``, unique across them.
+
+    Slugs that normalise to the same :func:`site_slug` (``Foo`` and ``foo``)
+    would overwrite each other's page. In such a clash the slug that already
+    is its normalised form keeps the plain directory and every other one
+    gets a short hash of the original slug appended.
+    """
+    by_dir: Dict[str, List[str]] = {}
+    for slug in slugs:
+        by_dir.setdefault(site_slug(slug), []).append(slug)
+    dirs: Dict[str, str] = {}
+    for name, clashing in by_dir.items():
+        for slug in clashing:
+            if len(clashing) == 1 or slug == name:
+                dirs[slug] = name
+            else:
+                digest = hashlib.blake2b(slug.encode("utf-8"), digest_size=6).hexdigest()
+                dirs[slug] = f"{name}-{digest}"
+    return dirs
+
+
+def game_page_path(page_dir: str) -> str:
+    return f"games/{page_dir}/index.html"
+
+
+def listing_dir(kind: str, name: str) -> str:
+    return f"{kind}/{site_slug(name)}/"
+
+
+def listing_page_path(kind: str, name: str, page: int) -> str:
+    return listing_dir(kind, name) + ("index.html" if page == 1 else f"page-{page}.html")
+
+
+def render_game_page(entry: Mapping[str, object]) -> bytes:
+    esc = html.escape
+    name = str(entry.get("name") or entry.get("slug") or "")
+    description = str(entry.get("description") or "")
+    extra = f'<meta name="description" content="{esc(description[:300])}">\n'
+    if entry.get("canonical_url"):
+        extra += f'<link rel="canonical" href="{esc(str(entry["canonical_url"]))}">\n'
+    if entry.get("og_image"):
+        extra += f'<meta property="og:image" content="{esc(str(entry["og_image"]))}">\n'
+    parts = [_SITE_HEAD.format(title=esc(name), extra=extra), f"<h1>{esc(name)}</h1>\n"]
+    if entry.get("og_image"):
+        parts.append(f'<img src="{esc(str(entry["og_image"]))}" alt="{esc(name)}">\n')
+    if description:
+        parts.append(f"<p>{esc(description)}</p>\n")
+    if entry.get("play_url"):
+        parts.append(
+            f'<iframe src="{esc(str(entry["play_url"]))}" width="960" height="600" '
+            'allowfullscreen loading="lazy"></iframe>\n'
+        )
+    links = [
+        f'<a href="../../{esc(listing_dir(kind, group))}">{esc(group)}</a>'
+        for kind, group in site_groups(entry)
+    ]
+    if links:
+        parts.append(f"<p>{' · '.join(links)}</p>\n")
+    parts.append(_SITE_FOOT)
+    return "".join(parts).encode("utf-8")
+
+
+def render_listing_page(
+    title: str, cards: List[Tuple[str, str, str]], page: int, pages: int
+) -> bytes:
+    """A tag or publisher page; ``cards`` are ``(page_dir, name, image)``."""
+    esc = html.escape
+    heading = title if page == 1 else f"{title} (page {page} of {pages})"
+    parts = [_SITE_HEAD.format(title=esc(heading), extra=""), f"<h1>{esc(heading)}</h1>\n<ul>\n"]
+    for page_dir, name, image in cards:
+        href = f"../../games/{page_dir}/"
+        thumb = f'<img src="{esc(image)}" alt="" loading="lazy"> ' if image else ""
+        parts.append(f'<li><a href="{esc(href)}">{thumb}{esc(name)}</a></li>\n')
+    parts.append("</ul>\n")
+    nav = []
+    if page > 1:
+        previous = "index.html" if page == 2 else f"page-{page - 1}.html"
+        nav.append(f'<a href="{previous}">Previous</a>')
+    if page < pages:
+        nav.append(f'<a href="page-{page + 1}.html">Next</a>')
+    if nav:
+        parts.append(f"<nav>{' '.join(nav)}</nav>\n")
+    parts.append(_SITE_FOOT)
+    return "".join(parts).encode("utf-8")
+
+
+def render_home_page(sections: List[Tuple[str, List[Tuple[str, int]]]]) -> bytes:
+    """Site index; ``sections`` are ``(kind, [(name, count), ...])``."""
+    esc = html.escape
+    parts = [_SITE_HEAD.format(title="Games", extra=""), "<h1>Games</h1>\n"]
+    for kind, groups in sections:
+        parts.append(f"<h2>{esc(kind.title())}</h2>\n<ul>\n")
+        for name, count in groups:
+            href = esc(listing_dir(kind, name))
+            parts.append(f'<li><a href="{href}">{esc(name)}</a> ({count})</li>\n')
+        parts.append("</ul>\n")
+    parts.append(_SITE_FOOT)
+    return "".join(parts).encode("utf-8")
+
+
+def _render_site_batch(root: str, jobs: List[Tuple[str, str, Any]]) -> int:
+    """Worker: render and write ``(path, kind, payload)`` jobs under ``root``."""
+    base = Path(root)
+    for path, kind, payload in jobs:
+        if kind == "game":
+            data = render_game_page(payload)
+        elif kind == "listing":
+            data = render_listing_page(*payload)
+        else:
+            data = render_home_page(payload)
+        atomic_write_bytes(base / path, data)
+    return len(jobs)
+
+
+def _manifest_groups(line: str) -> Iterator[Tuple[str, str]]:
+    for group in line.split(" ")[2:]:
+        kind, _, key = group.partition("/")
+        yield kind, key
+
+
+def _manifest_page_dir(line: str) -> str:
+    return line.split(" ", 2)[1]
+
+
+def _site_card(
+    slug: str, page_dir: str, entry: Mapping[str, object]
+) -> Tuple[str, str, str]:
+    return page_dir, str(entry.get("name") or slug), str(entry.get("og_image") or "")
+
+
+def _site_page_hash(payload: object) -> str:
+    data = json.dumps([SITE_TEMPLATE_VERSION, payload], ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def build_site(
+    records: Mapping[str, Dict[str, object]],
+    root: Path,
+    *,
+    jobs: Optional[int] = None,
+    page_size: int = SITE_PAGE_SIZE,
+    batch_size: int = DEFAULT_SITE_BATCH,
+) -> Dict[str, int]:
+    """Bring the static site under ``root`` up to date with ``records``.
+
+    ``root/.site-manifest.json`` remembers the input hash, page directory
+    (see :func:`site_page_dirs`) and listing groups of every game page (as
+    one ``"hash dir kind/key ..."`` string, which is far quicker to load than
+    nested lists) and the hash of every listing page. A game page is
+    rendered only when its hash changed; tag and publisher pages are
+    recomputed only for groups a changed, added or removed game belongs to
+    (before or after the change), and of those only pages whose cards
+    differ are written. Rendering runs on a process pool in batches.
+    Records with an ``error`` get no page. Returns counts of what was done.
+    """
+    manifest_path = root / SITE_MANIFEST
+    manifest: Dict[str, Any] = {}
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            manifest = {}
+    if manifest.get("version") != SITE_TEMPLATE_VERSION:
+        manifest = {}
+    old_games: Dict[str, str] = manifest.get("games", {})
+    old_pages: Dict[str, str] = manifest.get("pages", {})
+
+    # Listing groups are keyed by their directory, so names differing only
+    # in case or punctuation share one page.
+    work: List[Tuple[str, str, Any]] = []
+    games: Dict[str, str] = {}
+    affected: Set[Tuple[str, str]] = set()
+    members: Dict[Tuple[str, str], List[str]] = {}
+    names: Dict[Tuple[str, str], str] = {}
+    stats = {"games": 0, "unchanged": 0, "removed": 0, "listings": 0}
+    page_dirs = site_page_dirs(
+        slug for slug, entry in records.items() if not entry.get("error")
+    )
+    for slug, entry in records.items():
+        if entry.get("error"):
+            continue
+        page_dir = page_dirs[slug]
+        digest = site_record_hash(entry)
+        groups = []
+        for kind, name in site_groups(entry):
+            group = (kind, site_slug(name))
+            groups.append(group)
+            members.setdefault(group, []).append(slug)
+            if group not in names or name < names[group]:
+                names[group] = name
+        line = " ".join([digest, page_dir, *(f"{kind}/{key}" for kind, key in groups)])
+        games[slug] = line
+        previous = old_games.get(slug)
+        if previous == line:
+            stats["unchanged"] += 1
+            continue
+        work.append((game_page_path(page_dir), "game", entry))
+        affected.update(groups)
+        if previous is not None:
+            affected.update(_manifest_groups(previous))
+    in_use = set(page_dirs.values())
+    for slug, previous in old_games.items():
+        old_dir = _manifest_page_dir(previous)
+        if old_dir not in in_use:
+            # Removed, or moved to a disambiguated directory.
+            (root / game_page_path(old_dir)).unlink(missing_ok=True)
+        if slug in games:
+            continue
+        affected.update(_manifest_groups(previous))
+        stats["removed"] += 1
+    stats["games"] = len(work)
+
+    pages = {
+        path: digest
+        for path, digest in old_pages.items()
+        if tuple(path.split("/")[:2]) not in affected
+    }
+    for group in sorted(affected):
+        kind, key = group
+        slugs = sorted(members.get(group, []))
+        count = -(-len(slugs) // page_size)
+        for page in range(1, count + 1):
+            cards = [
+                _site_card(slug, page_dirs[slug], records[slug])
+                for slug in slugs[(page - 1) * page_size : page * page_size]
+            ]
+            payload = (names[group], cards, page, count)
+            path = listing_page_path(kind, key, page)
+            digest = _site_page_hash(payload)
+            pages[path] = digest
+            if old_pages.get(path) != digest:
+                work.append((path, "listing", payload))
+                stats["listings"] += 1
+        for path in old_pages:
+            if path.startswith(f"{kind}/{key}/") and path not in pages:
+                (root / path).unlink(missing_ok=True)
+
+    sections = []
+    for section in ("tags", "publishers"):
+        counts = [
+            (names[group], len(slugs)) for group, slugs in members.items() if group[0] == section
+        ]
+        counts.sort(key=lambda item: (-item[1], item[0].casefold()))
+        sections.append((section, counts))
+    home_digest = _site_page_hash(sections)
+    pages["index.html"] = home_digest
+    if old_pages.get("index.html") != home_digest:
+        work.append(("index.html", "home", sections))
+
+    root.mkdir(parents=True, exist_ok=True)
+    batches = [work[start : start + batch_size] for start in range(0, len(work), batch_size)]
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(batches)))
+    if workers == 1:
+        for batch in batches:
+            _render_site_batch(str(root), batch)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for future in as_completed(
+                [executor.submit(_render_site_batch, str(root), batch) for batch in batches]
+            ):
+                future.result()
+
+    atomic_write_bytes(
+        manifest_path,
+        json.dumps(
+            {"version": SITE_TEMPLATE_VERSION, "games": games, "pages": pages},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8"),
+    )
+    return stats
@@ -0,0 +1,352 @@
+"""Shared SQLite work queue, rate limits and shards for crawling with several
+workers at once.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import itertools
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .core import (
+    DEFAULT_QUEUE_ATTEMPTS,
+    AdaptiveRateLimiter,
+    RefreshState,
+    _iter_jsonl,
+    _seen_at,
+    compact_dataset,
+    dataset_index_path,
+    determine_slug,
+    open_dataset,
+    sanitize_filename,
+    wal_segments,
+)
+
+
+DEFAULT_LEASE_SIZE = 50
+DEFAULT_LEASE_SECONDS = 600.0
+
+
+class WorkQueue:
+    """SQLite work queue shared by a coordinator and any number of workers.
+
+    The coordinator enqueues targets keyed by slug. Workers lease batches
+    for ``lease_seconds`` and keep extending the lease while they work; a
+    lease that expires (its worker crashed or lost the volume) goes back to
+    pending and is picked up by the next :meth:`lease` call. Failed targets
+    are retried up to ``max_attempts`` times.
+
+    Every state change runs in a ``BEGIN IMMEDIATE`` transaction, so the
+    database may sit on a volume shared between machines as long as it
+    supports POSIX locks. The rollback journal is kept for the same reason.
+    """
+
+    def __init__(self, path: Path, *, max_attempts: int = DEFAULT_QUEUE_ATTEMPTS) -> None:
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(path), timeout=60.0, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " slug TEXT PRIMARY KEY,"
+                " target TEXT NOT NULL,"
+                " state TEXT NOT NULL DEFAULT 'pending',"
+                " owner TEXT,"
+                " lease_expires REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " updated REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_expires)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS host_slots ("
+                " host TEXT PRIMARY KEY, next_at REAL NOT NULL, interval REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(host_slots)")}
+            if "interval" not in columns:
+                conn.execute("ALTER TABLE host_slots ADD COLUMN interval REAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, heartbeat REAL)"
+            )
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, targets: Iterable[str], *, batch_size: int = 1000) -> int:
+        """Add targets as pending; finished ones are queued again.
+
+        Returns how many targets were actually added or requeued; targets
+        already pending or leased are left alone and not counted.
+        """
+        added = 0
+        for batch in _batched(targets, batch_size):
+            now = time.time()
+            rows = [(determine_slug(target), target, now) for target in batch]
+            with self._transaction() as conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT INTO tasks (slug, target, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(slug) DO UPDATE SET state = 'pending', attempts = 0, "
+                    "target = excluded.target, updated = excluded.updated "
+                    "WHERE tasks.state IN ('done', 'failed')",
+                    rows,
+                )
+                added += conn.total_changes - before
+        return added
+
+    def lease(self, worker: str, count: int, lease_seconds: float) -> List[Tuple[str, str]]:
+        """Claim up to ``count`` pending targets, reclaiming expired leases first."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET state = 'pending', owner = NULL "
+                "WHERE state = 'leased' AND lease_expires < ?",
+                (now,),
+            )
+            rows = conn.execute(
+                "SELECT slug, target FROM tasks WHERE state = 'pending' ORDER BY updated LIMIT ?",
+                (count,),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET state = 'leased', owner = ?, lease_expires = ?, updated = ? "
+                "WHERE slug = ?",
+                [(worker, now + lease_seconds, now, slug) for slug, _ in rows],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)", (worker, now)
+            )
+        return [(str(slug), str(target)) for slug, target in rows]
+
+    def heartbeat(self, worker: str, lease_seconds: float) -> None:
+        """Extend every lease ``worker`` still holds."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE owner = ? AND state = 'leased'",
+                (now + lease_seconds, worker),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)", (worker, now)
+            )
+
+    def complete(self, worker: str, slug: str, *, ok: bool) -> None:
+        """Mark a leased target done, or pending again / failed after an error."""
+        now = time.time()
+        with self._transaction() as conn:
+            if ok:
+                conn.execute(
+                    "UPDATE tasks SET state = 'done', owner = NULL, updated = ? "
+                    "WHERE slug = ? AND owner = ?",
+                    (now, slug, worker),
+                )
+            else:
+                conn.execute(
+                    "UPDATE tasks SET attempts = attempts + 1, owner = NULL, updated = ?, "
+                    "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                    "WHERE slug = ? AND owner = ?",
+                    (now, self.max_attempts, slug, worker),
+                )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        return {str(state): int(count) for state, count in rows}
+
+    def reserve_slot(
+        self, host: str, interval: float, *, floor: float = 0.0
+    ) -> Tuple[float, float]:
+        """Book the next request slot for ``host`` across all workers.
+
+        The host's shared interval (see :meth:`set_interval`) takes the place
+        of ``interval`` once one has been stored; neither drops below
+        ``floor``. Returns how long the caller must wait for the slot and the
+        interval that was applied.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT next_at, interval FROM host_slots WHERE host = ?", (host,)
+            ).fetchone()
+            slot = max(now, float(row[0])) if row else now
+            shared = row[1] if row else None
+            applied = max(floor, interval if shared is None else float(shared))
+            conn.execute(
+                "INSERT INTO host_slots (host, next_at) VALUES (?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET next_at = excluded.next_at",
+                (host, slot + applied),
+            )
+        return slot - now, applied
+
+    def set_interval(self, host: str, interval: float) -> None:
+        """Store ``host``'s request interval for every worker to apply."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO host_slots (host, next_at, interval) VALUES (?, 0, ?) "
+                "ON CONFLICT(host) DO UPDATE SET interval = excluded.interval",
+                (host, interval),
+            )
+
+    def pause_host(self, host: str, seconds: float) -> None:
+        until = time.time() + seconds
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO host_slots (host, next_at) VALUES (?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET next_at = MAX(next_at, excluded.next_at)",
+                (host, until),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SharedRateLimiter(AdaptiveRateLimiter):
+    """Per-host limiter whose slots are booked in a :class:`WorkQueue`.
+
+    Every worker process reserves slots from the same ``host_slots`` table,
+    so ``--rate-limit``, ``Crawl-delay`` and ``Retry-After`` hold for the
+    fleet as a whole rather than per process. With ``adaptive`` set, each
+    worker runs the :class:`AdaptiveRateLimiter` controller on the host's
+    shared interval and stores every adjustment back, so one worker's 429s
+    slow the whole fleet down and healthy responses speed it up again.
+    """
+
+    def __init__(
+        self,
+        work_queue: WorkQueue,
+        interval: float,
+        *,
+        adaptive: bool = False,
+        **options: float,
+    ) -> None:
+        super().__init__(interval, **options)
+        self.work_queue = work_queue
+        self.adaptive = adaptive
+
+    def acquire(self, host: str) -> float:
+        key = host.lower()
+        bucket = self.bucket(key)
+        delay, interval = self.work_queue.reserve_slot(
+            key, bucket.interval, floor=self.floor(key)
+        )
+        # Pick up adjustments made by other workers before the next record().
+        bucket.set_interval(interval)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def record(self, host: str, status: int, latency: float) -> None:
+        if not self.adaptive:
+            return
+        key = host.lower()
+        bucket = self.bucket(key)
+        before = bucket.interval
+        super().record(key, status, latency)
+        if bucket.interval != before:
+            try:
+                self.work_queue.set_interval(key, bucket.interval)
+            except sqlite3.Error as exc:
+                print(f"[warn] Could not share the rate limit for {key}: {exc}")
+
+    def pause(self, host: str, seconds: float) -> None:
+        self.work_queue.pause_host(host.lower(), seconds)
+
+
+def _batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def shard_path(output: Path, worker: str) -> Path:
+    return output.with_name(f"{output.name}.shard-{sanitize_filename(worker) or 'worker'}")
+
+
+def shard_sources(output: Path) -> List[Path]:
+    """Every worker shard snapshot and log segment for ``output``, oldest first."""
+    # A worker that died before compacting has log segments but no snapshot.
+    shards: Set[str] = set()
+    for candidate in output.parent.glob(f"{output.name}.shard-*"):
+        name = candidate.name.split(".wal.", 1)[0]
+        shards.add(name[: -len(".idx")] if name.endswith(".idx") else name)
+    sources: List[Path] = []
+    for name in sorted(shards):
+        snapshot = output.with_name(name)
+        if snapshot.exists():
+            sources.append(snapshot)
+        sources.extend(wal_segments(snapshot))
+    return sources
+
+
+def merge_shards(output: Path, refresh_state: Optional[RefreshState] = None) -> int:
+    """Fold worker shards into ``output`` and delete them; returns the slug count.
+
+    Pending log segments of ``output`` are folded first, so they cannot
+    override the merged records on the next open. When several shards hold
+    the same slug, the most recently scraped record wins.
+    """
+    sources = shard_sources(output)
+    if not sources:
+        return 0
+    compact_dataset(output)
+    if refresh_state is not None:
+        newest: Dict[str, Dict[str, object]] = {}
+        for source in sources:
+            for entry in _iter_jsonl(source):
+                slug = str(entry.get("slug") or "")
+                if slug and (slug not in newest or _seen_at(entry) >= _seen_at(newest[slug])):
+                    newest[slug] = entry
+        dataset = open_dataset(output)
+        try:
+            for slug, entry in newest.items():
+                refresh_state.observe(entry, dataset.get(slug))
+        finally:
+            dataset.close()
+    merged = compact_dataset(output, sources, key=_seen_at)
+    for source in sources:
+        dataset_index_path(source).unlink(missing_ok=True)
+    return merged
+
+
+class LeaseKeeper:
+    """Background thread that heartbeats a worker's leases until stopped."""
+
+    def __init__(self, work_queue: WorkQueue, worker: str, lease_seconds: float) -> None:
+        self.work_queue = work_queue
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                self.work_queue.heartbeat(self.worker, self.lease_seconds)
+            except sqlite3.Error as exc:
+                print(f"[warn] Lease heartbeat failed: {exc}")
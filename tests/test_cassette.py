@@ -0,0 +1,81 @@
+import dataclasses
+import threading
+
+import server as standin
+
+import scrape_gamedistribution as sg
+
+SLUGS = ["bench-0", "bench-1", "bench-2"]
+
+
+def make_scraper(transport):
+    return sg.GameScraper(
+        timeout=5, rate_limit=0, retries=2, backoff_factor=0, transport=transport
+    )
+
+
+def scrape_all(scraper, targets, image_dir, previous=None):
+    try:
+        return [scraper.scrape(target, image_dir, previous)[0] for target in targets]
+    finally:
+        scraper.close()
+
+
+def without_fetched_at(record):
+    return {**dataclasses.asdict(record), "fetched_at": None}
+
+
+def test_replay_reproduces_the_recorded_run(tmp_path):
+    httpd = standin.StandInServer(("127.0.0.1", 0), standin.StandInConfig(catalog_size=10))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    targets = [f"{httpd.base_url}/games/{slug}/" for slug in SLUGS]
+    cassette = tmp_path / "run.cassette.gz"
+    try:
+        recording = sg.RecordingTransport(sg.ConnectionPool(timeout=5), sg.Cassette(cassette))
+        recorded = scrape_all(make_scraper(recording), targets, tmp_path / "img")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    requests = httpd.requests
+
+    replay = sg.ReplayTransport(cassette)
+    replayed = scrape_all(make_scraper(replay), targets, tmp_path / "img-replay")
+
+    assert httpd.requests == requests
+    assert replay.misses == 0
+    assert all(record.name and record.error is None for record in recorded)
+    assert [without_fetched_at(r) for r in replayed] == [without_fetched_at(r) for r in recorded]
+    assert sorted(p.name for p in (tmp_path / "img-replay").glob("*.*")) == sorted(
+        p.name for p in (tmp_path / "img").glob("*.*")
+    )
+
+
+def test_304_without_a_cached_copy_is_an_error(tmp_path):
+    url = "https://gamedistribution.com/games/alpha/"
+    cassette = sg.Cassette(tmp_path / "run.cassette.gz")
+    cassette.append({
+        "method": "GET",
+        "url": "https://gamedistribution.com/robots.txt",
+        "status": 200,
+        "headers": {"Content-Type": "text/plain"},
+        "text": "User-agent: *\nAllow: /\n",
+    })
+    cassette.append({"method": "GET", "url": url, "status": 304, "headers": {}, "text": ""})
+    cassette.close()
+    stored = {
+        "name": "Alpha",
+        "slug": "alpha",
+        "canonical_url": url,
+        "description": "A game.",
+        "og_image": None,
+        "play_url": "https://html5.gamedistribution.com/abc/",
+        "publisher": "Famobi",
+        "tags": ["puzzle"],
+        "fetched_at": "2025-10-01T10:00:00+00:00",
+    }
+
+    scraper = make_scraper(sg.ReplayTransport(tmp_path / "run.cassette.gz"))
+    (record,) = scrape_all(scraper, ["alpha"], tmp_path / "img", stored)
+
+    assert record.error and "304" in record.error
+    assert record.name is None
@@ -0,0 +1,130 @@
+import pytest
+
+import scrape_gamedistribution as sg
+from gamedistribution import catalog as catalog_module
+
+
+def game(slug, name, description="", publisher="Famobi", tags=()):
+    return {
+        "slug": slug,
+        "name": name,
+        "description": description,
+        "publisher": publisher,
+        "tags": list(tags),
+        "fetched_at": "2025-10-01T10:00:00+00:00",
+    }
+
+
+GAMES = [
+    game("block-drop", "Block Drop", "Stack falling blocks.", tags=["Puzzle", "Arcade"]),
+    game("car-rush", "Car Rush", "Race through traffic.", "Gamezop", ["Racing"]),
+    game("jewel-swap", "Jewel Swap", "Match three puzzle gems.", tags=["puzzle"]),
+]
+
+
+def filled(path, **kwargs):
+    catalog = sg.CatalogDB(path, **kwargs)
+    catalog.upsert_many(GAMES)
+    return catalog
+
+
+def slugs(records):
+    return [record["slug"] for record in records]
+
+
+def test_tag_and_publisher_queries_ignore_case(tmp_path):
+    catalog = filled(tmp_path / "catalog.sqlite")
+    try:
+        assert slugs(catalog.query(tags=["PUZZLE"])) == ["block-drop", "jewel-swap"]
+        assert slugs(catalog.query(tags=["puzzle", "arcade"])) == ["block-drop"]
+        assert slugs(catalog.query(publisher="gamezop")) == ["car-rush"]
+        assert slugs(catalog.query(publisher="famobi", tags=["racing"])) == []
+        assert slugs(catalog.query(limit=1, offset=1)) == ["car-rush"]
+    finally:
+        catalog.close()
+
+
+def test_retagging_a_record_replaces_its_tags(tmp_path):
+    catalog = filled(tmp_path / "catalog.sqlite")
+    try:
+        catalog.upsert_many([{**GAMES[0], "tags": ["Racing"]}])
+        assert slugs(catalog.query(tags=["puzzle"])) == ["jewel-swap"]
+        assert slugs(catalog.query(tags=["racing"])) == ["block-drop", "car-rush"]
+    finally:
+        catalog.close()
+
+
+def test_text_search_ranks_name_matches_first(tmp_path):
+    catalog = filled(tmp_path / "catalog.sqlite")
+    try:
+        if not catalog.fts:
+            pytest.skip("SQLite was built without FTS5")
+        catalog.upsert_many([game("puzzle-box", "Puzzle Box", "Open the box.")])
+        assert slugs(catalog.query("puzzle")) == ["puzzle-box", "jewel-swap"]
+        assert slugs(catalog.query("blocks")) == ["block-drop"]
+        assert slugs(catalog.query("swap gems")) == ["jewel-swap"]
+        assert slugs(catalog.query("puzzle", tags=["puzzle"])) == ["jewel-swap"]
+        # Quotes in the input are escaped rather than parsed as FTS syntax.
+        assert slugs(catalog.query('"race')) == ["car-rush"]
+    finally:
+        catalog.close()
+
+
+def test_search_tracks_updates_and_deletes(tmp_path):
+    catalog = filled(tmp_path / "catalog.sqlite")
+    try:
+        catalog.replace_all({
+            "car-rush": {**GAMES[1], "name": "Truck Rush"},
+            "jewel-swap": GAMES[2],
+        })
+        assert slugs(catalog.query("car")) == []
+        assert slugs(catalog.query("truck")) == ["car-rush"]
+        assert slugs(catalog.query("stack")) == []
+        assert catalog.count() == 2
+    finally:
+        catalog.close()
+
+
+def test_like_fallback_without_fts5(tmp_path, monkeypatch):
+    monkeypatch.setattr(sg.CatalogDB, "_create_fts", lambda self, conn: False)
+    catalog = filled(tmp_path / "catalog.sqlite")
+    try:
+        assert not catalog.fts
+        assert slugs(catalog.query("PUZZLE")) == ["jewel-swap"]
+        assert slugs(catalog.query("rush traffic")) == ["car-rush"]
+        assert slugs(catalog.query("block", tags=["arcade"])) == ["block-drop"]
+        assert slugs(catalog.query("rush stack")) == []
+    finally:
+        catalog.close()
+
+
+def test_append_batches_until_full_or_due(tmp_path, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(catalog_module.time, "monotonic", lambda: clock[0])
+    catalog = sg.CatalogDB(tmp_path / "catalog.sqlite", batch_size=2, flush_interval=10.0)
+    try:
+        catalog.append(GAMES[0])
+        assert catalog.count() == 0
+        catalog.append(GAMES[1])
+        assert catalog.count() == 2
+
+        catalog.append(GAMES[2])
+        assert catalog.count() == 2
+        clock[0] += 10.0
+        catalog.append({"name": "no slug"})
+        assert catalog.count() == 2
+        catalog.append({**GAMES[2], "name": "Jewel Swap 2"})
+        assert catalog.count() == 3
+        assert catalog.get("jewel-swap")["name"] == "Jewel Swap 2"
+        assert catalog.flush() == 0
+    finally:
+        catalog.close()
+
+
+def test_close_flushes_pending_records(tmp_path):
+    path = tmp_path / "catalog.sqlite"
+    catalog = sg.CatalogDB(path, batch_size=100, flush_interval=3600.0)
+    catalog.append(GAMES[0])
+    catalog.close()
+
+    assert list(sg.load_catalog(path)) == ["block-drop"]
@@ -0,0 +1,76 @@
+import json
+
+import scrape_gamedistribution as sg
+
+
+def record(slug, **fields):
+    entry = {
+        "slug": slug,
+        "name": slug.title(),
+        "tags": ["Puzzle"],
+        "publisher": "Famobi",
+        "fetched_at": "2025-10-01T10:00:00+00:00",
+        "last_seen": "2025-10-01T10:00:00+00:00",
+    }
+    entry.update(fields)
+    return entry
+
+
+def make_service(*entries):
+    index = sg.CatalogIndex()
+    index.apply(entries)
+    return index, sg.CatalogService(index, sg.ResponseCache())
+
+
+def test_bookkeeping_update_refreshes_cached_bodies():
+    index, service = make_service(record("alpha"))
+    status, body, etag = service.respond("/games/alpha")
+    assert status == 200
+    _, listing, listing_etag = service.respond("/games")
+
+    assert index.apply([record("alpha", last_seen="2025-10-02T10:00:00+00:00")]) == 1
+    status, fresh, fresh_etag = service.respond("/games/alpha")
+    assert json.loads(fresh)["last_seen"] == "2025-10-02T10:00:00+00:00"
+    assert fresh_etag != etag
+    _, fresh_listing, _ = service.respond("/games")
+    assert json.loads(fresh_listing)["games"][0]["last_seen"] == "2025-10-02T10:00:00+00:00"
+    # Still indexed under its tag without a reindex.
+    assert json.loads(service.respond("/tags/puzzle")[1])["total"] == 1
+
+
+def test_unchanged_record_keeps_cache():
+    index, service = make_service(record("alpha"))
+    generation = index.generation
+    assert index.apply([record("alpha")]) == 0
+    assert index.generation == generation
+
+
+def test_status_is_never_cached():
+    _, service = make_service(record("alpha"))
+    service.respond("/games/alpha")
+    service.respond("/games/alpha")
+    first = json.loads(service.respond("/status")[1])
+    second = json.loads(service.respond("/status")[1])
+    assert first["cache"]["hits"] == 1
+    assert second["cache"] == first["cache"]
+    assert len(service.cache) == 1
+
+
+def test_watcher_folds_last_seen_touches(tmp_path):
+    path = tmp_path / "games.jsonl"
+    sg.save_dataset(path, {"alpha": record("alpha")})
+    index = sg.CatalogIndex()
+    watcher = sg.DatasetWatcher(path, index)
+    watcher.poll()
+
+    log = sg.DatasetLog(path)
+    log.append(record("bravo"))
+    log.append({"slug": "alpha", "last_seen": "2025-10-02T10:00:00+00:00"})
+    log.append({"slug": "bravo", "last_seen": "2025-10-03T10:00:00+00:00"})
+    log.sync()
+    try:
+        watcher.poll()
+    finally:
+        log.close(compact=False)
+    assert index.get("alpha") == record("alpha", last_seen="2025-10-02T10:00:00+00:00")
+    assert index.get("bravo") == record("bravo", last_seen="2025-10-03T10:00:00+00:00")
@@ -0,0 +1,133 @@
+import gzip
+import http.server
+import threading
+import zlib
+from urllib import error
+
+import pytest
+
+import scrape_gamedistribution as sg
+from gamedistribution import core
+
+BODY = b"<html><body>" + b"pooled " * 2000 + b"</body></html>"
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+ENCODED = {
+    "/gzip": ("gzip", gzip.compress(BODY)),
+    "/deflate": ("deflate", zlib.compress(BODY)),
+    "/raw-deflate": ("deflate", raw_deflate(BODY)),
+}
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/loop":
+            self.reply(302, b"moved", Location="/loop")
+        elif self.path == "/redirect":
+            self.reply(301, b"moved", Location="/gzip?from=redirect")
+        elif self.path == "/missing":
+            self.reply(404, b"not here")
+        elif self.path.split("?")[0] in ENCODED:
+            encoding, body = ENCODED[self.path.split("?")[0]]
+            self.reply(200, body, **{"Content-Encoding": encoding})
+        else:
+            self.reply(200, BODY)
+
+    def reply(self, status, body, **headers):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def verify_request(self, request, client_address):
+        self.connections += 1
+        return True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping a half-read response reset the socket; that is the point.
+        pass
+
+
+@pytest.fixture
+def httpd():
+    httpd = CountingServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = sg.ConnectionPool(timeout=5)
+    yield pool
+    pool.close()
+
+
+def test_requests_to_one_origin_share_a_connection(httpd, pool):
+    for path in ["/plain", "/gzip", "/plain"]:
+        assert pool.open(f"{httpd.base_url}{path}", {}).read() == BODY
+    assert httpd.connections == 1
+
+
+def test_response_closed_early_is_not_reused(httpd, pool):
+    resp = pool.open(f"{httpd.base_url}/plain", {})
+    resp.read(100)
+    resp.close()
+    assert pool.open(f"{httpd.base_url}/plain", {}).read() == BODY
+    assert httpd.connections == 2
+
+
+@pytest.mark.parametrize("path", sorted(ENCODED))
+def test_bodies_are_decoded_as_they_are_read(httpd, pool, path):
+    resp = pool.open(f"{httpd.base_url}{path}", {})
+    chunks = iter(lambda: resp.read(512), b"")
+    assert b"".join(chunks) == BODY
+    assert resp.wire_bytes == len(ENCODED[path][1])
+
+
+def test_redirects_are_followed_on_the_same_connection(httpd, pool):
+    resp = pool.open(f"{httpd.base_url}/redirect", {})
+    assert resp.status == 200
+    assert resp.url == f"{httpd.base_url}/gzip?from=redirect"
+    assert resp.read() == BODY
+    assert httpd.connections == 1
+
+
+def test_redirect_loops_give_up(httpd, pool):
+    with pytest.raises(error.URLError, match="too many redirects"):
+        pool.open(f"{httpd.base_url}/loop", {}, max_redirects=3)
+
+
+def test_error_statuses_raise_http_error(httpd, pool):
+    with pytest.raises(error.HTTPError) as excinfo:
+        pool.open(f"{httpd.base_url}/missing", {})
+    assert excinfo.value.code == 404
+    assert excinfo.value.read() == b"not here"
+
+
+@pytest.mark.parametrize("encoded", [zlib.compress(BODY), raw_deflate(BODY)])
+def test_deflate_decoder_detects_the_wrapper_across_chunks(encoded):
+    decoder = core._DeflateDecoder()
+    # A one-byte first chunk is too short to tell zlib from raw deflate.
+    out = decoder.decompress(encoded[:1])
+    out += b"".join(decoder.decompress(encoded[i:i + 7]) for i in range(1, len(encoded), 7))
+    assert out + decoder.flush() == BODY
@@ -0,0 +1,68 @@
+import types
+
+import scrape_gamedistribution as sg
+
+
+class FakeScraper:
+    request_count = 0
+
+    def __init__(self):
+        self.images = types.SimpleNamespace(flush=lambda: None)
+
+    def scrape(self, target, image_dir, previous):
+        slug = sg.determine_slug(target)
+        record = sg.GameRecord(
+            name=slug.title(),
+            slug=slug,
+            canonical_url=f"https://gamedistribution.com/games/{slug}/",
+            description=None,
+            og_image=None,
+            play_url=None,
+            publisher=None,
+            tags=None,
+            fetched_at="2025-10-01T10:00:00+00:00",
+        )
+        return record, None
+
+
+def make_daemon(path):
+    sg.save_dataset(path, {"old": {"slug": "old", "name": "Old"}})
+    return sg.ScrapeDaemon(
+        FakeScraper(),
+        sg.open_dataset(path),
+        sg.DatasetLog(path),
+        path.parent / "img",
+        refresh_state=sg.RefreshState.for_dataset(path),
+        changes=sg.ChangeFeed.for_dataset(path),
+        workers=2,
+        checkpoint_interval=0,
+    )
+
+
+def test_checkpoint_moves_records_out_of_the_overlay(tmp_path):
+    path = tmp_path / "games.jsonl"
+    daemon = make_daemon(path)
+    daemon.start()
+    try:
+        job = daemon.submit(["alpha", "bravo"])
+        assert sorted(result["slug"] for result in job.results()) == ["alpha", "bravo"]
+        assert daemon.dataset.meta("alpha").offset < 0
+
+        daemon.checkpoint()
+        # Only the fresh, empty active segment is left.
+        assert [segment.stat().st_size for segment in sg.wal_segments(path)] == [0]
+        for slug in ("old", "alpha", "bravo"):
+            assert daemon.dataset.meta(slug).offset >= 0
+        assert daemon.dataset["alpha"]["name"] == "Alpha"
+
+        # Records scraped after the checkpoint are still visible.
+        job = daemon.submit(["charlie"])
+        list(job.results())
+        assert daemon.dataset["charlie"]["name"] == "Charlie"
+        assert len(daemon.dataset) == 4
+    finally:
+        daemon.close()
+        daemon.dataset.close()
+        daemon.log.close()
+        daemon.changes.close()
+    assert sorted(sg.load_dataset(path).keys()) == ["alpha", "bravo", "charlie", "old"]
@@ -0,0 +1,90 @@
+import json
+
+import scrape_gamedistribution as sg
+from gamedistribution import core
+
+
+def write_lines(path, records, mode="w"):
+    with path.open(mode, encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record) + "\n")
+
+
+def record(slug, name=None):
+    return {"slug": slug, "name": name or slug.title(), "fetched_at": "2024-01-01T00:00:00+00:00"}
+
+
+def test_appended_lines_are_indexed_incrementally(tmp_path):
+    path = tmp_path / "games.jsonl"
+    write_lines(path, [record("a"), record("b")])
+    sg.build_dataset_index(path)
+    write_lines(path, [record("c")], mode="a")
+    sg.build_dataset_index(path)
+    index = sg.DatasetIndex(sg.dataset_index_path(path))
+    try:
+        assert sorted(entry.slug for entry in index) == ["a", "b", "c"]
+        assert index.indexed_end == path.stat().st_size
+    finally:
+        index.close()
+
+
+def test_partial_trailing_line_is_indexed_once_complete(tmp_path):
+    path = tmp_path / "games.jsonl"
+    write_lines(path, [record("a")])
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"slug": "b", "na')
+    sg.build_dataset_index(path)
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('me": "B"}\n')
+    sg.build_dataset_index(path)
+    view = sg.open_dataset(path)
+    try:
+        assert view["b"]["name"] == "B"
+    finally:
+        view.close()
+
+
+def test_in_place_rewrite_forces_a_full_rebuild(tmp_path):
+    path = tmp_path / "games.jsonl"
+    write_lines(path, [record("alpha", "A long first name"), record("beta")])
+    sg.build_dataset_index(path)
+    inode = path.stat().st_ino
+    # Same inode, shorter first record, one extra line: at least as large
+    # as before, but every old offset is now wrong.
+    with path.open("r+", encoding="utf-8") as fh:
+        fh.truncate(0)
+        for item in (record("alpha", "A"), record("beta"), record("gamma", "G" * 40)):
+            fh.write(json.dumps(item) + "\n")
+    assert path.stat().st_ino == inode
+    sg.build_dataset_index(path)
+    view = sg.open_dataset(path)
+    try:
+        assert view["alpha"]["name"] == "A"
+        assert view["beta"]["slug"] == "beta"
+        assert view["gamma"]["name"] == "G" * 40
+    finally:
+        view.close()
+
+
+def test_view_recovers_from_a_stale_index(tmp_path):
+    path = tmp_path / "games.jsonl"
+    write_lines(path, [record("alpha", "A long first name"), record("beta")])
+    sg.build_dataset_index(path)
+    index_path = sg.dataset_index_path(path)
+    stale = index_path.read_bytes()
+    with path.open("r+", encoding="utf-8") as fh:
+        fh.truncate(0)
+        for item in (record("alpha", "A"), record("beta"), record("gamma")):
+            fh.write(json.dumps(item) + "\n")
+    # Make the stale index look current, as a racing writer could.
+    index_path.write_bytes(stale)
+    size, mtime_ns, inode = core._snapshot_identity(path)
+    header = list(core._INDEX_HEADER.unpack_from(stale, 0))
+    header[1:4] = [size, mtime_ns, inode]
+    index_path.write_bytes(core._INDEX_HEADER.pack(*header) + stale[core._INDEX_HEADER.size:])
+    view = sg.open_dataset(path)
+    try:
+        assert view["beta"]["slug"] == "beta"
+        assert view["gamma"]["slug"] == "gamma"
+    finally:
+        view.close()
@@ -0,0 +1,124 @@
+import json
+
+import scrape_gamedistribution as sg
+
+
+def write_lines(path, entries):
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+
+
+def snapshot_slugs(path):
+    return [json.loads(line)["slug"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_torn_wal_tail_is_skipped_on_load_and_compaction(tmp_path):
+    path = tmp_path / "games.jsonl"
+    log = sg.DatasetLog(path)
+    log.append({"slug": "alpha", "name": "Alpha"})
+    log.append({"slug": "beta", "name": "Beta"})
+    log.close(compact=False)
+    (segment,) = sg.wal_segments(path)
+    with segment.open("a", encoding="utf-8") as fh:
+        fh.write('{"slug": "gamma", "na')
+
+    records = sg.load_dataset(path)
+    assert sorted(records.keys()) == ["alpha", "beta"]
+
+    assert sg.compact_dataset(path) == 2
+    assert sg.wal_segments(path) == []
+    assert snapshot_slugs(path) == ["alpha", "beta"]
+
+
+def test_wal_replays_on_top_of_snapshot(tmp_path):
+    path = tmp_path / "games.jsonl"
+    sg.save_dataset(path, {
+        "alpha": {"slug": "alpha", "name": "Old"},
+        "delta": {"slug": "delta", "name": "Delta"},
+    })
+    log = sg.DatasetLog(path)
+    log.append({"slug": "alpha", "name": "New"})
+    log.append({"slug": "charlie", "name": "Charlie"})
+    log.append({"slug": "zulu", "name": "Zulu"})
+    log.close(compact=False)
+
+    assert sg.load_dataset(path)["alpha"]["name"] == "New"
+
+    assert sg.compact_dataset(path) == 3
+    assert snapshot_slugs(path) == ["alpha", "charlie", "delta", "zulu"]
+    records = sg.load_dataset(path)
+    assert records["alpha"]["name"] == "New"
+    assert sg.open_dataset(path)["zulu"]["name"] == "Zulu"
+
+
+def test_unsorted_snapshot_falls_back_to_full_rewrite(tmp_path):
+    path = tmp_path / "games.jsonl"
+    write_lines(path, [
+        {"slug": "mike", "name": "Mike"},
+        {"slug": "bravo", "name": "Old"},
+    ])
+    log = sg.DatasetLog(path)
+    log.append({"slug": "bravo", "name": "New"})
+    log.close(compact=False)
+
+    sg.compact_dataset(path)
+    assert snapshot_slugs(path) == ["bravo", "mike"]
+    assert sg.load_dataset(path)["bravo"]["name"] == "New"
+
+
+def test_wal_wins_over_duplicate_snapshot_lines(tmp_path):
+    path = tmp_path / "games.jsonl"
+    write_lines(path, [
+        {"slug": "alpha", "name": "First"},
+        {"slug": "alpha", "name": "Second"},
+        {"slug": "bravo", "name": "One"},
+        {"slug": "bravo", "name": "Two"},
+    ])
+    log = sg.DatasetLog(path)
+    log.append({"slug": "alpha", "name": "Logged"})
+    log.close(compact=False)
+
+    sg.compact_dataset(path)
+    assert snapshot_slugs(path) == ["alpha", "bravo"]
+    records = sg.load_dataset(path)
+    assert records["alpha"]["name"] == "Logged"
+    assert records["bravo"]["name"] == "Two"
+
+
+def test_last_seen_touch_folds_into_the_stored_record(tmp_path):
+    path = tmp_path / "games.jsonl"
+    stored = {
+        "slug": "alpha",
+        "name": "Alpha",
+        "fetched_at": "2025-10-01",
+        "last_seen": "2025-10-01",
+    }
+    sg.save_dataset(path, {"alpha": stored})
+    entry, event = sg.reconcile_record({**stored, "fetched_at": "2025-10-05"}, stored)
+    assert event is None
+    touch = sg.log_entry(entry, stored)
+    assert touch == {"slug": "alpha", "last_seen": "2025-10-05"}
+
+    log = sg.DatasetLog(path)
+    log.append(touch)
+    log.append({"slug": "orphan", "last_seen": "2025-10-05"})
+    log.close(compact=False)
+
+    expected = {**stored, "last_seen": "2025-10-05"}
+    assert sg.load_dataset(path) == {"alpha": expected}
+    view = sg.open_dataset(path)
+    try:
+        assert view["alpha"] == expected
+        assert "orphan" not in view
+    finally:
+        view.close()
+    sg.compact_dataset(path)
+    assert snapshot_slugs(path) == ["alpha"]
+    assert sg.load_dataset(path)["alpha"] == expected
+
+
+def test_changed_records_are_logged_in_full(tmp_path):
+    stored = {"slug": "alpha", "name": "Alpha", "last_seen": "2025-10-01"}
+    entry, event = sg.reconcile_record({"slug": "alpha", "name": "Beta"}, stored)
+    assert event["change"] == "changed"
+    assert sg.log_entry(entry, stored) is entry
+    assert sg.log_entry(entry, None) is entry
@@ -0,0 +1,57 @@
+import gzip
+import threading
+
+import scrape_gamedistribution as sg
+
+
+class FakeScraper:
+    """Serves sitemap bodies from a dict instead of the network."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def _request_raw(self, url, *, reader):
+        body = self.bodies[url]
+
+        class Response:
+            def __init__(self, data):
+                self.data = data
+
+            def read(self, amt=None):
+                data, self.data = self.data, b""
+                return data
+
+        reader(Response(body))
+
+    def _ensure_allowed(self, url):
+        return None
+
+
+def urlset(slugs):
+    entries = "".join(f"<url><loc>https://gd.test/games/{slug}/</loc></url>" for slug in slugs)
+    body = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+    return gzip.compress(body.encode("utf-8"))
+
+
+def test_discovery_yields_unseen_games(tmp_path):
+    scraper = FakeScraper({"https://gd.test/sitemap.xml": urlset(["a", "b", "c"])})
+    discovery = sg.SitemapDiscovery(
+        scraper, ["https://gd.test/sitemap.xml"], seen_slugs={"b"}, spool_dir=tmp_path
+    )
+    assert [sg.determine_slug(url) for url in discovery] == ["a", "c"]
+    assert discovery.stats["games"] == 2
+
+
+def test_walker_stops_when_the_consumer_does(tmp_path):
+    slugs = [f"game-{number}" for number in range(500)]
+    scraper = FakeScraper({"https://gd.test/sitemap.xml": urlset(slugs)})
+    discovery = sg.SitemapDiscovery(
+        scraper, ["https://gd.test/sitemap.xml"], buffer=2, spool_dir=tmp_path
+    )
+    iterator = iter(discovery)
+    assert next(iterator).endswith("/game-0/")
+    iterator.close()
+    assert discovery._thread is not None
+    discovery._thread.join(timeout=5)
+    assert not discovery._thread.is_alive()
+    assert not any(thread.name == "sitemap-discovery" for thread in threading.enumerate())
@@ -0,0 +1,92 @@
+import string
+from pathlib import Path
+
+import pytest
+
+import scrape_gamedistribution as sg
+import server
+
+PAGES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "pages"
+BASE = "https://gamedistribution.com"
+SLUG = "hawaii-match-5"
+
+
+def render(template, **overrides):
+    values, _ = server.game_values(SLUG, BASE)
+    values.update(
+        keywords="puzzle, bubble, html5", tag_items="", related="", comments="", footer=""
+    )
+    values.update(overrides)
+    text = string.Template((PAGES / template).read_text(encoding="utf-8")).substitute(values)
+    return values, text
+
+
+def extract(text, url=f"{BASE}/games/{SLUG}/"):
+    parser = sg.GamePageParser()
+    sg.feed_until_complete(parser, text)
+    return sg.build_record(parser, url, SLUG, "2025-10-01T10:00:00+00:00").to_dict()
+
+
+def test_videogame_jsonld_wins_and_tags_are_collected():
+    values, text = render("videogame.html")
+    record = extract(text)
+    assert record["name"] == "Hawaii Match 5"
+    assert record["canonical_url"] == values["page_url"]
+    assert record["description"] == values["description"]
+    assert record["og_image"] == values["cover_url"]
+    assert record["play_url"] == (
+        f"https://html5.gamedistribution.com/{values['game_id']}/"
+        f"?gd_sdk_referrer_url={values['page_url']}"
+    )
+    assert record["publisher"] == values["publisher"]
+    # JSON-LD keywords, genre and category, then meta keywords, deduplicated.
+    assert record["tags"] == ["puzzle", "bubble", "html5", values["genre"], "Game"]
+
+
+def test_graph_page_reads_the_game_node_and_lazy_frame():
+    values, text = render("graph.html")
+    record = extract(text)
+    assert record["name"] == "Hawaii Match 5"
+    # "abstract" stands in for a missing JSON-LD description.
+    assert record["description"] == values["description"]
+    # The first entry of an image list.
+    assert record["og_image"] == values["cover_url"]
+    assert record["play_url"] == f"https://html5.gamedistribution.com/{values['game_id']}/"
+    assert record["publisher"] == values["publisher"]
+    assert record["tags"] == [values["genre"], "html5"]
+
+
+def test_meta_only_page_falls_back_to_meta_tags_and_title():
+    values, text = render("metaonly.html")
+    record = extract(text)
+    # The " - GameDistribution.com" suffix is stripped from the title.
+    assert record["name"] == "Hawaii Match 5"
+    assert record["description"] == values["description"]
+    assert record["og_image"] == values["cover_url"]
+    # A relative iframe src resolves against the canonical URL.
+    assert record["play_url"] == f"{BASE}/embed/{SLUG}/"
+    assert record["publisher"] is None
+    assert record["tags"] == ["puzzle", "bubble", "html5"]
+
+
+def test_unresolved_fields_are_none():
+    _, text = render("metaonly.html", description="", keywords="", cover_url="")
+    record = extract(text)
+    assert record["description"] is None
+    assert record["og_image"] is None
+    assert record["tags"] is None
+
+
+@pytest.mark.parametrize("slug", ["bench-0", "bench-1", "bench-2", "bench-7", "some_game-3"])
+def test_stand_in_pages_resolve_every_field(slug):
+    base = "http://127.0.0.1:8000"
+    values, _ = server.game_values(slug, base)
+    text = server.render_page(slug, base).decode("utf-8")
+    parser = sg.GamePageParser()
+    sg.feed_until_complete(parser, text)
+    record = sg.build_record(parser, values["page_url"], slug, "t").to_dict()
+    assert record["name"] == values["name"]
+    assert record["description"] == values["description"]
+    assert record["og_image"] == values["cover_url"]
+    assert record["play_url"]
+    assert record["tags"]
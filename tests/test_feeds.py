@@ -0,0 +1,49 @@
+import json
+
+import scrape_gamedistribution as sg
+
+
+def test_target_slugs_skips_malformed_targets():
+    targets = ["alpha", "https://gamedistribution.com/games/", "https://x.test/games/beta/"]
+    assert sg.target_slugs(targets) == {"alpha", "beta"}
+
+
+def test_feed_record_maps_gamedistribution_entries():
+    entry = {
+        "Title": "Bubble Farm",
+        "Slug": "bubble-farm",
+        "Description": "Pop bubbles.",
+        "Url": "https://html5.gamedistribution.com/abc/",
+        "Asset": ["https://img.gamedistribution.com/abc-512x384.jpg"],
+        "Company": "Famobi",
+        "Category": ["Puzzle"],
+        "Tag": ["html5", "puzzle"],
+    }
+    record = sg.feed_record(entry, "https://catalog.test/feed?page=1", "2024-01-01T00:00:00+00:00")
+    assert record is not None
+    assert record.slug == "bubble-farm"
+    assert record.canonical_url == "https://gamedistribution.com/games/bubble-farm/"
+    assert record.play_url == "https://html5.gamedistribution.com/abc/"
+    assert record.og_image == "https://img.gamedistribution.com/abc-512x384.jpg"
+    assert record.publisher == "Famobi"
+    assert record.tags == ["Puzzle", "html5"]
+
+
+def test_feed_record_without_play_url_uses_the_page_link():
+    entry = {"title": "Alpha 1", "link": "https://x.test/games/alpha-1/"}
+    record = sg.feed_record(entry, "https://x.test/feed", "2024-01-01T00:00:00+00:00")
+    assert record is not None
+    assert record.slug == "alpha-1"
+    assert record.play_url is None
+    assert record.canonical_url == "https://x.test/games/alpha-1/"
+
+
+def test_feed_entries_finds_the_list():
+    assert sg.feed_entries({"Items": [{"a": 1}, "junk"]}) == [{"a": 1}]
+    assert sg.feed_entries([{"b": 2}]) == [{"b": 2}]
+    assert sg.feed_entries(json.loads('"nope"')) == []
+
+
+def test_feed_page_url():
+    assert sg.feed_page_url("https://x.test/f/{page}.json", 3) == "https://x.test/f/3.json"
+    assert sg.feed_page_url("https://x.test/f?amount=5&page=1", 2) == "https://x.test/f?amount=5&page=2"
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+import server as standin
+
+import scrape_gamedistribution as sg
+
+
+class SpyTransport:
+    """Connection pool that remembers each request's headers and status."""
+
+    def __init__(self):
+        self.pool = sg.ConnectionPool(timeout=5)
+        self.exchanges = []
+
+    def open(self, url, headers, **kwargs):
+        resp = self.pool.open(url, headers, **kwargs)
+        self.exchanges.append((url, dict(headers), resp.status))
+        return resp
+
+    def close(self):
+        self.pool.close()
+
+    def pages(self):
+        return [exchange for exchange in self.exchanges if "/games/" in exchange[0]]
+
+
+@pytest.fixture
+def httpd():
+    httpd = standin.StandInServer(("127.0.0.1", 0), standin.StandInConfig(catalog_size=10))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def scrape_twice(httpd, tmp_path, second_previous):
+    cache = sg.HttpCache(tmp_path / "cache")
+    target = f"{httpd.base_url}/games/bench-0/"
+    first_spy, second_spy = SpyTransport(), SpyTransport()
+    first = sg.GameScraper(
+        timeout=5, rate_limit=0, retries=1, backoff_factor=0, transport=first_spy, cache=cache
+    )
+    try:
+        record, _ = first.scrape(target, tmp_path / "img", None)
+    finally:
+        first.close()
+    second = sg.GameScraper(
+        timeout=5, rate_limit=0, retries=1, backoff_factor=0, transport=second_spy, cache=cache
+    )
+    try:
+        again, _ = second.scrape(target, tmp_path / "img", second_previous(record))
+    finally:
+        second.close()
+    return record, again, first_spy, second_spy
+
+
+def test_second_scrape_sends_validators_and_reuses_the_record(httpd, tmp_path):
+    record, again, first_spy, second_spy = scrape_twice(httpd, tmp_path, lambda r: r.to_dict())
+
+    ((_, headers, status),) = first_spy.pages()
+    assert status == 200
+    assert "If-None-Match" not in headers
+    ((_, headers, status),) = second_spy.pages()
+    assert status == 304
+    assert headers["If-None-Match"].startswith('"')
+    assert "If-Modified-Since" in headers
+    assert again.error is None
+    assert {**again.to_dict(), "fetched_at": None} == {**record.to_dict(), "fetched_at": None}
+
+
+def test_304_without_a_stored_record_parses_the_cached_body(httpd, tmp_path):
+    record, again, _, second_spy = scrape_twice(httpd, tmp_path, lambda r: None)
+
+    ((_, _, status),) = second_spy.pages()
+    assert status == 304
+    assert again.name == record.name
+    assert again.play_url == record.play_url
+    assert again.tags == record.tags
+
+
+def test_cache_only_keeps_responses_with_validators(tmp_path):
+    cache = sg.HttpCache(tmp_path / "cache")
+    cache.store("https://example.com/a", {"Content-Type": "text/html"}, b"<html></html>")
+    assert cache.lookup("https://example.com/a") is None
+
+    cache.store("https://example.com/b", {"ETag": '"x"'}, b"<html>b</html>")
+    entry = cache.lookup("https://example.com/b")
+    assert entry.validators() == {"If-None-Match": '"x"'}
+    assert entry.read_body() == b"<html>b</html>"
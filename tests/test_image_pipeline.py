@@ -0,0 +1,129 @@
+import io
+import os
+import zlib
+
+import scrape_gamedistribution as sg
+from gamedistribution import core
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"cover" * 1000
+OTHER = b"\x89PNG\r\n\x1a\n" + b"other" * 1000
+
+
+class FakeFetch:
+    """Serves image bodies with ETags and answers matching validators with 304."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.calls = []
+
+    def __call__(self, url, *, cached=None, reader=None):
+        body = self.bodies[url]
+        etag = '"%08x"' % zlib.crc32(body)
+        validators = cached.validators() if cached is not None else {}
+        self.calls.append((url, validators))
+        headers = {"ETag": etag, "Content-Type": "image/png"}
+        if validators.get("If-None-Match") == etag:
+            return sg.FetchResult(url, 304, b"", headers, not_modified=True)
+        reader(io.BytesIO(body))
+        return sg.FetchResult(url, 200, b"", headers)
+
+
+def pipeline(fetch):
+    return sg.ImagePipeline(fetch, workers=0)
+
+
+def objects(image_dir):
+    return sorted(path.name for path in (image_dir / sg.IMAGE_OBJECTS_DIR).rglob("*.png"))
+
+
+def test_identical_covers_are_stored_once(tmp_path):
+    fetch = FakeFetch({"https://img/a.png": PNG, "https://img/b.png": PNG})
+    images = pipeline(fetch)
+    first = images.submit("https://img/a.png", tmp_path, "Game A")
+    second = images.submit("https://img/b.png", tmp_path, "Game B")
+    images.close()
+
+    assert (first.name, second.name) == ("Game_A.png", "Game_B.png")
+    assert first.read_bytes() == second.read_bytes() == PNG
+    assert os.path.samefile(first, second)
+    assert len(objects(tmp_path)) == 1
+    assert images.stats == {"written": 1, "deduplicated": 1, "unchanged": 0, "failed": 0}
+    assert not list((tmp_path / sg.IMAGE_OBJECTS_DIR / "tmp").iterdir())
+
+
+def test_known_cover_is_revalidated_and_skipped(tmp_path):
+    fetch = FakeFetch({"https://img/a.png": PNG})
+    images = pipeline(fetch)
+    images.submit("https://img/a.png", tmp_path, "Game A")
+    images.close()
+
+    # A fresh pipeline reads the manifest written on close.
+    images = pipeline(fetch)
+    assert images.has("https://img/a.png", tmp_path)
+    path = images.submit("https://img/a.png", tmp_path, "Game A")
+    images.close()
+
+    assert fetch.calls[0][1] == {}
+    assert fetch.calls[1][1]["If-None-Match"].startswith('"')
+    assert path.read_bytes() == PNG
+    assert images.stats["unchanged"] == 1
+
+
+def test_changed_cover_replaces_the_link(tmp_path):
+    fetch = FakeFetch({"https://img/a.png": PNG})
+    images = pipeline(fetch)
+    images.submit("https://img/a.png", tmp_path, "Game A")
+    fetch.bodies["https://img/a.png"] = OTHER
+    path = images.submit("https://img/a.png", tmp_path, "Game A")
+    images.close()
+
+    assert path.read_bytes() == OTHER
+    assert len(objects(tmp_path)) == 2
+    assert images.stats["written"] == 2
+
+
+def test_missing_object_is_downloaded_again(tmp_path):
+    fetch = FakeFetch({"https://img/a.png": PNG})
+    images = pipeline(fetch)
+    images.submit("https://img/a.png", tmp_path, "Game A")
+    for stored in (tmp_path / sg.IMAGE_OBJECTS_DIR).rglob("*.png"):
+        stored.unlink()
+
+    assert not images.has("https://img/a.png", tmp_path)
+    path = images.submit("https://img/a.png", tmp_path, "Game A")
+    images.close()
+
+    assert fetch.calls[1][1] == {}
+    assert path.read_bytes() == PNG
+    assert images.stats["written"] == 2
+
+
+def test_links_fall_back_to_copies(tmp_path, monkeypatch):
+    def no_links(source, target):
+        raise OSError("hard links not supported")
+
+    monkeypatch.setattr(core.os, "link", no_links)
+    fetch = FakeFetch({"https://img/a.png": PNG, "https://img/b.png": PNG})
+    images = pipeline(fetch)
+    first = images.submit("https://img/a.png", tmp_path, "Game A")
+    second = images.submit("https://img/b.png", tmp_path, "Game B")
+    images.close()
+
+    assert first.read_bytes() == second.read_bytes() == PNG
+    assert not os.path.samefile(first, second)
+    assert len(objects(tmp_path)) == 1
+    assert not list(tmp_path.glob(".*.link"))
+
+
+def test_failed_download_leaves_no_partial_file(tmp_path):
+    def broken(url, *, cached=None, reader=None):
+        reader(io.BytesIO(PNG))
+        raise OSError("connection reset")
+
+    images = pipeline(broken)
+    assert images.submit("https://img/a.png", tmp_path, "Game A") is None
+    images.close()
+
+    assert images.stats["failed"] == 1
+    assert not list(tmp_path.glob("*.png"))
+    assert not list((tmp_path / sg.IMAGE_OBJECTS_DIR / "tmp").iterdir())
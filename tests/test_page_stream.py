@@ -0,0 +1,76 @@
+import threading
+
+import server as standin
+
+import scrape_gamedistribution as sg
+
+# Slugs rendered with the graph and videogame templates, which both carry
+# everything the parser needs before the end of the page.
+SLUGS = ["bench-0", "bench-7", "bench-1"]
+
+
+class CountingServer(standin.StandInServer):
+    connections = 0
+
+    def verify_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        return True
+
+
+def start(**config):
+    httpd = CountingServer(("127.0.0.1", 0), standin.StandInConfig(catalog_size=10, **config))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def fetch_pages(httpd, pool, limit=sg.DEFAULT_DRAIN_BYTES):
+    streams = []
+    for slug in SLUGS:
+        resp = pool.open(f"{httpd.base_url}/games/{slug}/", {})
+        discard = resp.discard
+        resp.discard = lambda: discard(limit)
+        stream = sg.PageStream(chunk_size=4096)
+        stream(resp)
+        streams.append(stream)
+    return streams
+
+
+def test_early_exit_keeps_the_connection_for_a_short_remainder():
+    httpd = start()
+    pool = sg.ConnectionPool(timeout=5)
+    try:
+        streams = fetch_pages(httpd, pool)
+        assert all(stream.truncated for stream in streams)
+        assert all(stream.parser.complete for stream in streams)
+        assert httpd.connections == 1
+    finally:
+        pool.close()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_early_exit_drops_the_connection_for_a_long_remainder():
+    httpd = start()
+    pool = sg.ConnectionPool(timeout=5)
+    try:
+        streams = fetch_pages(httpd, pool, limit=0)
+        assert all(stream.truncated for stream in streams)
+        assert httpd.connections == 3
+    finally:
+        pool.close()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_early_exit_does_not_wait_for_a_trickling_remainder():
+    httpd = start(slow_rate=1.0, slow_bytes_per_sec=20_000)
+    pool = sg.ConnectionPool(timeout=5)
+    try:
+        streams = fetch_pages(httpd, pool)
+        assert all(stream.truncated for stream in streams)
+        assert httpd.connections == 3
+    finally:
+        pool.close()
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,62 @@
+import scrape_gamedistribution as sg
+
+
+def scraped(at, **fields):
+    entry = {
+        "name": "Bubble Farm",
+        "slug": "bubble-farm",
+        "canonical_url": "https://gamedistribution.com/games/bubble-farm/",
+        "description": "Pop bubbles.",
+        "og_image": None,
+        "play_url": "https://html5.gamedistribution.com/abc/",
+        "publisher": "Famobi",
+        "tags": ["puzzle"],
+        "fetched_at": at,
+        "error": None,
+        "last_seen": None,
+    }
+    entry.update(fields)
+    return entry
+
+
+def test_new_record_is_added():
+    stored, event = sg.reconcile_record(scraped("t1"), None)
+    assert event == {"slug": "bubble-farm", "change": "added", "at": "t1"}
+    assert stored["fetched_at"] == "t1"
+    assert stored["last_seen"] == "t1"
+
+
+def test_unchanged_content_keeps_fetched_at():
+    previous, _ = sg.reconcile_record(scraped("t1"), None)
+    stored, event = sg.reconcile_record(scraped("t2"), previous)
+    assert event is None
+    assert stored["fetched_at"] == "t1"
+    assert stored["last_seen"] == "t2"
+
+
+def test_changed_content_reports_fields():
+    previous, _ = sg.reconcile_record(scraped("t1"), None)
+    stored, event = sg.reconcile_record(scraped("t2", description="Pop more."), previous)
+    assert event["change"] == "changed"
+    assert event["fields"] == {"description": ["Pop bubbles.", "Pop more."]}
+    assert stored["fetched_at"] == "t2"
+    assert stored["last_seen"] == "t2"
+
+
+def test_errors_are_reported_once_and_recovery_is_not_an_addition():
+    previous, _ = sg.reconcile_record(scraped("t1"), None)
+    failed, event = sg.reconcile_record(scraped("t2", error="HTTP Error 503: Service Unavailable"), previous)
+    assert event["change"] == "error"
+    again, event = sg.reconcile_record(scraped("t3", error="HTTP Error 503: Service Unavailable"), failed)
+    assert event is None
+    stored, event = sg.reconcile_record(scraped("t4"), again)
+    assert event == {"slug": "bubble-farm", "change": "recovered", "at": "t4"}
+    assert stored["last_seen"] == "t4"
+
+
+def test_gone_page_is_removed_then_recovered():
+    previous, _ = sg.reconcile_record(scraped("t1"), None)
+    gone, event = sg.reconcile_record(scraped("t2", error="HTTP Error 404: Not Found"), previous)
+    assert event["change"] == "removed"
+    _, event = sg.reconcile_record(scraped("t3"), gone)
+    assert event["change"] == "recovered"
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+import scrape_gamedistribution as sg
+from gamedistribution import core
+
+FIXTURE = Path(__file__).parent / "fixtures" / "records.jsonl"
+
+
+def fixture_lines():
+    return FIXTURE.read_text(encoding="utf-8").splitlines()
+
+
+def test_records_round_trip():
+    lines = fixture_lines()
+    store = sg.RecordStore()
+    for line in lines:
+        entry = json.loads(line)
+        store[entry["slug"]] = entry
+    assert len(store) == len(lines)
+    for line in lines:
+        entry = json.loads(line)
+        assert store[entry["slug"]] == entry
+        # Key order survives too, so re-serialised lines are byte-identical.
+        assert store.json_line(entry["slug"]) == core._JSON_ENCODER.encode(entry)
+
+
+def test_missing_fields_stay_missing():
+    store = sg.RecordStore()
+    store["legacy"] = {"name": "Legacy", "slug": "legacy", "fetched_at": "t"}
+    assert store["legacy"] == {"name": "Legacy", "slug": "legacy", "fetched_at": "t"}
+    assert "last_seen" not in store["legacy"]
+
+
+def test_full_records_are_packed_and_share_strings():
+    store = sg.RecordStore()
+    for line in fixture_lines():
+        entry = json.loads(line)
+        store[entry["slug"]] = entry
+    packed = store._records
+    assert isinstance(packed["hawaii-match-5"], sg.CompactRecord)
+    assert isinstance(packed["legacy-game"], sg.CompactRecord)
+    assert packed["legacy-game"].partial
+    assert packed["extra-fields"].extra == {"rating": 4.5, "source": {"feed": "catalog"}}
+    # A non-string tag or timestamp keeps the record as given.
+    assert isinstance(packed["odd-types"], dict)
+    assert packed["hawaii-match-5"].publisher is packed["pao-pao-long"].publisher
+
+
+def test_returned_records_are_copies():
+    store = sg.RecordStore()
+    store["a"] = {"name": "A", "slug": "a", "tags": ["x"]}
+    store["a"]["tags"].append("y")
+    store["a"]["name"] = "changed"
+    assert store["a"] == {"name": "A", "slug": "a", "tags": ["x"]}
+
+
+def test_dataset_file_round_trips_through_the_store(tmp_path):
+    path = tmp_path / "games.jsonl"
+    records = sg.RecordStore()
+    for line in fixture_lines():
+        entry = json.loads(line)
+        records[entry["slug"]] = entry
+    sg.save_dataset(path, records)
+    expected = sorted(fixture_lines(), key=lambda line: json.loads(line)["slug"])
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        core._JSON_ENCODER.encode(json.loads(line)) for line in expected
+    ]
+    assert dict(sg.load_dataset(path)) == dict(records)
@@ -0,0 +1,151 @@
+import email.utils
+import json
+import threading
+import time
+
+import pytest
+import server as standin
+
+import scrape_gamedistribution as sg
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+
+class SpyTransport:
+    """Connection pool that remembers each request's headers and status."""
+
+    def __init__(self):
+        self.pool = sg.ConnectionPool(timeout=5)
+        self.exchanges = []
+
+    def open(self, url, headers, **kwargs):
+        resp = self.pool.open(url, headers, **kwargs)
+        self.exchanges.append((url, dict(headers), resp.status))
+        return resp
+
+    def close(self):
+        self.pool.close()
+
+    def robots(self):
+        return [exchange for exchange in self.exchanges if exchange[0].endswith("/robots.txt")]
+
+
+@pytest.fixture
+def httpd():
+    httpd = standin.StandInServer(("127.0.0.1", 0), standin.StandInConfig(catalog_size=10))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def load_rules(cache, base_url):
+    spy = SpyTransport()
+    scraper = sg.GameScraper(
+        timeout=5, rate_limit=0, retries=1, backoff_factor=0, transport=spy, robots_cache=cache
+    )
+    try:
+        rules = scraper._robots_for("http", base_url.split("://", 1)[1])
+    finally:
+        scraper.close()
+    return rules, spy.robots()
+
+
+def expire(cache, origin):
+    path = cache._path(origin)
+    entry = json.loads(path.read_text(encoding="utf-8"))
+    path.write_text(json.dumps({**entry, "expires_at": time.time() - 1}), encoding="utf-8")
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"Cache-Control": "public, max-age=7200"}, 2 * HOUR),
+        ({"cache-control": "max-age=60"}, HOUR),
+        ({"Cache-Control": "max-age=864000"}, DAY),
+        ({"Cache-Control": "no-cache, max-age=7200"}, HOUR),
+        ({"Cache-Control": "max-age=7200", "Expires": "garbage"}, 2 * HOUR),
+        ({"Expires": "garbage"}, DAY),
+        ({}, DAY),
+    ],
+)
+def test_ttl_comes_from_the_headers_and_is_clamped(tmp_path, headers, expected):
+    assert sg.RobotsCache(tmp_path).ttl(headers) == expected
+
+
+def test_ttl_from_expires(tmp_path):
+    cache = sg.RobotsCache(tmp_path)
+    expires = email.utils.formatdate(time.time() + 3 * HOUR, usegmt=True)
+    assert cache.ttl({"Expires": expires}) == pytest.approx(3 * HOUR, abs=5)
+    expired = email.utils.formatdate(time.time() - HOUR, usegmt=True)
+    assert cache.ttl({"Expires": expired}) == HOUR
+
+
+def test_fresh_entry_skips_the_request(httpd, tmp_path):
+    cache = sg.RobotsCache(tmp_path / "robots")
+    rules, fetched = load_rules(cache, httpd.base_url)
+    assert len(fetched) == 1
+    assert not rules.can_fetch(sg.USER_AGENT, "/private/x")
+
+    rules, fetched = load_rules(cache, httpd.base_url)
+    assert fetched == []
+    assert not rules.can_fetch(sg.USER_AGENT, "/private/x")
+    assert rules.can_fetch(sg.USER_AGENT, "/games/bench-0/")
+
+
+def test_expired_entry_is_revalidated(httpd, tmp_path):
+    cache = sg.RobotsCache(tmp_path / "robots")
+    load_rules(cache, httpd.base_url)
+    expire(cache, httpd.base_url)
+
+    rules, ((_, headers, status),) = load_rules(cache, httpd.base_url)
+    assert headers["If-None-Match"].startswith('"')
+    assert status == 304
+    assert not rules.can_fetch(sg.USER_AGENT, "/private/x")
+    entry = cache.load(httpd.base_url)
+    assert "Disallow: /private/" in entry["text"]
+    assert sg.RobotsCache.fresh(entry)
+
+
+def test_stale_entry_is_used_while_the_server_is_down(httpd, tmp_path):
+    cache = sg.RobotsCache(tmp_path / "robots")
+    load_rules(cache, httpd.base_url)
+    expire(cache, httpd.base_url)
+    httpd.shutdown()
+    httpd.server_close()
+
+    rules, _ = load_rules(cache, httpd.base_url)
+    assert not rules.can_fetch(sg.USER_AGENT, "/private/x")
+    assert not sg.RobotsCache.fresh(cache.load(httpd.base_url))
+
+
+def test_prefetch_loads_each_origin_once(httpd, tmp_path):
+    port = httpd.server_address[1]
+    urls = [
+        f"http://127.0.0.1:{port}/games/bench-0/",
+        f"http://127.0.0.1:{port}/games/bench-1/",
+        f"http://localhost:{port}/games/bench-2/",
+    ]
+    spy = SpyTransport()
+    scraper = sg.GameScraper(
+        timeout=5,
+        rate_limit=0,
+        retries=1,
+        backoff_factor=0,
+        transport=spy,
+        robots_cache=sg.RobotsCache(tmp_path / "robots"),
+    )
+    try:
+        assert scraper.prefetch_robots(urls) == 2
+        assert sorted(url for url, _, _ in spy.robots()) == [
+            f"http://127.0.0.1:{port}/robots.txt",
+            f"http://localhost:{port}/robots.txt",
+        ]
+        record, _ = scraper.scrape(urls[0], tmp_path / "img", None)
+        assert record.error is None
+        assert len(spy.robots()) == 2
+        # Bare slugs have no origin to prefetch.
+        assert scraper.prefetch_robots(["bench-3"]) == 0
+    finally:
+        scraper.close()
@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import server as standin
+
+import scrape_gamedistribution as sg
+
+
+def interrupted_journal(path, targets, done=(), failed=()):
+    journal = sg.RunJournal.for_dataset(path)
+    journal.start()
+    for target in targets:
+        journal.plan(sg.determine_slug(target), target)
+    for slug in done:
+        journal.finish(slug, ok=True)
+    for slug in failed:
+        journal.finish(slug, ok=False)
+    journal.close()
+
+
+def test_resume_returns_unfinished_targets_in_plan_order(tmp_path):
+    output = tmp_path / "games.jsonl"
+    interrupted_journal(output, ["a", "b", "c", "d"], done=["c"], failed=["a"])
+
+    journal = sg.RunJournal.for_dataset(output)
+    assert journal.resume() == ["a", "b", "d"]
+    # "a" keeps failing until it runs out of attempts.
+    journal.finish("a", ok=False)
+    journal.finish("a", ok=False)
+    journal.close()
+    assert sg.RunJournal.for_dataset(output).resume() == ["b", "d"]
+
+
+def test_completed_journal_resumes_nothing(tmp_path):
+    output = tmp_path / "games.jsonl"
+    journal = sg.RunJournal.for_dataset(output)
+    journal.start()
+    journal.plan("a", "a")
+    journal.complete()
+    journal.close()
+
+    resumed = sg.RunJournal.for_dataset(output)
+    assert resumed.resume() == []
+    assert resumed.completed
+
+
+def test_plan_targets_skips_duplicates_finished_and_fresh(tmp_path):
+    output = tmp_path / "games.jsonl"
+    now = datetime.now(timezone.utc)
+    fresh = now.isoformat()
+    stale = (now - timedelta(days=2)).isoformat()
+    sg.save_dataset(output, {
+        "fresh": {"slug": "fresh", "fetched_at": fresh, "last_seen": fresh},
+        "stale": {"slug": "stale", "fetched_at": stale, "last_seen": stale},
+        "broken": {"slug": "broken", "fetched_at": fresh, "error": "HTTP Error 500"},
+    })
+    interrupted_journal(output, ["done", "left"], done=["done"])
+    journal = sg.RunJournal.for_dataset(output)
+    journal.resume()
+    dataset = sg.open_dataset(output)
+    targets = ["fresh", "stale", "broken", "done", "left", "new", "stale"]
+    # A games URL without a slug cannot be planned.
+    targets.append("https://gamedistribution.com/games/")
+    stats = {}
+    try:
+        kept = list(sg.plan_targets(
+            targets,
+            journal,
+            dataset=dataset,
+            max_age=3600,
+            stats=stats,
+        ))
+    finally:
+        dataset.close()
+        journal.close()
+
+    assert kept == ["stale", "broken", "left", "new"]
+    assert stats == {"duplicate": 1, "finished": 1, "fresh": 1, "invalid": 1}
+    assert set(journal.planned) == {"done", "left", "stale", "broken", "new"}
+
+
+def test_resume_after_an_interrupted_run_scrapes_only_the_rest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    httpd = standin.StandInServer(("127.0.0.1", 0), standin.StandInConfig(catalog_size=10))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    targets = [f"{httpd.base_url}/games/bench-{number}/" for number in range(3)]
+    output = tmp_path / "games.jsonl"
+    argv = ["--output", str(output), "--rate-limit", "0", "--no-cache", "--resume"]
+    try:
+        interrupted_journal(output, targets, done=["bench-0"])
+        assert sg.main(argv) == 0
+        assert sorted(sg.load_dataset(output).keys()) == ["bench-1", "bench-2"]
+
+        # The resumed run completed, so resuming again fetches nothing.
+        requests = httpd.requests
+        assert sg.main(argv) == 0
+        assert httpd.requests == requests
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,53 @@
+import json
+
+import scrape_gamedistribution as sg
+
+
+def game(slug, name, **fields):
+    entry = {"slug": slug, "name": name, "tags": ["Puzzle"], "publisher": "Famobi"}
+    entry.update(fields)
+    return entry
+
+
+def test_colliding_slugs_get_distinct_pages(tmp_path):
+    records = {
+        "foo": game("foo", "Lower"),
+        "Foo": game("Foo", "Upper"),
+        "bar": game("bar", "Bar"),
+    }
+    sg.build_site(records, tmp_path, jobs=1)
+    dirs = sg.site_page_dirs(records)
+    assert dirs["foo"] == "foo"
+    assert dirs["bar"] == "bar"
+    assert dirs["Foo"].startswith("foo-") and dirs["Foo"] != "foo"
+
+    assert b"Lower" in (tmp_path / "games/foo/index.html").read_bytes()
+    assert b"Upper" in (tmp_path / sg.game_page_path(dirs["Foo"])).read_bytes()
+    listing = (tmp_path / "tags/puzzle/index.html").read_text(encoding="utf-8")
+    assert f'href="../../games/{dirs["Foo"]}/"' in listing
+    assert 'href="../../games/foo/"' in listing
+
+
+def test_page_moves_when_a_collision_appears_and_disappears(tmp_path):
+    sg.build_site({"Foo": game("Foo", "Upper")}, tmp_path, jobs=1)
+    assert b"Upper" in (tmp_path / "games/foo/index.html").read_bytes()
+
+    records = {"Foo": game("Foo", "Upper"), "foo": game("foo", "Lower")}
+    sg.build_site(records, tmp_path, jobs=1)
+    moved = sg.site_page_dirs(records)["Foo"]
+    assert b"Lower" in (tmp_path / "games/foo/index.html").read_bytes()
+    assert b"Upper" in (tmp_path / sg.game_page_path(moved)).read_bytes()
+
+    stats = sg.build_site({"foo": game("foo", "Lower")}, tmp_path, jobs=1)
+    assert stats["removed"] == 1
+    assert not (tmp_path / sg.game_page_path(moved)).exists()
+    assert b"Lower" in (tmp_path / "games/foo/index.html").read_bytes()
+    manifest = json.loads((tmp_path / sg.SITE_MANIFEST).read_text(encoding="utf-8"))
+    assert list(manifest["games"]) == ["foo"]
+
+
+def test_unchanged_rebuild_renders_nothing(tmp_path):
+    records = {"foo": game("foo", "Lower"), "Foo": game("Foo", "Upper")}
+    sg.build_site(records, tmp_path, jobs=1)
+    stats = sg.build_site(records, tmp_path, jobs=1)
+    assert stats == {"games": 0, "unchanged": 2, "removed": 0, "listings": 0}
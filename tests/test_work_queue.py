@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import server as standin
+
+import scrape_gamedistribution as sg
+
+BASE = "https://html5.gamedistribution.com/"
+
+
+def make_queue(tmp_path, **kwargs):
+    return sg.WorkQueue(tmp_path / "queue.db", **kwargs)
+
+
+def test_enqueue_counts_only_real_changes(tmp_path):
+    queue = make_queue(tmp_path)
+    try:
+        assert queue.enqueue([BASE + "a/", BASE + "b/"]) == 2
+        assert queue.enqueue([BASE + "a/", BASE + "b/"]) == 0
+        (slug, _), = queue.lease("w1", 1, 60)
+        queue.complete("w1", slug, ok=True)
+        # A finished target is queued again; the pending one is untouched.
+        assert queue.enqueue([BASE + "a/", BASE + "b/"]) == 1
+        assert queue.counts() == {"pending": 2}
+    finally:
+        queue.close()
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    queue = make_queue(tmp_path)
+    try:
+        queue.enqueue([BASE + "a/"])
+        assert queue.lease("w1", 10, 0.05) == [("a", BASE + "a/")]
+        assert queue.lease("w2", 10, 60) == []
+        time.sleep(0.1)
+        assert queue.lease("w2", 10, 60) == [("a", BASE + "a/")]
+        # The old owner can no longer complete it.
+        queue.complete("w1", "a", ok=True)
+        assert queue.counts() == {"leased": 1}
+        queue.complete("w2", "a", ok=True)
+        assert queue.counts() == {"done": 1}
+    finally:
+        queue.close()
+
+
+def test_heartbeat_keeps_lease(tmp_path):
+    queue = make_queue(tmp_path)
+    try:
+        queue.enqueue([BASE + "a/"])
+        queue.lease("w1", 10, 0.2)
+        with sg.LeaseKeeper(queue, "w1", 0.2):
+            time.sleep(0.4)
+            assert queue.lease("w2", 10, 60) == []
+        assert queue.counts() == {"leased": 1}
+    finally:
+        queue.close()
+
+
+def test_failed_targets_retry_until_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    try:
+        queue.enqueue([BASE + "a/"])
+        queue.lease("w1", 1, 60)
+        queue.complete("w1", "a", ok=False)
+        assert queue.counts() == {"pending": 1}
+        queue.lease("w1", 1, 60)
+        queue.complete("w1", "a", ok=False)
+        assert queue.counts() == {"failed": 1}
+    finally:
+        queue.close()
+
+
+def test_shared_limiter_spreads_adaptive_slowdown(tmp_path):
+    first = make_queue(tmp_path)
+    second = sg.WorkQueue(tmp_path / "queue.db")
+    try:
+        a = sg.SharedRateLimiter(first, 0.0, adaptive=True, min_interval=0.0)
+        b = sg.SharedRateLimiter(second, 0.0, adaptive=True, min_interval=0.0)
+        a.acquire("example.com")
+        a.record("example.com", 429, 0.01)
+        raised = a.bucket("example.com").interval
+        assert raised > 0
+        b.acquire("example.com")
+        assert b.bucket("example.com").interval == raised
+
+        fixed = sg.SharedRateLimiter(second, 0.0)
+        fixed.record("other.com", 429, 0.01)
+        _, interval = second.reserve_slot("other.com", 0.0)
+        assert interval == 0.0
+    finally:
+        first.close()
+        second.close()
+
+
+def test_merge_shards_folds_and_removes_shards(tmp_path):
+    output = tmp_path / "games.jsonl"
+    sg.save_dataset(output, {"a": {"slug": "a", "name": "Old"}})
+    for worker, entries in {
+        "w1": [{"slug": "a", "name": "New"}],
+        "w2": [{"slug": "b", "name": "B"}],
+    }.items():
+        log = sg.DatasetLog(sg.shard_path(output, worker))
+        for entry in entries:
+            log.append(entry)
+        # w2 "crashes" and leaves only log segments behind.
+        log.close(compact=worker == "w1")
+
+    assert sg.merge_shards(output) == 2
+    assert sg.shard_sources(output) == []
+    assert list(tmp_path.glob("games.jsonl.shard-*")) == []
+    records = sg.load_dataset(output)
+    assert records["a"]["name"] == "New"
+    assert records["b"]["name"] == "B"
+
+
+def test_merge_shards_keeps_the_newest_record_across_shards(tmp_path):
+    output = tmp_path / "games.jsonl"
+    for worker, seen in {
+        "a": "2025-10-02T10:00:00+00:00",
+        "b": "2025-10-01T10:00:00+00:00",
+    }.items():
+        log = sg.DatasetLog(sg.shard_path(output, worker))
+        log.append({"slug": "x", "name": f"from {worker}", "fetched_at": seen, "last_seen": seen})
+        log.close()
+
+    sg.merge_shards(output)
+    assert sg.load_dataset(output)["x"]["name"] == "from a"
+
+
+def test_merge_shards_folds_pending_dataset_log_first(tmp_path):
+    output = tmp_path / "games.jsonl"
+    sg.save_dataset(output, {"x": {"slug": "x", "name": "old-main"}})
+    main = sg.DatasetLog(output)
+    main.append({"slug": "x", "name": "old-main-wal"})
+    main.close(compact=False)
+    shard = sg.DatasetLog(sg.shard_path(output, "w1"))
+    shard.append({"slug": "x", "name": "shard"})
+    shard.close()
+
+    sg.merge_shards(output)
+    assert sg.wal_segments(output) == []
+    view = sg.open_dataset(output)
+    try:
+        assert view["x"]["name"] == "shard"
+    finally:
+        view.close()
+
+
+def test_coordinator_only_enqueues(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "games.jsonl"
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    sg.save_dataset(output, {"fresh": {"slug": "fresh", "fetched_at": fetched_at}})
+
+    argv = ["--queue", "queue.db", "--output", str(output), "--max-age", "3600"]
+    assert sg.main(argv + ["alpha", "bravo", "fresh", "alpha"]) == 0
+
+    queue = sg.WorkQueue(tmp_path / "queue.db")
+    try:
+        assert queue.counts() == {"pending": 2}
+    finally:
+        queue.close()
+    # No robots.txt was fetched and nothing was logged next to the dataset.
+    assert not (tmp_path / ".http_cache").exists()
+    assert not sg.wal_segments(output)
+    assert not (tmp_path / "games.jsonl.changes.jsonl").exists()
+
+
+def test_worker_reconciles_against_its_own_shard(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    httpd = standin.StandInServer(("127.0.0.1", 0), standin.StandInConfig(catalog_size=10))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    target = f"{httpd.base_url}/games/bench-0/"
+    argv = ["--queue", "queue.db", "--work", "--worker-id", "w1", "--rate-limit", "0",
+            "--no-cache", "--output", "games.jsonl"]
+    queue = sg.WorkQueue(tmp_path / "queue.db")
+    try:
+        for _ in range(2):
+            # The second round stands in for an expired lease handing the
+            # slug back to the same worker.
+            queue.enqueue([target])
+            assert sg.main(argv) == 0
+    finally:
+        queue.close()
+        httpd.shutdown()
+        httpd.server_close()
+
+    feed = (tmp_path / "games.jsonl.changes.jsonl").read_text(encoding="utf-8")
+    assert [json.loads(line)["change"] for line in feed.splitlines()] == ["added"]